@@ -0,0 +1,60 @@
+"""Add product search vector for full-text search
+
+Revision ID: 3b9d2c7a41f0
+Revises: e6ceb5f50145
+Create Date: 2026-02-03 10:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d2c7a41f0'
+down_revision: Union[str, None] = 'e6ceb5f50145'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS "unaccent"')
+    op.execute("ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector TSVECTOR")
+
+    # unaccent() is not IMMUTABLE, so the vector is stored and maintained by a trigger
+    op.execute("""
+        CREATE OR REPLACE FUNCTION update_products_search_vector()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('simple', unaccent(COALESCE(NEW.name, ''))), 'A') ||
+                setweight(to_tsvector('simple', unaccent(COALESCE(NEW.sku, ''))), 'A') ||
+                setweight(to_tsvector('simple', unaccent(COALESCE(NEW.description, ''))), 'C');
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS update_products_search_vector ON products")
+    op.execute("""
+        CREATE TRIGGER update_products_search_vector
+            BEFORE INSERT OR UPDATE OF name, sku, description ON products
+            FOR EACH ROW
+            EXECUTE FUNCTION update_products_search_vector()
+    """)
+
+    # Backfill existing rows through the trigger
+    op.execute("UPDATE products SET name = name")
+
+    op.execute("DROP INDEX IF EXISTS idx_products_name_search")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_products_search ON products USING gin(search_vector)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_products_search")
+    op.execute("DROP TRIGGER IF EXISTS update_products_search_vector ON products")
+    op.execute("DROP FUNCTION IF EXISTS update_products_search_vector()")
+    op.execute("ALTER TABLE products DROP COLUMN IF EXISTS search_vector")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_products_name_search "
+        "ON products USING gin(to_tsvector('simple', name))"
+    )
@@ -0,0 +1,39 @@
+"""Add keyset pagination indexes
+
+Revision ID: 8f14c2d9e6b3
+Revises: 3b9d2c7a41f0
+Create Date: 2026-02-05 14:31:08.902716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f14c2d9e6b3'
+down_revision: Union[str, None] = '3b9d2c7a41f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Orders: newest first, (created_at, id) row comparison
+    op.execute("DROP INDEX IF EXISTS idx_orders_created")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at DESC, id DESC)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_orders_user_created "
+        "ON orders (user_id, created_at DESC, id DESC)"
+    )
+    # Batches: FEFO order, no-expiry batches last (must match BATCH_KEYSET)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_inventory_fefo "
+        "ON inventory_batches ((COALESCE(expiry_date, 'infinity'::date)), id)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_inventory_fefo")
+    op.execute("DROP INDEX IF EXISTS idx_orders_user_created")
+    op.execute("DROP INDEX IF EXISTS idx_orders_created")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at DESC)")
@@ -0,0 +1,54 @@
+"""Add jobs table
+
+Revision ID: a4f6c2e8d915
+Revises: d2e4a9b1c7f3
+Create Date: 2026-02-14 15:02:47.610582
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f6c2e8d915'
+down_revision: Union[str, None] = 'd2e4a9b1c7f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        DO $$ BEGIN
+            CREATE TYPE job_status AS ENUM ('queued', 'running', 'failed');
+        EXCEPTION WHEN duplicate_object THEN NULL;
+        END $$
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id BIGSERIAL PRIMARY KEY,
+            queue VARCHAR(50) NOT NULL DEFAULT 'default',
+            name VARCHAR(100) NOT NULL,
+            payload JSONB NOT NULL DEFAULT '{}',
+            status job_status NOT NULL DEFAULT 'queued',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 5,
+            run_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            locked_at TIMESTAMP WITH TIME ZONE,
+            locked_by VARCHAR(100),
+            last_error TEXT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Claim order of ready jobs; running/failed rows stay out of the index
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(queue, run_at, id) WHERE status = 'queued'"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_jobs_running ON jobs(locked_at) WHERE status = 'running'"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS jobs")
+    op.execute("DROP TYPE IF EXISTS job_status")
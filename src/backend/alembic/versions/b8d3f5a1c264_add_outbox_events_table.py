@@ -0,0 +1,42 @@
+"""Add outbox_events table
+
+Revision ID: b8d3f5a1c264
+Revises: a4f6c2e8d915
+Create Date: 2026-02-15 10:41:09.208315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d3f5a1c264'
+down_revision: Union[str, None] = 'a4f6c2e8d915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS outbox_events (
+            id BIGSERIAL PRIMARY KEY,
+            aggregate_type VARCHAR(50) NOT NULL,
+            aggregate_id VARCHAR(50) NOT NULL,
+            event_type VARCHAR(100) NOT NULL,
+            payload JSONB NOT NULL DEFAULT '{}',
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            published_at TIMESTAMP WITH TIME ZONE
+        )
+    """)
+    # Relay scan (unpublished, id order) and purge of old published events
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_outbox_unpublished ON outbox_events(id) WHERE published_at IS NULL"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_outbox_published ON outbox_events(published_at) WHERE published_at IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS outbox_events")
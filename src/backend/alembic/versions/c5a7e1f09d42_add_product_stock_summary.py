@@ -0,0 +1,140 @@
+"""Add product_stock summary table
+
+Revision ID: c5a7e1f09d42
+Revises: 8f14c2d9e6b3
+Create Date: 2026-02-09 09:18:27.331045
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a7e1f09d42'
+down_revision: Union[str, None] = '8f14c2d9e6b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS product_stock (
+            product_id INTEGER PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+            quantity_on_hand INTEGER NOT NULL DEFAULT 0,
+            quantity_reserved INTEGER NOT NULL DEFAULT 0,
+            quantity_available INTEGER GENERATED ALWAYS AS (quantity_on_hand - quantity_reserved) STORED,
+            next_expiry DATE,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_product_stock_available ON product_stock(quantity_available)"
+    )
+
+    op.execute("""
+        CREATE OR REPLACE VIEW v_product_stock_actual AS
+        SELECT
+            p.id AS product_id,
+            COALESCE(SUM(ib.quantity_on_hand), 0)::INTEGER AS quantity_on_hand,
+            COALESCE(SUM(ib.quantity_reserved), 0)::INTEGER AS quantity_reserved,
+            MIN(ib.expiry_date) FILTER (WHERE ib.quantity_on_hand > ib.quantity_reserved) AS next_expiry
+        FROM products p
+        LEFT JOIN inventory_batches ib
+            ON ib.product_id = p.id
+           AND (ib.expiry_date IS NULL OR ib.expiry_date > CURRENT_DATE)
+        GROUP BY p.id
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_product_stock(p_product_ids INTEGER[] DEFAULT NULL)
+        RETURNS INTEGER AS $$
+        DECLARE
+            changed INTEGER;
+        BEGIN
+            INSERT INTO product_stock (product_id, quantity_on_hand, quantity_reserved, next_expiry, updated_at)
+            SELECT product_id, quantity_on_hand, quantity_reserved, next_expiry, CURRENT_TIMESTAMP
+            FROM v_product_stock_actual
+            WHERE p_product_ids IS NULL OR product_id = ANY(p_product_ids)
+            ON CONFLICT (product_id) DO UPDATE SET
+                quantity_on_hand = EXCLUDED.quantity_on_hand,
+                quantity_reserved = EXCLUDED.quantity_reserved,
+                next_expiry = EXCLUDED.next_expiry,
+                updated_at = EXCLUDED.updated_at
+            WHERE (product_stock.quantity_on_hand, product_stock.quantity_reserved, product_stock.next_expiry)
+                IS DISTINCT FROM (EXCLUDED.quantity_on_hand, EXCLUDED.quantity_reserved, EXCLUDED.next_expiry);
+            GET DIAGNOSTICS changed = ROW_COUNT;
+            RETURN changed;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Backfill
+    op.execute("SELECT refresh_product_stock()")
+
+    # Stock readers in SQL go through the summary as well
+    op.execute("""
+        CREATE OR REPLACE FUNCTION get_available_stock(p_product_id INTEGER)
+        RETURNS INTEGER AS $$
+        BEGIN
+            RETURN COALESCE(
+                (SELECT quantity_available
+                 FROM product_stock
+                 WHERE product_id = p_product_id),
+                0
+            );
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # p.* expands to the current product columns, so the view is recreated
+    op.execute("DROP VIEW IF EXISTS v_products_with_stock")
+    op.execute("""
+        CREATE VIEW v_products_with_stock AS
+        SELECT
+            p.*,
+            c.name AS category_name,
+            c.slug AS category_slug,
+            COALESCE(ps.quantity_available, 0) AS available_stock,
+            COALESCE(p.sale_price, p.base_price) AS current_price,
+            ps.next_expiry AS nearest_expiry
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+        LEFT JOIN product_stock ps ON ps.product_id = p.id
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW IF EXISTS v_products_with_stock")
+    op.execute("""
+        CREATE VIEW v_products_with_stock AS
+        SELECT
+            p.*,
+            c.name AS category_name,
+            c.slug AS category_slug,
+            COALESCE(get_available_stock(p.id), 0) AS available_stock,
+            COALESCE(p.sale_price, p.base_price) AS current_price,
+            (SELECT MIN(expiry_date)
+             FROM inventory_batches ib
+             WHERE ib.product_id = p.id
+               AND ib.quantity_on_hand > ib.quantity_reserved
+               AND (ib.expiry_date IS NULL OR ib.expiry_date > CURRENT_DATE)
+            ) AS nearest_expiry
+        FROM products p
+        LEFT JOIN categories c ON p.category_id = c.id
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION get_available_stock(p_product_id INTEGER)
+        RETURNS INTEGER AS $$
+        BEGIN
+            RETURN COALESCE(
+                (SELECT SUM(quantity_on_hand - quantity_reserved)
+                 FROM inventory_batches
+                 WHERE product_id = p_product_id
+                   AND (expiry_date IS NULL OR expiry_date > CURRENT_DATE)),
+                0
+            );
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP FUNCTION IF EXISTS refresh_product_stock(INTEGER[])")
+    op.execute("DROP VIEW IF EXISTS v_product_stock_actual")
+    op.execute("DROP TABLE IF EXISTS product_stock")
@@ -0,0 +1,26 @@
+"""Add product image variants
+
+Revision ID: d2e4a9b1c7f3
+Revises: c5a7e1f09d42
+Create Date: 2026-02-12 10:41:05.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2e4a9b1c7f3'
+down_revision: Union[str, None] = 'c5a7e1f09d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Thumbnail URLs per format and width, written by the image upload pipeline
+    op.execute("ALTER TABLE products ADD COLUMN IF NOT EXISTS image_variants JSON")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE products DROP COLUMN IF EXISTS image_variants")
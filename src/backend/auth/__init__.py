@@ -1,5 +1,5 @@
 """Auth module initialization"""
 from auth.schemas import LoginRequest, RegisterRequest, TokenResponse
 from auth.service import AuthService
-from auth.dependencies import get_current_user, require_roles
+from auth.dependencies import get_current_user, get_current_db_user, require_roles
 
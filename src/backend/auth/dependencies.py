@@ -3,13 +3,15 @@ Authentication Dependencies
 """
 
 from typing import List
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_db
+from core.config import settings
+from core.database import get_db, mark_user_write
 from core.security import verify_token
 from core.exceptions import UnauthorizedException, ForbiddenException
+from users.cache import get_cached_user, cache_user, is_token_revoked
 from users.models import User, UserRole
 from users.service import UserService
 
@@ -18,33 +20,79 @@ from users.service import UserService
 security = HTTPBearer()
 
 
+async def get_token_payload(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> dict:
+    """
+    Decode and verify the access token (once per request).
+    
+    Raises:
+        UnauthorizedException: If token is invalid
+    """
+    payload = verify_token(credentials.credentials, token_type="access")
+    if payload is None:
+        raise UnauthorizedException(detail="Invalid or expired token")
+    
+    if payload.get("sub") is None:
+        raise UnauthorizedException(detail="Invalid token payload")
+    
+    return payload
+
+
+# Methods that do not change state (no read-your-writes pinning)
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    request: Request,
+    payload: dict = Depends(get_token_payload),
     db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Get current authenticated user from JWT token.
     
+    With AUTH_TRUST_TOKEN_CLAIMS the user usually comes from the user cache
+    (a detached snapshot without password_hash) after a revocation check;
+    use get_current_db_user to modify the user. Write requests pin the
+    user's reads to the primary database (see get_read_db).
+    
     Raises:
-        UnauthorizedException: If token is invalid or user not found
+        UnauthorizedException: If token is revoked or user not found/inactive
     """
-    token = credentials.credentials
-    
-    payload = verify_token(token, token_type="access")
-    if payload is None:
-        raise UnauthorizedException(detail="Invalid or expired token")
+    user_id = int(payload["sub"])
+    user = None
     
-    user_id = payload.get("sub")
-    if user_id is None:
-        raise UnauthorizedException(detail="Invalid token payload")
+    if settings.AUTH_TRUST_TOKEN_CLAIMS:
+        revoked = await is_token_revoked(user_id, payload.get("iat"))
+        if revoked:
+            raise UnauthorizedException(detail="Token has been revoked")
+        if revoked is False:
+            user = await get_cached_user(user_id)
     
-    user = await UserService.get_by_id(db, int(user_id))
     if user is None:
-        raise UnauthorizedException(detail="User not found")
+        user = await UserService.get_by_id(db, user_id)
+        if user is None:
+            raise UnauthorizedException(detail="User not found")
+        if settings.AUTH_TRUST_TOKEN_CLAIMS:
+            await cache_user(user)
     
     if not user.is_active:
         raise UnauthorizedException(detail="User is inactive")
     
+    if request.method not in SAFE_METHODS:
+        await mark_user_write(user.id)
+    
+    return user
+
+
+async def get_current_db_user(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Get current user loaded in the request session (for updates)"""
+    user = await UserService.get_by_id(db, current_user.id)
+    if user is None or not user.is_active:
+        raise UnauthorizedException(detail="User not found or inactive")
     return user
 
 
@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
+from core.security import token_cache
 from users.models import User
 from users.schemas import UserResponse
 from auth.schemas import (
@@ -15,9 +16,10 @@ from auth.schemas import (
     RefreshTokenRequest,
     PasswordChangeRequest,
     AuthResponse,
+    TokenCacheStats,
 )
 from auth.service import AuthService
-from auth.dependencies import get_current_user
+from auth.dependencies import get_current_user, get_current_db_user, require_admin
 
 router = APIRouter(prefix="/auth")
 
@@ -96,7 +98,7 @@ async def get_me(
 async def change_password(
     request: PasswordChangeRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_db_user)
 ):
     """
     Change password for current user.
@@ -111,3 +113,12 @@ async def change_password(
     )
     return {"message": "Password changed successfully"}
 
+
+@router.get("/token-cache", response_model=TokenCacheStats)
+async def get_token_cache_stats(
+    current_user: User = Depends(require_admin)
+):
+    """
+    Verified-token cache hit/miss counters of this worker (Admin only).
+    """
+    return token_cache.stats()
@@ -45,3 +45,12 @@ class AuthResponse(BaseModel):
     user: UserResponse
     tokens: TokenResponse
 
+
+class TokenCacheStats(BaseModel):
+    """Verified-token cache counters (per worker process)"""
+    size: int
+    max_entries: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: float
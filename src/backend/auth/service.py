@@ -10,8 +10,8 @@ from users.service import UserService
 from core.security import (
     create_access_token,
     create_refresh_token,
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     verify_token,
 )
 from core.exceptions import UnauthorizedException, BadRequestException
@@ -114,10 +114,10 @@ class AuthService:
         Raises:
             BadRequestException: If current password is incorrect
         """
-        if not verify_password(current_password, user.password_hash):
+        if not await verify_password_async(current_password, user.password_hash):
             raise BadRequestException(detail="Current password is incorrect")
         
-        user.password_hash = get_password_hash(new_password)
+        user.password_hash = await get_password_hash_async(new_password)
         await db.commit()
         return True
 
@@ -0,0 +1,161 @@
+"""
+Product image pipeline - content-hashed originals and resized variants
+
+An upload is stored as {sku}.{hash}.{ext} next to WebP (and AVIF, when the
+pillow-avif-plugin is installed) thumbnails {sku}.w{width}.{hash}.{format}
+at PRODUCT_IMAGE_WIDTHS. The hash is taken over each file's own bytes, so a
+file name never points at different content and /uploads can serve hashed
+files as immutable. The request only stores the original (store_original,
+on an upload copied to disk by core.uploads.save_upload); thumbnails are
+generated by the catalog.generate_thumbnails background job.
+"""
+
+import hashlib
+import io
+import logging
+import os
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+try:
+    import pillow_avif  # noqa: F401 - registers the AVIF plugin with Pillow
+except ImportError:
+    pillow_avif = None
+
+from core.config import settings
+from core.exceptions import BadRequestException
+
+logger = logging.getLogger(__name__)
+
+# URL prefix the upload directory is mounted at (main.py)
+UPLOADS_URL = "/uploads"
+
+HASH_LENGTH = 16
+
+# Unsupported formats already logged (warn once per process)
+_skipped_formats: set = set()
+
+# Pillow save arguments per variant format
+FORMAT_OPTIONS = {
+    "webp": {"format": "WEBP", "method": 6},
+    "avif": {"format": "AVIF", "speed": 6},
+}
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def available_formats() -> List[str]:
+    """Configured variant formats this Pillow build can encode"""
+    Image.init()  # Load the format plugins so Image.SAVE is complete
+    formats = []
+    for name in settings.product_image_formats:
+        options = FORMAT_OPTIONS.get(name)
+        if options is None or options["format"] not in Image.SAVE:
+            if name not in _skipped_formats:
+                _skipped_formats.add(name)
+                logger.warning(f"Image format '{name}' is not supported by this Pillow build, skipped")
+            continue
+        formats.append(name)
+    return formats
+
+
+def _write(directory: str, filename: str, data: bytes) -> str:
+    """Write a file atomically (temp file + rename) and return its name"""
+    path = os.path.join(directory, filename)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return filename
+
+
+def _encode(image: Image.Image, image_format: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, quality=settings.PRODUCT_IMAGE_QUALITY, **FORMAT_OPTIONS[image_format])
+    return buffer.getvalue()
+
+
+def _load(path: str) -> Image.Image:
+    """Decode an upload, applying EXIF rotation (BadRequestException if not an image)"""
+    try:
+        with Image.open(path) as opened:
+            opened.load()
+            image = ImageOps.exif_transpose(opened)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise BadRequestException(detail="Invalid image file") from e
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+    return image
+
+
+def store_original(source: str, directory: str, stem: str, extension: str, sha256: str) -> str:
+    """
+    Check an uploaded image and move it to its content-hashed name.
+
+    Only the header is parsed (fast enough for the request); thumbnails are
+    generated later by generate_variants (catalog.generate_thumbnails job).
+
+    Args:
+        source: Uploaded file, a temporary file in `directory` (see save_upload)
+        directory: Target directory
+        stem: Base file name, e.g. the product SKU
+        extension: Extension of the original, e.g. "jpg"
+        sha256: Hex digest of the upload
+
+    Returns:
+        File name of the original in `directory`
+    """
+    try:
+        with Image.open(source) as opened:
+            opened.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise BadRequestException(detail="Invalid image file") from e
+    original = f"{stem}.{sha256[:HASH_LENGTH]}.{extension}"
+    os.replace(source, os.path.join(directory, original))
+    return original
+
+
+def generate_variants(directory: str, original: str, stem: str) -> Dict[str, Dict[str, str]]:
+    """
+    Write the thumbnails of a stored original.
+
+    Blocking (decoding and encoding take tens to hundreds of ms): call it
+    through asyncio.to_thread.
+
+    Returns:
+        {format: {width: file name}}
+    """
+    image = _load(os.path.join(directory, original))
+
+    # Never upscale; an image narrower than every width gets one variant at its own size
+    widths = [w for w in settings.product_image_widths if w < image.width] or [image.width]
+    formats = available_formats()
+    variants: Dict[str, Dict[str, str]] = {}
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for image_format in formats:
+            encoded = _encode(resized, image_format)
+            filename = f"{stem}.w{width}.{content_hash(encoded)}.{image_format}"
+            variants.setdefault(image_format, {})[str(width)] = _write(directory, filename, encoded)
+    return variants
+
+
+def upload_url(relative_path: str) -> str:
+    """Public URL of a file below UPLOAD_DIR"""
+    return f"{UPLOADS_URL}/{relative_path}"
+
+
+def variant_urls(subdirectory: str, variants: dict) -> Optional[dict]:
+    """Map the variant file names of generate_variants to public URLs"""
+    if not variants:
+        return None
+    return {
+        image_format: {width: upload_url(f"{subdirectory}/{name}") for width, name in by_width.items()}
+        for image_format, by_width in variants.items()
+    }
@@ -6,6 +6,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional, List, TYPE_CHECKING
 from sqlalchemy import String, Boolean, Text, Numeric, Integer, ForeignKey, JSON
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.database import Base
@@ -49,10 +50,14 @@ class Product(Base):
     unit: Mapped[str] = mapped_column(String(50), default="cái")
     image_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     images: Mapped[Optional[List[str]]] = mapped_column(JSON, default=list)
+    # Thumbnail URLs of image_path: {format: {width: url}}, see catalog.images
+    image_variants: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
     specifications: Mapped[Optional[dict]] = mapped_column(JSON, default=dict)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     is_age_restricted: Mapped[bool] = mapped_column(Boolean, default=False)
     min_age: Mapped[int] = mapped_column(Integer, default=0)
+    # Full-text search document (name, sku, description), maintained by a DB trigger
+    search_vector: Mapped[Optional[str]] = mapped_column(TSVECTOR, nullable=True, deferred=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -2,14 +2,17 @@
 Catalog API Router - Categories and Products
 """
 
+import asyncio
 import os
-import shutil
 from typing import Optional
 from decimal import Decimal
-from fastapi import APIRouter, Depends, Query, UploadFile, File
+from fastapi import APIRouter, Depends, Query, Request, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_db
+from core.database import get_db, get_read_db
+from core.http_cache import cached_json_response
+from core.pagination import wants_total
+from core.uploads import save_upload
 from core.config import settings
 from core.exceptions import BadRequestException
 from users.models import UserRole
@@ -17,11 +20,17 @@ from auth.dependencies import get_current_user, require_roles
 from catalog.schemas import (
     CategoryCreate, CategoryUpdate, CategoryResponse, CategoryListResponse,
     ProductCreate, ProductUpdate, ProductResponse, ProductListResponse,
+    ProductSearchMode,
 )
 from catalog.service import CategoryService, ProductService
+from catalog.images import store_original, upload_url
+from jobs.queue import JobQueue
 
 router = APIRouter()
 
+# Accepted upload types and the extension the original is stored with
+IMAGE_EXTENSIONS = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+
 
 # =====================================================
 # Category Endpoints
@@ -29,46 +38,62 @@ router = APIRouter()
 
 @router.get("/categories", response_model=CategoryListResponse)
 async def list_categories(
+    request: Request,
     is_active: Optional[bool] = None,
-    db: AsyncSession = Depends(get_db)
+    active_products_only: bool = Query(False, description="Count only active products"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List all categories.
     
     - Public endpoint
     - Can filter by active status
+    - ETag / If-None-Match (304) and Cache-Control for browsers and CDNs
     """
-    categories, total = await CategoryService.get_all(db, is_active=is_active)
-    return CategoryListResponse(
-        items=[CategoryResponse.model_validate(c) for c in categories],
-        total=total
+    categories, total = await CategoryService.get_all_cached(
+        db, is_active=is_active, active_products_only=active_products_only
     )
+    return cached_json_response(request, CategoryListResponse(items=categories, total=total))
+
+
+@router.get("/categories/tree", response_model=CategoryListResponse)
+async def get_category_tree(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get the storefront category menu.
+    
+    - Public endpoint
+    - Active categories only, counting active products
+    - Cached server-side
+    - ETag / If-None-Match (304) and Cache-Control for browsers and CDNs
+    """
+    tree = await CategoryService.get_tree(db)
+    return cached_json_response(request, CategoryListResponse(items=tree, total=len(tree)))
 
 
 @router.get("/categories/{category_id}", response_model=CategoryResponse)
 async def get_category(
+    request: Request,
     category_id: int,
-    db: AsyncSession = Depends(get_db)
+    active_products_only: bool = Query(False, description="Count only active products"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get category by ID.
     
     - Public endpoint
+    - ETag / If-None-Match (304) and Cache-Control for browsers and CDNs
     """
     from core.exceptions import NotFoundException
-    category = await CategoryService.get_by_id(db, category_id)
+    category = await CategoryService.get_with_product_count(
+        db, category_id, active_products_only=active_products_only
+    )
     if not category:
         raise NotFoundException(detail="Category not found")
     
-    # Add product count
-    from sqlalchemy import select, func
-    from catalog.models import Product
-    count_result = await db.execute(
-        select(func.count(Product.id)).where(Product.category_id == category_id)
-    )
-    category.product_count = count_result.scalar() or 0
-    
-    return CategoryResponse.model_validate(category)
+    return cached_json_response(request, CategoryResponse.model_validate(category))
 
 
 @router.post("/categories", response_model=CategoryResponse)
@@ -123,6 +148,7 @@ async def delete_category(
 
 @router.get("/products", response_model=ProductListResponse)
 async def list_products(
+    request: Request,
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
     category_id: Optional[int] = None,
@@ -130,51 +156,64 @@ async def list_products(
     search: Optional[str] = None,
     min_price: Optional[Decimal] = None,
     max_price: Optional[Decimal] = None,
-    db: AsyncSession = Depends(get_db)
+    search_mode: ProductSearchMode = ProductSearchMode.CONTAINS,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces page)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: offset pages only)"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List products with pagination and filters.
     
     - Public endpoint
     - Supports search, category filter, price range
+    - search_mode=contains (default): substring match on name, SKU and
+      description, so partial words match (search-as-you-type)
+    - search_mode=fulltext: accent-insensitive word search, ranked by
+      relevance and indexed (whole words only)
+    - Keyset pagination: follow next_cursor instead of page numbers
+      (full-text search results are ranked and use page numbers only)
+    - ETag / If-None-Match (304) and Cache-Control for browsers and CDNs
     """
     skip = (page - 1) * size
-    products, total = await ProductService.get_all(
+    products, total, next_cursor = await ProductService.get_all_cached(
         db, skip=skip, limit=size,
         category_id=category_id,
         is_active=is_active,
         search=search,
         min_price=min_price,
-        max_price=max_price
+        max_price=max_price,
+        search_mode=search_mode,
+        cursor=cursor,
+        with_total=wants_total(cursor, include_total),
     )
     
-    return ProductListResponse(
-        items=[ProductResponse.model_validate(p) for p in products],
+    return cached_json_response(request, ProductListResponse(
+        items=products,
         total=total,
-        page=page,
-        size=size
-    )
+        page=None if cursor else page,
+        size=size,
+        next_cursor=next_cursor
+    ))
 
 
 @router.get("/products/{product_id}", response_model=ProductResponse)
 async def get_product(
+    request: Request,
     product_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get product by ID with stock info.
     
     - Public endpoint
+    - ETag / If-None-Match (304) and Cache-Control for browsers and CDNs
     """
     from core.exceptions import NotFoundException
-    product = await ProductService.get_by_id(db, product_id)
+    product = await ProductService.get_by_id_cached(db, product_id)
     if not product:
         raise NotFoundException(detail="Product not found")
     
-    product.category_name = product.category.name if product.category else None
-    product.available_stock = await ProductService.get_available_stock(db, product_id)
-    
-    return ProductResponse.model_validate(product)
+    return cached_json_response(request, product)
 
 
 @router.post("/products", response_model=ProductResponse)
@@ -235,43 +274,47 @@ async def upload_product_image(
     
     - Requires Staff or Admin role
     - Accepts jpg, jpeg, png, webp
-    - Max size: 5MB
+    - Max size: 5MB (MAX_UPLOAD_SIZE), larger bodies are rejected (413) before parsing
+    - Stores a content-hashed original; WebP/AVIF thumbnails (image_variants)
+      are generated by a background job shortly after
     """
     # Validate file type
-    allowed_types = ["image/jpeg", "image/png", "image/webp"]
-    if file.content_type not in allowed_types:
+    if file.content_type not in IMAGE_EXTENSIONS:
         raise BadRequestException(detail="Invalid file type. Allowed: jpg, png, webp")
     
-    # Validate file size
-    contents = await file.read()
-    if len(contents) > settings.MAX_UPLOAD_SIZE:
-        raise BadRequestException(detail=f"File too large. Max: {settings.MAX_UPLOAD_SIZE // 1024 // 1024}MB")
-    
     # Get product to find category
     product = await ProductService.get_by_id(db, product_id)
     if not product:
         from core.exceptions import NotFoundException
         raise NotFoundException(detail="Product not found")
     
-    # Create upload directory
+    # Copy to disk in chunks (body size already limited by UploadSizeLimitMiddleware)
     category_slug = product.category.slug if product.category else "uncategorized"
     upload_dir = os.path.join(settings.UPLOAD_DIR, category_slug)
-    os.makedirs(upload_dir, exist_ok=True)
+    upload = await save_upload(file, upload_dir)
     
-    # Save file
-    ext = file.filename.split(".")[-1] if file.filename else "jpg"
-    filename = f"{product.sku}.{ext}"
-    file_path = os.path.join(upload_dir, filename)
+    # Check the header and rename to the hashed name; thumbnails follow in a job
+    try:
+        original = await asyncio.to_thread(
+            store_original, upload.path, upload_dir, product.sku,
+            IMAGE_EXTENSIONS[file.content_type], upload.sha256
+        )
+    finally:
+        await asyncio.to_thread(upload.discard)  # No-op once renamed
     
-    with open(file_path, "wb") as f:
-        f.write(contents)
+    image_path = upload_url(f"{category_slug}/{original}")
+    JobQueue.enqueue(db, "catalog.generate_thumbnails", {
+        "product_id": product_id,
+        "sku": product.sku,
+        "subdirectory": category_slug,
+        "original": original,
+        "image_path": image_path,
+    })
     
-    # Update product image path
-    relative_path = f"{category_slug}/{filename}"
-    product = await ProductService.update_image(db, product_id, relative_path)
+    # Update product image path (commits the job with it)
+    product = await ProductService.update_image(db, product_id, image_path, None)
     
-    product.category_name = product.category.name if product.category else None
-    product.available_stock = await ProductService.get_available_stock(db, product_id)
+    await ProductService.attach_stock_info(db, [product])
     
     return ProductResponse.model_validate(product)
 
@@ -3,6 +3,7 @@ Catalog Pydantic Schemas
 """
 
 from datetime import datetime
+from enum import Enum
 from decimal import Decimal
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field
@@ -97,6 +98,7 @@ class ProductResponse(ProductBase):
     """Schema for product response"""
     id: int
     image_path: Optional[str] = None
+    image_variants: Optional[Dict[str, Dict[str, str]]] = None  # {"webp": {"320": url}}
     current_price: Decimal
     created_at: datetime
     updated_at: datetime
@@ -110,9 +112,16 @@ class ProductResponse(ProductBase):
 class ProductListResponse(BaseModel):
     """Schema for paginated product list"""
     items: List[ProductResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # Omitted for cursor pages unless include_total=true
+    page: Optional[int] = None  # None for cursor pages
     size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
+
+
+class ProductSearchMode(str, Enum):
+    """How the product `search` term is matched"""
+    FULLTEXT = "fulltext"  # search_vector @@ websearch_to_tsquery, ranked (indexed)
+    CONTAINS = "contains"  # ILIKE '%term%' substring match (sequential scan)
 
 
 class ProductSearchParams(BaseModel):
@@ -2,15 +2,34 @@
 Catalog Service - Business Logic for Categories and Products
 """
 
-from typing import Optional, List
+from typing import Optional, List, Dict
 from decimal import Decimal
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, update, func, or_, and_, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from catalog.models import Category, Product
-from catalog.schemas import CategoryCreate, CategoryUpdate, ProductCreate, ProductUpdate
+from catalog.schemas import (
+    CategoryCreate, CategoryUpdate, CategoryResponse,
+    ProductCreate, ProductUpdate, ProductResponse, ProductSearchMode,
+)
+from core.cache import get_or_load, invalidate_namespace
+from core.config import settings
 from core.exceptions import NotFoundException, ConflictException
+from core.pagination import Keyset
+
+
+# Cache namespace shared by products and categories: any catalog write
+# changes product payloads (category_name) or category product counts.
+CATALOG_CACHE_NAMESPACE = "catalog"
+
+
+async def invalidate_catalog_cache() -> None:
+    """Drop all cached catalog reads"""
+    await invalidate_namespace(CATALOG_CACHE_NAMESPACE)
+
+
+PRODUCT_KEYSET = Keyset(Product.id)
 
 
 class CategoryService:
@@ -32,30 +51,85 @@ class CategoryService:
         )
         return result.scalar_one_or_none()
     
+    @staticmethod
+    def _select_with_product_count(active_products_only: bool = False):
+        """Build a query selecting categories with their product count (one grouped join)"""
+        join_condition = Product.category_id == Category.id
+        if active_products_only:
+            join_condition = and_(join_condition, Product.is_active == True)
+        
+        return (
+            select(Category, func.count(Product.id).label("product_count"))
+            .outerjoin(Product, join_condition)
+            .group_by(Category.id)
+        )
+    
     @staticmethod
     async def get_all(
         db: AsyncSession,
-        is_active: Optional[bool] = None
+        is_active: Optional[bool] = None,
+        active_products_only: bool = False
     ) -> tuple[List[Category], int]:
         """Get all categories with product count"""
-        query = select(Category)
+        query = CategoryService._select_with_product_count(active_products_only)
         
         if is_active is not None:
             query = query.where(Category.is_active == is_active)
         
         query = query.order_by(Category.sort_order, Category.name)
         result = await db.execute(query)
-        categories = result.scalars().all()
         
-        # Get product counts
-        for category in categories:
-            count_result = await db.execute(
-                select(func.count(Product.id))
-                .where(Product.category_id == category.id)
+        categories = []
+        for category, product_count in result.all():
+            category.product_count = product_count
+            categories.append(category)
+        
+        return categories, len(categories)
+    
+    @staticmethod
+    async def get_with_product_count(
+        db: AsyncSession,
+        category_id: int,
+        active_products_only: bool = False
+    ) -> Optional[Category]:
+        """Get category by ID with product count"""
+        query = CategoryService._select_with_product_count(active_products_only)
+        result = await db.execute(query.where(Category.id == category_id))
+        row = result.one_or_none()
+        if row is None:
+            return None
+        
+        category, product_count = row
+        category.product_count = product_count
+        return category
+    
+    @staticmethod
+    async def get_all_cached(
+        db: AsyncSession,
+        is_active: Optional[bool] = None,
+        active_products_only: bool = False
+    ) -> tuple[List[CategoryResponse], int]:
+        """Read-through cached get_all, returning response schemas"""
+        async def load() -> list:
+            categories, _ = await CategoryService.get_all(
+                db, is_active=is_active, active_products_only=active_products_only
             )
-            category.product_count = count_result.scalar() or 0
+            return [CategoryResponse.model_validate(c).model_dump(mode="json") for c in categories]
         
-        return list(categories), len(categories)
+        data = await get_or_load(
+            CATALOG_CACHE_NAMESPACE,
+            f"categories:{is_active}:{active_products_only}",
+            load,
+            settings.CATEGORY_CACHE_TTL,
+        )
+        items = [CategoryResponse.model_validate(c) for c in data]
+        return items, len(items)
+    
+    @staticmethod
+    async def get_tree(db: AsyncSession) -> List[CategoryResponse]:
+        """Get the storefront category tree (active categories, active product counts)"""
+        tree, _ = await CategoryService.get_all_cached(db, is_active=True, active_products_only=True)
+        return tree
     
     @staticmethod
     async def create(db: AsyncSession, data: CategoryCreate) -> Category:
@@ -69,6 +143,7 @@ class CategoryService:
         db.add(category)
         await db.commit()
         await db.refresh(category)
+        await invalidate_catalog_cache()
         category.product_count = 0
         return category
     
@@ -92,6 +167,7 @@ class CategoryService:
         
         await db.commit()
         await db.refresh(category)
+        await invalidate_catalog_cache()
         return category
     
     @staticmethod
@@ -103,6 +179,7 @@ class CategoryService:
         
         await db.delete(category)
         await db.commit()
+        await invalidate_catalog_cache()
         return True
 
 
@@ -137,10 +214,21 @@ class ProductService:
         search: Optional[str] = None,
         min_price: Optional[Decimal] = None,
         max_price: Optional[Decimal] = None,
-    ) -> tuple[List[Product], int]:
-        """Get products with pagination and filters"""
+        search_mode: ProductSearchMode = ProductSearchMode.CONTAINS,
+        cursor: Optional[str] = None,
+        with_total: bool = True,
+    ) -> tuple[List[Product], Optional[int], Optional[str]]:
+        """
+        Get products with pagination and filters.
+        
+        Pages by OFFSET (skip) or by keyset `cursor`; returns (products, total, next_cursor).
+        Products are ordered by id, except offset pages of a full-text search,
+        which are ordered by relevance and have no next_cursor.
+        total is None when with_total is False.
+        """
         query = select(Product).options(selectinload(Product.category))
         count_query = select(func.count(Product.id))
+        rank = None
         
         # Apply filters
         if category_id:
@@ -151,7 +239,14 @@ class ProductService:
             query = query.where(Product.is_active == is_active)
             count_query = count_query.where(Product.is_active == is_active)
         
-        if search:
+        if search and search_mode == ProductSearchMode.FULLTEXT:
+            ts_query = ProductService.search_query(search)
+            search_filter = Product.search_vector.op("@@")(ts_query)
+            query = query.where(search_filter)
+            count_query = count_query.where(search_filter)
+            if not cursor:
+                rank = func.ts_rank_cd(Product.search_vector, ts_query)
+        elif search:
             search_filter = or_(
                 Product.name.ilike(f"%{search}%"),
                 Product.sku.ilike(f"%{search}%"),
@@ -169,41 +264,148 @@ class ProductService:
             count_query = count_query.where(Product.base_price <= max_price)
         
         # Get total count
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
+        total = (await db.execute(count_query)).scalar() if with_total else None
         
         # Get paginated results
-        query = query.offset(skip).limit(limit).order_by(Product.id)
-        result = await db.execute(query)
-        products = result.scalars().all()
+        if rank is not None:
+            # Relevance is not a stable sort key, so ranked results page by offset only
+            query = query.order_by(rank.desc(), Product.id).offset(skip).limit(limit)
+            products, next_cursor = list((await db.execute(query)).scalars().all()), None
+        else:
+            if not cursor:
+                query = query.offset(skip)
+            result = await db.execute(PRODUCT_KEYSET.apply(query, cursor, limit))
+            products, next_cursor = PRODUCT_KEYSET.page(result.scalars().all(), limit)
         
-        # Add calculated fields
-        for product in products:
-            product.category_name = product.category.name if product.category else None
-            product.available_stock = await ProductService.get_available_stock(db, product.id)
+        # Add calculated fields (one stock query for the whole page)
+        products = await ProductService.attach_stock_info(db, products)
+        
+        return products, total, next_cursor
+    
+    @staticmethod
+    def search_query(search: str):
+        """
+        tsquery for a user search string (matches Product.search_vector).
+        
+        websearch_to_tsquery accepts free text ("quoted phrases", -exclusions, OR)
+        without raising on syntax errors; unaccent makes "sua" match "sữa".
+        """
+        return func.websearch_to_tsquery(
+            literal_column("'simple'::regconfig"), func.unaccent(search)
+        )
+    
+    @staticmethod
+    async def get_by_id_cached(db: AsyncSession, product_id: int) -> Optional[ProductResponse]:
+        """Read-through cached product detail (with category name and stock)"""
+        async def load() -> Optional[dict]:
+            product = await ProductService.get_by_id(db, product_id)
+            if not product:
+                return None
+            await ProductService.attach_stock_info(db, [product])
+            return ProductResponse.model_validate(product).model_dump(mode="json")
+        
+        data = await get_or_load(
+            CATALOG_CACHE_NAMESPACE, f"product:{product_id}", load, settings.PRODUCT_CACHE_TTL
+        )
+        return ProductResponse.model_validate(data) if data is not None else None
+    
+    @staticmethod
+    async def get_all_cached(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 20,
+        category_id: Optional[int] = None,
+        is_active: Optional[bool] = True,
+        search: Optional[str] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        search_mode: ProductSearchMode = ProductSearchMode.CONTAINS,
+        cursor: Optional[str] = None,
+        with_total: bool = True,
+    ) -> tuple[List[ProductResponse], Optional[int], Optional[str]]:
+        """Read-through cached get_all, returning response schemas"""
+        async def load() -> dict:
+            products, total, next_cursor = await ProductService.get_all(
+                db, skip=skip, limit=limit,
+                category_id=category_id,
+                is_active=is_active,
+                search=search,
+                min_price=min_price,
+                max_price=max_price,
+                search_mode=search_mode,
+                cursor=cursor,
+                with_total=with_total,
+            )
+            return {
+                "items": [ProductResponse.model_validate(p).model_dump(mode="json") for p in products],
+                "total": total,
+                "next_cursor": next_cursor,
+            }
         
-        return list(products), total
+        key = (
+            f"products:{skip}:{limit}:{category_id}:{is_active}:{search}:{search_mode.value}:"
+            f"{min_price}:{max_price}:{cursor}:{with_total}"
+        )
+        data = await get_or_load(CATALOG_CACHE_NAMESPACE, key, load, settings.PRODUCT_LIST_CACHE_TTL)
+        return (
+            [ProductResponse.model_validate(p) for p in data["items"]],
+            data["total"],
+            data["next_cursor"],
+        )
     
     @staticmethod
     async def get_available_stock(db: AsyncSession, product_id: int) -> int:
-        """Get available stock for a product (sum of all batches)"""
-        from inventory.models import InventoryBatch
-        from datetime import date
+        """Get available stock for a product (sellable batches, from product_stock)"""
+        stock = await ProductService.get_available_stock_bulk(db, [product_id])
+        return stock[product_id]
+    
+    @staticmethod
+    async def get_available_stock_bulk(db: AsyncSession, product_ids: List[int]) -> Dict[int, int]:
+        """
+        Get available stock for many products from the product_stock summary.
+        
+        Returns:
+            Dict of product_id -> available stock (0 for products without batches)
+        """
+        from inventory.models import ProductStock
+        
+        stock = {product_id: 0 for product_id in product_ids}
+        if not stock:
+            return stock
         
         result = await db.execute(
-            select(func.coalesce(
-                func.sum(InventoryBatch.quantity_on_hand - InventoryBatch.quantity_reserved),
-                0
-            ))
-            .where(
-                InventoryBatch.product_id == product_id,
-                or_(
-                    InventoryBatch.expiry_date.is_(None),
-                    InventoryBatch.expiry_date > date.today()
-                )
-            )
+            select(ProductStock.product_id, ProductStock.quantity_available)
+            .where(ProductStock.product_id.in_(list(stock)))
         )
-        return result.scalar() or 0
+        for product_id, available in result.all():
+            stock[product_id] = int(available or 0)
+        
+        return stock
+    
+    @staticmethod
+    def available_stock_expr(product_id_column):
+        """
+        Scalar subquery for the available stock of `product_id_column`.
+        
+        Lets callers read a row and its stock in the same statement.
+        """
+        from inventory.models import ProductStock
+        
+        return func.coalesce(
+            select(ProductStock.quantity_available)
+            .where(ProductStock.product_id == product_id_column)
+            .scalar_subquery(),
+            0
+        )
+    
+    @staticmethod
+    async def attach_stock_info(db: AsyncSession, products: List[Product]) -> List[Product]:
+        """Set category_name and available_stock on products (category must be loaded)"""
+        stock = await ProductService.get_available_stock_bulk(db, [p.id for p in products])
+        for product in products:
+            product.category_name = product.category.name if product.category else None
+            product.available_stock = stock[product.id]
+        return products
     
     @staticmethod
     async def create(db: AsyncSession, data: ProductCreate) -> Product:
@@ -217,6 +419,7 @@ class ProductService:
         db.add(product)
         await db.commit()
         await db.refresh(product)
+        await invalidate_catalog_cache()
         
         product.category_name = None
         product.available_stock = 0
@@ -246,9 +449,9 @@ class ProductService:
         
         await db.commit()
         await db.refresh(product)
+        await invalidate_catalog_cache()
         
-        product.category_name = product.category.name if product.category else None
-        product.available_stock = await ProductService.get_available_stock(db, product.id)
+        await ProductService.attach_stock_info(db, [product])
         
         return product
     
@@ -261,17 +464,46 @@ class ProductService:
         
         product.is_active = False
         await db.commit()
+        await invalidate_catalog_cache()
         return True
     
     @staticmethod
-    async def update_image(db: AsyncSession, product_id: int, image_path: str) -> Product:
-        """Update product image path"""
+    async def update_image(
+        db: AsyncSession,
+        product_id: int,
+        image_path: str,
+        image_variants: Optional[dict] = None
+    ) -> Product:
+        """Update product image path and its thumbnail URLs"""
         product = await ProductService.get_by_id(db, product_id)
         if not product:
             raise NotFoundException(detail="Product not found")
         
         product.image_path = image_path
+        product.image_variants = image_variants
         await db.commit()
         await db.refresh(product)
+        await invalidate_catalog_cache()
         return product
+    
+    @staticmethod
+    async def set_image_variants(
+        db: AsyncSession,
+        product_id: int,
+        image_path: str,
+        image_variants: Optional[dict]
+    ) -> bool:
+        """
+        Store thumbnail URLs if `image_path` is still the product's image
+        (a newer upload may have replaced it meanwhile).
+        """
+        result = await db.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.image_path == image_path)
+            .values(image_variants=image_variants)
+        )
+        await db.commit()
+        if result.rowcount:
+            await invalidate_catalog_cache()
+        return bool(result.rowcount)
 
@@ -0,0 +1,33 @@
+"""
+Catalog background jobs
+"""
+
+import asyncio
+import os
+
+from core.config import settings
+from core.database import async_session_maker
+from jobs.queue import job
+from catalog.images import generate_variants, variant_urls
+from catalog.service import ProductService
+
+
+@job("catalog.generate_thumbnails", max_concurrency=1)
+async def generate_thumbnails(payload: dict) -> None:
+    """
+    Write the WebP/AVIF thumbnails of an uploaded product image.
+
+    One at a time per worker: encoding is CPU-bound and would starve other
+    jobs. The product is only updated if the image is still current.
+    """
+    subdirectory = payload["subdirectory"]
+    variants = await asyncio.to_thread(
+        generate_variants,
+        os.path.join(settings.UPLOAD_DIR, subdirectory),
+        payload["original"],
+        payload["sku"],
+    )
+    async with async_session_maker() as db:
+        await ProductService.set_image_variants(
+            db, payload["product_id"], payload["image_path"], variant_urls(subdirectory, variants)
+        )
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 import logging
 
+from jobs.queue import JobQueue
+
 # Configure Logging
 logger = logging.getLogger(__name__)
 
@@ -19,27 +21,17 @@ class ContactCreate(BaseModel):
     phone: Optional[str] = Field(None, max_length=20)
     message: str = Field(..., min_length=10, max_length=1000)
 
-# --- Service/Logic (Simulated) ---
-def process_contact_requests(data: ContactCreate):
-    """
-    Simulate processing: sending email, saving to DB, etc.
-    """
-    logger.info(f"📧 Sending email notification for: {data.email}")
-    # Here you would integrate with an email service (e.g., SES, SMTP)
-    # or save to a database.
-    logger.info(f"✅ Contact request from {data.first_name} processed successfully.")
-
 # --- Endpoints ---
 @router.post("/", status_code=200)
-async def submit_contact_form(contact_data: ContactCreate, background_tasks: BackgroundTasks):
+async def submit_contact_form(contact_data: ContactCreate):
     """
     Submit contact form data.
     """
     try:
         logger.info(f"📝 Received contact form submission from: {contact_data.email}")
         
-        # Use background task to "send" the email so we don't block the response
-        background_tasks.add_task(process_contact_requests, contact_data)
+        # Queue the notification (contact.tasks) so we don't block the response
+        await JobQueue.enqueue_now("contact.notify", contact_data.model_dump())
         
         return {
             "success": True,
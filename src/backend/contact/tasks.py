@@ -0,0 +1,20 @@
+"""
+Contact background jobs
+"""
+
+import logging
+
+from jobs.queue import job
+
+logger = logging.getLogger(__name__)
+
+
+@job("contact.notify")
+async def notify_contact_request(payload: dict) -> None:
+    """
+    Simulate processing: sending email, saving to DB, etc.
+    """
+    logger.info(f"📧 Sending email notification for: {payload['email']}")
+    # Here you would integrate with an email service (e.g., SES, SMTP)
+    # or save to a database.
+    logger.info(f"✅ Contact request from {payload['first_name']} processed successfully.")
@@ -4,6 +4,9 @@ from core.database import Base, get_db, engine
 from core.security import (
     verify_password,
     get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
+    password_needs_rehash,
     create_access_token,
     create_refresh_token,
     decode_token,
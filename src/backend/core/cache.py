@@ -0,0 +1,165 @@
+"""
+Cache Module - Async Redis cache with in-process fallback
+
+Values are stored as JSON strings. Keys are versioned twice:
+- CACHE_VERSION (settings) changes every key at once, e.g. when a cached payload shape changes
+- a per-namespace version counter, bumped by invalidate_namespace(), so one write
+  drops every cached entry of that namespace without scanning keys
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCache:
+    """In-process TTL cache (tests, single worker, or no Redis)"""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[str, Optional[float]]] = OrderedDict()
+
+    def _alive(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self._alive(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = int(self._alive(key) or 0) + 1
+        self._data[key] = (str(value), None)
+        return value
+
+    async def close(self) -> None:
+        self._data.clear()
+
+
+class RedisCache:
+    """Redis-backed cache shared by all workers"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> None:
+        await self.client.set(key, value, ex=ttl or None)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+_cache: Optional[MemoryCache | RedisCache] = None
+
+
+def get_cache() -> MemoryCache | RedisCache:
+    """Get the cache backend selected by CACHE_BACKEND ("redis" or "memory")"""
+    global _cache
+    if _cache is None:
+        if settings.CACHE_BACKEND == "redis":
+            _cache = RedisCache(settings.REDIS_URL)
+        else:
+            _cache = MemoryCache()
+    return _cache
+
+
+async def close_cache() -> None:
+    """Close the cache backend (application shutdown)"""
+    global _cache
+    if _cache is not None:
+        await _cache.close()
+        _cache = None
+
+
+def _version_key(namespace: str) -> str:
+    return f"{settings.CACHE_KEY_PREFIX}:ns:{namespace}"
+
+
+async def namespace_version(namespace: str) -> int:
+    """Get the current version counter of a namespace"""
+    return int(await get_cache().get(_version_key(namespace)) or 0)
+
+
+async def invalidate_namespace(namespace: str) -> None:
+    """
+    Invalidate every entry of a namespace by bumping its version.
+
+    Errors are logged, not raised: entries then expire through their TTL.
+    """
+    try:
+        await get_cache().incr(_version_key(namespace))
+    except Exception as e:
+        logger.warning(f"Cache invalidation failed for '{namespace}': {e}")
+
+
+async def get_or_load(
+    namespace: str,
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: int,
+) -> Any:
+    """
+    Read-through cache lookup.
+
+    Returns the cached JSON value for (namespace, key) or calls `loader`,
+    caches its JSON-serializable result for `ttl` seconds and returns it.
+    None results are not cached. Cache errors fall back to the loader.
+    """
+    if ttl <= 0:
+        return await loader()
+
+    cache = get_cache()
+    try:
+        version = await namespace_version(namespace)
+        full_key = f"{settings.CACHE_KEY_PREFIX}:v{settings.CACHE_VERSION}:{namespace}:{version}:{key}"
+        cached = await cache.get(full_key)
+        if cached is not None:
+            return json.loads(cached)
+    except Exception as e:
+        logger.warning(f"Cache read failed for '{namespace}:{key}': {e}")
+        return await loader()
+
+    value = await loader()
+    if value is not None:
+        try:
+            await cache.set(full_key, json.dumps(value), ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed for '{namespace}:{key}': {e}")
+    return value
@@ -2,21 +2,101 @@
 Database Module - Async SQLAlchemy Setup
 """
 
-from typing import AsyncGenerator
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncGenerator, Awaitable, Callable, Optional, TypeVar
+from uuid import uuid4
+from fastapi import Request
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util.queue import AsyncAdaptedQueue, Empty
 
+from core.cache import get_cache
 from core.config import settings
+from core.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# SQLSTATEs that mean "the transaction lost a race, try again":
+# serialization_failure, deadlock_detected
+RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+
+class _MeteredQueue(AsyncAdaptedQueue):
+    """Pool queue that records how long checkouts wait for a free connection"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiting = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+    
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        # The pool asks for a blocking get once overflow is used up, even if
+        # an idle connection is queued; only a get that finds none waits
+        if not block:
+            return super().get(block, timeout)
+        try:
+            return super().get(False)
+        except Empty:
+            pass
+        
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        except Empty:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.waiting -= 1
+            self.waits += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool exposing checkout and wait statistics (pool_stats)"""
+    _queue_class = _MeteredQueue
+
+
+def _engine_options() -> dict:
+    """create_async_engine arguments from the DB_* settings"""
+    if settings.DB_PGBOUNCER:
+        # Transaction pooling gives each transaction any server connection:
+        # prepared statements cannot be reused, and their names must not clash
+        # with those of other clients sharing the server connection
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    else:
+        connect_args = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    
+    return {
+        "echo": settings.DEBUG if settings.DB_ECHO is None else settings.DB_ECHO,
+        "poolclass": MeteredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
 
 
 # Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-)
+engine = create_async_engine(settings.DATABASE_URL, **_engine_options())
 
 # Session factory
 async_session_maker = async_sessionmaker(
@@ -27,6 +107,22 @@ async_session_maker = async_sessionmaker(
     autoflush=False,
 )
 
+# Optional read replica (same pool settings); without one reads use the primary
+read_engine = (
+    create_async_engine(settings.DATABASE_REPLICA_URL, **_engine_options())
+    if settings.DATABASE_REPLICA_URL else engine
+)
+read_session_maker = (
+    async_sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+    if read_engine is not engine else async_session_maker
+)
+
 
 class Base(DeclarativeBase):
     """Base class for all SQLAlchemy models"""
@@ -44,3 +140,120 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
+
+def _primary_reads_key(user_id) -> str:
+    return f"{settings.CACHE_KEY_PREFIX}:db:primary:{user_id}"
+
+
+async def mark_user_write(user_id: int) -> None:
+    """
+    Route a user's reads to the primary for DB_REPLICA_STICKY_SECONDS.
+    
+    Called for every authenticated write request, so the user reads their
+    own changes even while the replica lags (read-your-writes).
+    """
+    if read_engine is engine or settings.DB_REPLICA_STICKY_SECONDS <= 0:
+        return
+    try:
+        await get_cache().set(_primary_reads_key(user_id), "1", settings.DB_REPLICA_STICKY_SECONDS)
+    except Exception as e:
+        logger.warning(f"Could not pin reads of user {user_id} to the primary: {e}")
+
+
+async def read_session_maker_for(request: Request) -> async_sessionmaker:
+    """
+    Session factory for the read-only work of a request.
+    
+    The replica, unless the request carries the token of a user who wrote
+    recently. Anonymous requests always read from the replica.
+    """
+    if read_engine is engine:
+        return async_session_maker
+    
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    payload = verify_token(token) if scheme.lower() == "bearer" and token else None
+    if payload is None or payload.get("sub") is None:
+        return read_session_maker
+    
+    try:
+        recent_write = await get_cache().get(_primary_reads_key(payload["sub"]))
+    except Exception as e:
+        logger.warning(f"Read routing check failed, using the primary: {e}")
+        return async_session_maker
+    return async_session_maker if recent_write is not None else read_session_maker
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for read-only endpoints: a session on the read replica.
+    
+    Falls back to the primary without DATABASE_REPLICA_URL and for users
+    who wrote in the last DB_REPLICA_STICKY_SECONDS. Never write with it.
+    """
+    session_maker = await read_session_maker_for(request)
+    async with session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+def pool_stats() -> dict:
+    """
+    Connection pool statistics of this worker process.
+    
+    waiting/waits/wait_seconds only count checkouts that found the pool
+    exhausted; a steady non-zero `waiting` means the pool is too small for
+    the load (or connections are held too long).
+    """
+    pool = engine.sync_engine.pool
+    queue = pool._pool
+    return {
+        "size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "waiting": queue.waiting,
+        "waits": queue.waits,
+        "wait_seconds": round(queue.wait_seconds, 6),
+        "max_wait_seconds": round(queue.max_wait_seconds, 6),
+        "timeouts": queue.timeouts,
+    }
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Check if a database error is a serialization failure or deadlock"""
+    if not isinstance(error, DBAPIError):
+        return False
+    return getattr(error.orig, "sqlstate", None) in RETRYABLE_SQLSTATES
+
+
+async def run_with_retry(
+    db: AsyncSession,
+    operation: Callable[[], Awaitable[T]],
+    attempts: Optional[int] = None,
+) -> T:
+    """
+    Run a transactional operation, retrying on deadlock/serialization errors.
+    
+    The session is rolled back before each retry, so `operation` must redo all
+    of its reads and must not rely on ORM objects loaded before the failure
+    (rollback expires them). Backoff is exponential with full jitter:
+    sleep(uniform(0, min(DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY * 2**n))).
+    """
+    max_attempts = attempts or settings.DB_RETRY_ATTEMPTS
+    
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return await operation()
+        except DBAPIError as e:
+            if not is_retryable_error(e) or attempt == max_attempts:
+                raise
+            
+            await db.rollback()
+            delay = min(settings.DB_RETRY_MAX_DELAY, settings.DB_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+            logger.warning(
+                f"Retrying transaction after {e.orig.sqlstate} (attempt {attempt}/{max_attempts})"
+            )
+            await asyncio.sleep(random.uniform(0, delay))
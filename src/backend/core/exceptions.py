@@ -33,6 +33,12 @@ class BadRequestException(HTTPException):
         super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
 
 
+class PayloadTooLargeException(HTTPException):
+    """Request body / uploaded file over the size limit"""
+    def __init__(self, detail: str = "Request body too large"):
+        super().__init__(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
 class ConflictException(HTTPException):
     """Conflict - resource already exists"""
     def __init__(self, detail: str = "Resource already exists"):
@@ -49,3 +55,13 @@ class AgeRestrictionError(HTTPException):
     """Age restriction violation"""
     def __init__(self, detail: str = "Age verification required for restricted products"):
         super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+
+class ServiceUnavailableException(HTTPException):
+    """Server overloaded - retry later"""
+    def __init__(self, detail: str = "Service temporarily unavailable", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -0,0 +1,82 @@
+"""
+HTTP Cache Module - ETag / conditional GET for public read endpoints
+
+Responses carry a strong ETag (hash of the JSON body) and Cache-Control with
+stale-while-revalidate, so browsers and a CDN reuse catalog payloads and
+revalidate them with If-None-Match, which is answered with an empty 304.
+
+The ETag hashes the body rather than a version counter: available stock in
+product payloads changes with every checkout, which does not invalidate the
+catalog cache. Hashing the (usually server-cached) payload is cheap next to
+sending it, and the route skips FastAPI's response_model re-validation.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from core.config import settings
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag of a response body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def cache_control(request: Request, max_age: int, stale_while_revalidate: int) -> str:
+    """
+    Cache-Control for a public payload.
+
+    Authenticated requests get "private, no-cache": staff editing the catalog
+    revalidate every time (a 304 still saves the transfer) and shared caches
+    never store them.
+    """
+    if "authorization" in request.headers:
+        return "private, no-cache"
+    return f"public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}"
+
+
+def cached_json_response(
+    request: Request,
+    content: BaseModel,
+    max_age: Optional[int] = None,
+    stale_while_revalidate: Optional[int] = None,
+) -> Response:
+    """
+    Serialize `content` once and answer with 200 + ETag, or 304 if the
+    client already has this representation.
+
+    Args:
+        request: Incoming request (If-None-Match, Authorization)
+        content: Response schema instance
+        max_age: Seconds caches may reuse the response (default CATALOG_HTTP_MAX_AGE)
+        stale_while_revalidate: Seconds a stale copy may be served while refetching
+            (default CATALOG_HTTP_STALE_WHILE_REVALIDATE)
+    """
+    body = content.model_dump_json().encode()
+    etag = make_etag(body)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control(
+            request,
+            settings.CATALOG_HTTP_MAX_AGE if max_age is None else max_age,
+            settings.CATALOG_HTTP_STALE_WHILE_REVALIDATE if stale_while_revalidate is None else stale_while_revalidate,
+        ),
+        "Vary": "Authorization",
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
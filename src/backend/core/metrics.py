@@ -0,0 +1,321 @@
+"""
+Metrics Module - request timing, SQL query counts, Prometheus exposition
+
+MetricsMiddleware times every request; SQLAlchemy cursor events on the
+engines add the number of queries and the database time spent for it.
+Histograms are kept per route template in this worker process and rendered
+in the Prometheus text format by /metrics (scrape each worker, or run one
+worker per scrape target). With SERVER_TIMING the numbers of the request
+are also sent back in a Server-Timing header, visible in browser devtools.
+/metrics requires METRICS_TOKEN (or DEBUG); samples that need queries
+(registered collectors) are reused for METRICS_COLLECTOR_TTL seconds.
+"""
+
+import hmac
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.routing import Mount
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from core.database import pool_stats
+from core.exceptions import NotFoundException, UnauthorizedException
+from core.security import get_hash_pool, token_cache
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+# Label of requests no route matched (404s), kept out of per-path labels
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass
+class RequestStats:
+    """Database work of the current request"""
+    started: float = field(default_factory=time.perf_counter)
+    queries: int = 0
+    db_seconds: float = 0.0
+
+    def server_timing(self) -> str:
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        return (
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries", '
+            f"app;dur={elapsed_ms:.1f}"
+        )
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Stats of the request being handled, None outside of requests"""
+    return _request_stats.get()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+
+
+class Histogram:
+    """Prometheus histogram with a fixed label set"""
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> (per-bucket counts incl. +Inf, sum)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        counts, total = self._series.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._series.items()):
+            base = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {total[0]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route, including streamed bodies",
+    ("method", "route", "status"),
+    DURATION_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request",
+    ("method", "route"),
+    QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in SQL statements per request",
+    ("method", "route"),
+    DURATION_BUCKETS,
+)
+
+
+# ==================== SQLAlchemy hooks ====================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(context)
+
+
+def _handle_error(exception_context):
+    if exception_context.execution_context is not None:
+        _record_query(exception_context.execution_context)
+
+
+def _record_query(context) -> None:
+    stats = _request_stats.get()
+    started = getattr(context, "_metrics_started", None)
+    if stats is None or started is None:
+        return
+    stats.queries += 1
+    stats.db_seconds += time.perf_counter() - started
+    context._metrics_started = None
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Count the statements of `engine` towards the current request"""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+# ==================== Middleware ====================
+
+def server_timing_enabled() -> bool:
+    return settings.DEBUG if settings.SERVER_TIMING is None else settings.SERVER_TIMING
+
+
+def _route_template(scope: Scope) -> str:
+    """Path template of the matched route, e.g. /api/v1/products/{product_id}"""
+    app = scope.get("app")
+    endpoint = scope.get("endpoint")
+    routes = getattr(getattr(app, "router", None), "routes", [])
+    for route in routes:
+        if endpoint is not None and getattr(route, "endpoint", None) is endpoint:
+            return route.path
+        if isinstance(route, Mount) and scope["path"].startswith(route.path + "/"):
+            return route.path + "/{path}"
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Record latency, query count and database time of every HTTP request.
+
+    Plain ASGI middleware (not BaseHTTPMiddleware), so the request context
+    reaches the endpoint and streamed responses are timed to their last chunk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        status_code = 500
+        add_header = server_timing_enabled()
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if add_header:
+                    headers = [*message.get("headers", []), (b"server-timing", stats.server_timing().encode())]
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        token = _request_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            self._record(scope, status_code, stats)
+
+    @staticmethod
+    def _record(scope: Scope, status_code: int, stats: RequestStats) -> None:
+        method = scope["method"]
+        route = _route_template(scope)
+        REQUEST_DURATION.observe((method, route, str(status_code)), time.perf_counter() - stats.started)
+        REQUEST_QUERIES.observe((method, route), stats.queries)
+        REQUEST_DB_DURATION.observe((method, route), stats.db_seconds)
+
+        threshold = settings.METRICS_QUERY_WARN_THRESHOLD
+        if threshold > 0 and stats.queries >= threshold:
+            logger.warning(f"{method} {route} ran {stats.queries} queries (possible N+1)")
+
+
+# ==================== Exposition ====================
+
+# Async callbacks adding samples that need I/O, e.g. job queue depth (a query)
+_collectors: List[Callable[[], Awaitable[List[str]]]] = []
+
+# (monotonic expiry, lines) of the last collector run
+_collected: Tuple[float, List[str]] = (0.0, [])
+
+
+def check_metrics_access(authorization: Optional[str]) -> None:
+    """
+    Allow a /metrics scrape.
+
+    With METRICS_TOKEN set the scraper must send `Authorization: Bearer
+    <token>`; without one /metrics is only served in DEBUG.
+
+    Raises:
+        NotFoundException: Metrics disabled, or no token configured outside DEBUG
+        UnauthorizedException: Missing or wrong token
+    """
+    if not settings.METRICS_ENABLED:
+        raise NotFoundException()
+    if not settings.METRICS_TOKEN:
+        if not settings.DEBUG:
+            raise NotFoundException()
+        return
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise UnauthorizedException(detail="Invalid metrics token")
+
+
+def register_collector(collector: Callable[[], Awaitable[List[str]]]) -> None:
+    """Add an async callback returning exposition lines to /metrics"""
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+
+def _sample(name: str, kind: str, description: str, value: float) -> List[str]:
+    return [f"# HELP {name} {description}", f"# TYPE {name} {kind}", f"{name} {value}"]
+
+
+def gauge(
+    name: str,
+    description: str,
+    label_names: Sequence[str],
+    samples: Dict[Tuple[str, ...], float],
+) -> List[str]:
+    """Exposition lines of a labelled gauge"""
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} gauge"]
+    for labels, value in sorted(samples.items()):
+        lines.append(f"{name}{{{_labels(label_names, labels)}}} {value}")
+    return lines
+
+
+async def render_metrics() -> str:
+    """All metrics of this worker in the Prometheus text format"""
+    lines: List[str] = []
+    for histogram in (REQUEST_DURATION, REQUEST_QUERIES, REQUEST_DB_DURATION):
+        lines += histogram.render()
+
+    pool = pool_stats()
+    lines += _sample("db_pool_size", "gauge", "Connections kept in the pool", pool["size"])
+    lines += _sample("db_pool_checked_out", "gauge", "Connections in use", pool["checked_out"])
+    lines += _sample("db_pool_overflow", "gauge", "Connections open beyond the pool size", pool["overflow"])
+    lines += _sample("db_pool_waiting", "gauge", "Checkouts waiting for a connection", pool["waiting"])
+    lines += _sample("db_pool_waits_total", "counter", "Checkouts that found the pool exhausted", pool["waits"])
+    lines += _sample("db_pool_wait_seconds_total", "counter", "Time spent waiting for connections", pool["wait_seconds"])
+    lines += _sample("db_pool_timeouts_total", "counter", "Checkouts that timed out", pool["timeouts"])
+
+    tokens = token_cache.stats()
+    lines += _sample("jwt_cache_size", "gauge", "Verified tokens cached", tokens["size"])
+    lines += _sample("jwt_cache_hits_total", "counter", "Token verifications served from the cache", tokens["hits"])
+    lines += _sample("jwt_cache_misses_total", "counter", "Token verifications that decoded the JWT", tokens["misses"])
+
+    hashing = get_hash_pool()
+    lines += _sample("password_hash_pending", "gauge", "Password hashes running or queued", hashing.pending)
+
+    lines += await _collect()
+    return "\n".join(lines) + "\n"
+
+
+async def _collect() -> List[str]:
+    """Lines of the registered collectors, cached for METRICS_COLLECTOR_TTL"""
+    global _collected
+    expires_at, lines = _collected
+    if time.monotonic() < expires_at:
+        return lines
+
+    lines = []
+    for collector in _collectors:
+        try:
+            lines += await collector()
+        except Exception as e:
+            logger.warning(f"Metrics collector {collector.__qualname__} failed: {e}")
+    _collected = (time.monotonic() + settings.METRICS_COLLECTOR_TTL, lines)
+    return lines
@@ -0,0 +1,130 @@
+"""
+Pagination Module - Opaque keyset (cursor) pagination
+
+A cursor encodes the sort key of the last row of a page. The next page is
+`WHERE (k1, k2) > (:v1, :v2) ORDER BY k1, k2 LIMIT n`, which walks an index
+instead of reading and discarding OFFSET rows, so deep pages cost the same as
+the first one.
+"""
+
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+from sqlalchemy import tuple_, literal, DateTime
+from sqlalchemy.sql import Select
+
+from core.exceptions import BadRequestException
+
+T = TypeVar("T")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode sort key values as an opaque URL-safe cursor"""
+    def default(value: Any) -> Any:
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+    raw = json.dumps(list(values), default=default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Decode a cursor made by encode_cursor (raises BadRequestException)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error):
+        raise BadRequestException(detail="Invalid cursor")
+    if not isinstance(values, list):
+        raise BadRequestException(detail="Invalid cursor")
+    return values
+
+
+def _parse_value(value: Any, python_type: type) -> Any:
+    """Convert a JSON cursor value back to the column's Python type"""
+    if value is None:
+        return None
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    if python_type in (int, float, str) and not isinstance(value, python_type):
+        return python_type(value)
+    return value
+
+
+class Keyset:
+    """
+    Sort key of a list query: ORDER BY, cursor filter and cursor encoding.
+
+    All columns are sorted in the same direction so the filter is a single
+    row comparison. Columns must be NOT NULL (wrap nullable ones in coalesce)
+    and the last one unique (usually the primary key).
+    """
+
+    def __init__(
+        self,
+        *columns,
+        descending: bool = False,
+        key: Optional[Callable[[Any], Sequence[Any]]] = None,
+    ):
+        self.columns = columns
+        self.descending = descending
+        # Reads the sort key from a loaded row; defaults to the column attributes
+        self.key = key or (lambda row: [getattr(row, c.key) for c in columns])
+
+    def order_by(self) -> list:
+        return [c.desc() if self.descending else c.asc() for c in self.columns]
+
+    def after(self, cursor: str):
+        """WHERE clause selecting rows after the cursor position"""
+        values = decode_cursor(cursor)
+        if len(values) != len(self.columns):
+            raise BadRequestException(detail="Invalid cursor")
+        try:
+            params = [self._param(v, c) for v, c in zip(values, self.columns)]
+        except (TypeError, ValueError):
+            raise BadRequestException(detail="Invalid cursor")
+
+        left, right = tuple_(*self.columns), tuple_(*params)
+        return left < right if self.descending else left > right
+
+    @staticmethod
+    def _param(value: Any, column):
+        value = _parse_value(value, column.type.python_type)
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            # TIMESTAMPTZ columns mapped as plain DateTime return aware values
+            return literal(value, DateTime(timezone=True))
+        return literal(value, column.type)
+
+    def apply(self, query: Select, cursor: Optional[str], limit: int) -> Select:
+        """
+        Order, filter and limit a query for one page.
+
+        Fetches one extra row so `page()` knows whether a next page exists.
+        """
+        if cursor:
+            query = query.where(self.after(cursor))
+        return query.order_by(*self.order_by()).limit(limit + 1)
+
+    def page(self, rows: Sequence[T], limit: int) -> tuple[List[T], Optional[str]]:
+        """Trim the extra row fetched by `apply()` and build the next cursor"""
+        rows = list(rows)
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(self.key(rows[-1]))
+
+
+def wants_total(cursor: Optional[str], include_total: Optional[bool]) -> bool:
+    """Offset pages count rows by default, cursor pages only on request"""
+    return include_total if include_total is not None else not cursor
@@ -2,16 +2,54 @@
 Security Module - JWT and Password Hashing
 """
 
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Any
+from typing import Optional, Any, Callable, TypeVar
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 
 from core.config import settings
+from core.exceptions import ServiceUnavailableException
+
+try:
+    import jwt as pyjwt  # Optional faster verification backend (JWT_BACKEND=pyjwt)
+except ImportError:
+    pyjwt = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+if settings.JWT_BACKEND == "pyjwt" and pyjwt is None:
+    logger.warning("JWT_BACKEND=pyjwt but PyJWT is not installed, verifying tokens with python-jose")
+
+
+def build_password_context(argon2_params: dict) -> CryptContext:
+    """
+    Password hashing context for the given Argon2 costs.
+    
+    bcrypt hashes still verify but are deprecated; Argon2 hashes made with
+    other costs (cheaper or more expensive) are flagged by needs_update.
+    """
+    time_cost = argon2_params["time_cost"]
+    return CryptContext(
+        schemes=["argon2", "bcrypt"],
+        deprecated="auto",
+        argon2__rounds=time_cost,
+        argon2__min_desired_rounds=time_cost,
+        argon2__max_desired_rounds=time_cost,
+        argon2__memory_cost=argon2_params["memory_cost"],
+        argon2__parallelism=argon2_params["parallelism"],
+    )
 
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
+pwd_context = build_password_context(settings.argon2_params)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -24,16 +62,93 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check if a hash uses a deprecated scheme or other Argon2 costs"""
+    try:
+        return pwd_context.needs_update(hashed_password)
+    except ValueError:
+        # Unrecognised or malformed hash
+        return False
+
+
+class PasswordHashPool:
+    """
+    Bounded thread pool for password hashing.
+    
+    Argon2 (argon2-cffi) releases the GIL while hashing, so threads run it in
+    parallel without blocking the event loop. At most `workers` hashes run at
+    once; when `max_pending` calls are running or queued, new calls fail fast
+    with 503 instead of piling up behind a login storm.
+    """
+    
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = (
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+            if workers > 0 else None
+        )
+    
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        if self._executor is None:
+            return func(*args)
+        if self.pending >= self.max_pending:
+            raise ServiceUnavailableException(detail="Too many concurrent logins, retry shortly")
+        
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+    
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_hash_pool: Optional[PasswordHashPool] = None
+
+
+def get_hash_pool() -> PasswordHashPool:
+    """Get the password hashing pool sized by PASSWORD_HASH_* settings"""
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+    return _hash_pool
+
+
+def shutdown_hash_pool() -> None:
+    """Stop the hashing threads (application shutdown)"""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown()
+        _hash_pool = None
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password off the event loop"""
+    return await get_hash_pool().run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash off the event loop"""
+    return await get_hash_pool().run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
     
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire, "type": "access"})
+    # iat lets the revocation list reject tokens issued before a claim change
+    to_encode.update({"exp": expire, "iat": now, "type": "access"})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -41,19 +156,98 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 def create_refresh_token(data: dict) -> str:
     """Create JWT refresh token"""
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({"exp": expire, "iat": now, "type": "refresh"})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+class TokenCache:
+    """
+    Bounded LRU of verified token claims, keyed by the token's SHA-256.
+    
+    Only tokens that passed signature verification are stored, and an entry
+    is dropped once its `exp` passes, so a hit returns exactly what a full
+    decode would. Revocation is checked separately (users.cache), per request.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[bytes, dict] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+    
+    def get(self, token: str) -> Optional[dict]:
+        if self.max_entries <= 0:
+            return None
+        key = self._key(token)
+        claims = self._data.get(key)
+        if claims is not None and claims["exp"] <= time.time():
+            del self._data[key]
+            claims = None
+        if claims is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        # Callers may modify the payload
+        return dict(claims)
+    
+    def set(self, token: str, claims: dict) -> None:
+        if self.max_entries <= 0 or not isinstance(claims.get("exp"), (int, float)):
+            return
+        key = self._key(token)
+        self._data[key] = dict(claims)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        self._data.clear()
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+token_cache = TokenCache(settings.JWT_CACHE_SIZE)
+
+
+def _decode_jwt(token: str) -> dict:
+    """Verify signature and expiry with the configured backend (raises JWTError)"""
+    if settings.JWT_BACKEND == "pyjwt" and pyjwt is not None:
+        try:
+            return pyjwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except pyjwt.PyJWTError as e:
+            raise JWTError(str(e))
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
 def decode_token(token: str) -> Optional[dict]:
-    """Decode and verify JWT token"""
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    """Decode and verify JWT token (verified claims are cached until exp)"""
+    payload = token_cache.get(token)
+    if payload is not None:
         return payload
+    try:
+        payload = _decode_jwt(token)
     except JWTError:
         return None
+    token_cache.set(token, payload)
+    return payload
 
 
 def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
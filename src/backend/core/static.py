@@ -0,0 +1,32 @@
+"""
+Static Files Module - upload serving with Cache-Control
+
+Starlette's StaticFiles already answers If-None-Match / If-Modified-Since
+with 304 (ETag from size and mtime); this adds Cache-Control. Content-hashed
+names ({name}.{16 hex}.{ext}, see catalog.images) never change content and
+are cached for a year as immutable; other files for UPLOADS_CACHE_MAX_AGE.
+"""
+
+import re
+
+from fastapi.staticfiles import StaticFiles
+from starlette.responses import Response
+from starlette.types import Scope
+
+from core.config import settings
+
+HASHED_NAME = re.compile(r"\.[0-9a-f]{16}\.[A-Za-z0-9]+$")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles with long-lived caching of content-hashed files"""
+
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if HASHED_NAME.search(str(full_path)):
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            response.headers["Cache-Control"] = f"public, max-age={settings.UPLOADS_CACHE_MAX_AGE}"
+        return response
@@ -0,0 +1,91 @@
+"""
+Streaming Module - NDJSON / CSV report responses
+
+Large reports are read through a server-side cursor and written out in small
+chunks, so memory stays flat however many rows match. The stream opens its
+own database session: request-scoped dependencies (get_db) are closed before
+a streaming body is sent.
+"""
+
+import csv
+import io
+from enum import Enum
+from typing import AsyncIterator, Callable, Iterable, List
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.database import async_session_maker
+
+
+class ReportFormat(str, Enum):
+    """Report output format (`format` query parameter)"""
+    JSON = "json"  # JSON array, validated by the route's response_model
+    NDJSON = "ndjson"  # One JSON object per line
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ReportFormat.NDJSON: "application/x-ndjson",
+    ReportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+# Rows written per chunk
+CHUNK_ROWS = 200
+
+
+def _ndjson_chunk(rows: Iterable[BaseModel]) -> str:
+    return "".join(row.model_dump_json() + "\n" for row in rows)
+
+
+def _csv_chunk(rows: Iterable[List]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def stream_report(
+    rows: Callable[[AsyncSession], AsyncIterator[BaseModel]],
+    model: type[BaseModel],
+    report_format: ReportFormat,
+    filename: str,
+    session_maker: async_sessionmaker = async_session_maker,
+) -> StreamingResponse:
+    """
+    Stream the items of `rows(db)` as NDJSON or CSV.
+
+    Args:
+        rows: Async generator factory taking a session, e.g. a service stream_* method
+        model: Item schema; its fields are the CSV header
+        report_format: NDJSON or CSV
+        filename: Download name without extension
+        session_maker: Session factory for the stream, e.g. from read_session_maker_for
+    """
+    columns = list(model.model_fields)
+
+    def encode(chunk: List[BaseModel]) -> str:
+        if report_format == ReportFormat.CSV:
+            dumped = [item.model_dump(mode="json") for item in chunk]
+            return _csv_chunk([row[c] for c in columns] for row in dumped)
+        return _ndjson_chunk(chunk)
+
+    async def body() -> AsyncIterator[str]:
+        if report_format == ReportFormat.CSV:
+            yield _csv_chunk([columns])
+        async with session_maker() as db:
+            chunk: List[BaseModel] = []
+            async for item in rows(db):
+                chunk.append(item)
+                if len(chunk) >= CHUNK_ROWS:
+                    yield encode(chunk)
+                    chunk = []
+            if chunk:
+                yield encode(chunk)
+
+    extension = report_format.value
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[report_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
@@ -0,0 +1,136 @@
+"""
+Uploads Module - upload size limit and copying uploads to disk
+
+FastAPI parses a multipart body completely (file parts above 1 MB spooled
+to a temporary file) before the endpoint runs, so the size limit has to
+apply while the body arrives: UploadSizeLimitMiddleware rejects multipart
+requests whose Content-Length exceeds MAX_UPLOAD_SIZE plus the multipart
+overhead, and stops reading a body without one once it passes that size.
+
+save_upload then copies the spooled file in chunks, with file I/O in worker
+threads, hashing it and re-checking the limit of the file part on the way.
+The result is a temporary file in the target directory; moving it to its
+final name with os.replace is atomic, so a partially written file is never
+visible under a served name.
+"""
+
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Optional
+from uuid import uuid4
+
+from fastapi import UploadFile
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.config import settings
+from core.exceptions import PayloadTooLargeException
+
+# Bytes read from the upload and written to disk per step
+CHUNK_SIZE = 256 * 1024
+
+# Allowance for multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _too_large(limit: int) -> PayloadTooLargeException:
+    return PayloadTooLargeException(detail=f"File too large. Max: {limit // 1024 // 1024}MB")
+
+
+class UploadSizeLimitMiddleware:
+    """Reject multipart bodies over MAX_UPLOAD_SIZE before they are parsed"""
+
+    def __init__(self, app: ASGIApp, max_size: Optional[int] = None):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        headers = Headers(scope=scope) if scope["type"] == "http" else None
+        if headers is None or not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        file_limit = settings.MAX_UPLOAD_SIZE if self.max_size is None else self.max_size
+        limit = file_limit + MULTIPART_OVERHEAD
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            error = _too_large(file_limit)
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            # Chunked or understated bodies: stop reading past the limit. The
+            # HTTPException passes FastAPI's body parsing and becomes a 413.
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _too_large(file_limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+@dataclass
+class StoredUpload:
+    """Upload written to a temporary file next to its destination"""
+    path: str
+    sha256: str
+    size: int
+
+    def discard(self) -> None:
+        """Remove the temporary file (if it was not moved)"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+async def save_upload(
+    file: UploadFile,
+    directory: str,
+    max_size: Optional[int] = None,
+) -> StoredUpload:
+    """
+    Copy an uploaded (already spooled) file into a temporary file in `directory`.
+
+    The request body size is limited by UploadSizeLimitMiddleware before
+    parsing; max_size is checked again here for the file part itself.
+
+    Args:
+        file: Uploaded file
+        directory: Destination directory (created if missing); keep it on the
+            filesystem of the final location so os.replace stays atomic
+        max_size: Limit in bytes (default MAX_UPLOAD_SIZE)
+
+    Raises:
+        PayloadTooLargeException: File larger than max_size (nothing is kept)
+    """
+    limit = settings.MAX_UPLOAD_SIZE if max_size is None else max_size
+    await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+
+    stored = StoredUpload(path=os.path.join(directory, f".upload-{uuid4().hex}.tmp"), sha256="", size=0)
+    digest = hashlib.sha256()
+    out = await asyncio.to_thread(open, stored.path, "wb")
+    try:
+        while chunk := await file.read(CHUNK_SIZE):
+            stored.size += len(chunk)
+            if stored.size > limit:
+                raise _too_large(limit)
+            digest.update(chunk)
+            await asyncio.to_thread(out.write, chunk)
+        await asyncio.to_thread(out.close)
+    except BaseException:
+        await asyncio.to_thread(out.close)
+        await asyncio.to_thread(stored.discard)
+        raise
+
+    stored.sha256 = digest.hexdigest()
+    return stored
@@ -1,11 +1,11 @@
 """
-Inventory SQLAlchemy Model - Inventory Batch (FEFO)
+Inventory SQLAlchemy Models - Inventory Batch (FEFO) and Product Stock summary
 """
 
 from datetime import datetime, date
 from decimal import Decimal
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import String, Text, Numeric, Integer, Date, ForeignKey
+from sqlalchemy import String, Text, Numeric, Integer, Date, DateTime, ForeignKey, Computed, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from core.database import Base
@@ -57,3 +57,22 @@ class InventoryBatch(Base):
     def __repr__(self) -> str:
         return f"<InventoryBatch {self.batch_code} - {self.available_quantity} available>"
 
+
+class ProductStock(Base):
+    """
+    Per-product stock summary of sellable (non-expired) batches.
+    
+    Maintained by InventoryService.refresh_product_stock whenever batches change
+    and rebuilt nightly (scripts/reconcile_product_stock.py) for expiry rollover.
+    """
+    __tablename__ = "product_stock"
+    
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    quantity_on_hand: Mapped[int] = mapped_column(Integer, default=0)
+    quantity_reserved: Mapped[int] = mapped_column(Integer, default=0)
+    quantity_available: Mapped[int] = mapped_column(Integer, Computed("quantity_on_hand - quantity_reserved"))
+    next_expiry: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self) -> str:
+        return f"<ProductStock {self.product_id} - {self.quantity_available} available>"
@@ -3,10 +3,12 @@ Inventory API Router
 """
 
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_db
+from core.database import get_db, get_read_db, read_session_maker_for
+from core.pagination import wants_total
+from core.streaming import ReportFormat, stream_report
 from users.models import UserRole
 from auth.dependencies import require_roles
 from inventory.schemas import (
@@ -17,24 +19,27 @@ from inventory.schemas import (
     InventoryOverview,
     LowStockItem,
     ExpiringBatchItem,
+    StockDriftItem,
 )
 from inventory.service import InventoryService
+from jobs.queue import JobQueue
+from jobs.schemas import JobEnqueued
 
 router = APIRouter(prefix="/inventory")
 
 
 @router.get("/overview", response_model=InventoryOverview)
 async def get_inventory_overview(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(require_roles([UserRole.admin, UserRole.staff]))
 ):
     """
     Get inventory overview statistics.
     
     - Requires Staff or Admin role
+    - Cached for a few seconds (INVENTORY_OVERVIEW_CACHE_TTL)
     """
-    overview = await InventoryService.get_overview(db)
-    return InventoryOverview(**overview)
+    return await InventoryService.get_overview_cached(db)
 
 
 @router.get("/batches", response_model=InventoryBatchListResponse)
@@ -44,6 +49,8 @@ async def list_batches(
     product_id: Optional[int] = None,
     expired: Optional[bool] = None,
     expiring_days: Optional[int] = Query(None, ge=1, description="Filter batches expiring within N days"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces page)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: offset pages only)"),
     db: AsyncSession = Depends(get_db),
     current_user = Depends(require_roles([UserRole.admin, UserRole.staff]))
 ):
@@ -52,20 +59,24 @@ async def list_batches(
     
     - Requires Staff or Admin role
     - Sorted by FEFO (First Expired First Out)
+    - Keyset pagination: follow next_cursor instead of page numbers
     """
     skip = (page - 1) * size
-    batches, total = await InventoryService.get_all(
+    batches, total, next_cursor = await InventoryService.get_all(
         db, skip=skip, limit=size,
         product_id=product_id,
         expired=expired,
-        expiring_days=expiring_days
+        expiring_days=expiring_days,
+        cursor=cursor,
+        with_total=wants_total(cursor, include_total)
     )
     
     return InventoryBatchListResponse(
         items=[InventoryBatchResponse.model_validate(b) for b in batches],
         total=total,
-        page=page,
-        size=size
+        page=None if cursor else page,
+        size=size,
+        next_cursor=next_cursor
     )
 
 
@@ -124,22 +135,35 @@ async def update_batch(
 
 @router.get("/low-stock", response_model=list[LowStockItem])
 async def get_low_stock(
+    request: Request,
     threshold: int = Query(10, ge=1, description="Stock threshold"),
-    db: AsyncSession = Depends(get_db),
+    report_format: ReportFormat = Query(ReportFormat.JSON, alias="format", description="json, ndjson or csv"),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(require_roles([UserRole.admin, UserRole.staff]))
 ):
     """
     Get products with stock below threshold.
     
     - Requires Staff or Admin role
+    - format=ndjson or csv streams the report (large catalogs)
     """
+    if report_format != ReportFormat.JSON:
+        return stream_report(
+            lambda session: InventoryService.stream_low_stock_products(session, threshold=threshold),
+            LowStockItem,
+            report_format,
+            filename="low-stock",
+            session_maker=await read_session_maker_for(request),
+        )
     return await InventoryService.get_low_stock_products(db, threshold=threshold)
 
 
 @router.get("/expiring", response_model=list[ExpiringBatchItem])
 async def get_expiring_batches(
+    request: Request,
     days: int = Query(7, ge=1, description="Days until expiry"),
-    db: AsyncSession = Depends(get_db),
+    report_format: ReportFormat = Query(ReportFormat.JSON, alias="format", description="json, ndjson or csv"),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(require_roles([UserRole.admin, UserRole.staff]))
 ):
     """
@@ -147,6 +171,46 @@ async def get_expiring_batches(
     
     - Requires Staff or Admin role
     - Default: 7 days
+    - format=ndjson or csv streams the report (large catalogs)
     """
+    if report_format != ReportFormat.JSON:
+        return stream_report(
+            lambda session: InventoryService.stream_expiring_batches(session, days=days),
+            ExpiringBatchItem,
+            report_format,
+            filename="expiring-batches",
+            session_maker=await read_session_maker_for(request),
+        )
     return await InventoryService.get_expiring_batches(db, days=days)
 
+
+@router.get("/stock-drift", response_model=list[StockDriftItem])
+async def get_stock_drift(
+    limit: int = Query(100, ge=1, le=1000, description="Max products to report"),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_roles([UserRole.admin]))
+):
+    """
+    Report products whose stock summary differs from their batches.
+    
+    - Requires Admin role
+    - Empty when the summary is in sync; fix with POST /inventory/stock-drift/reconcile
+      or scripts/reconcile_product_stock.py
+    """
+    return await InventoryService.get_stock_drift(db, limit=limit)
+
+
+@router.post("/stock-drift/reconcile", response_model=JobEnqueued, status_code=202)
+async def reconcile_stock(
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(require_roles([UserRole.admin]))
+):
+    """
+    Rebuild the stock summary from the batches in the background.
+    
+    - Requires Admin role
+    - Runs as the inventory.reconcile_stock job (one at a time per worker)
+    """
+    job_row = JobQueue.enqueue(db, "inventory.reconcile_stock")
+    await db.commit()
+    return JobEnqueued(job_id=job_row.id, name=job_row.name, queue=job_row.queue)
@@ -54,9 +54,10 @@ class InventoryBatchResponse(InventoryBatchBase):
 class InventoryBatchListResponse(BaseModel):
     """Schema for paginated batch list"""
     items: List[InventoryBatchResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # Omitted for cursor pages unless include_total=true
+    page: Optional[int] = None  # None for cursor pages
     size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
 
 
 class InventoryOverview(BaseModel):
@@ -77,6 +78,18 @@ class LowStockItem(BaseModel):
     category_name: Optional[str] = None
 
 
+class StockDriftItem(BaseModel):
+    """product_stock row that differs from its batches"""
+    product_id: int
+    missing: bool = False  # No product_stock row at all
+    quantity_on_hand: int
+    quantity_reserved: int
+    next_expiry: Optional[date] = None
+    actual_on_hand: int
+    actual_reserved: int
+    actual_next_expiry: Optional[date] = None
+
+
 class ExpiringBatchItem(BaseModel):
     """Expiring batch item schema"""
     batch_id: int
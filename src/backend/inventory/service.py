@@ -2,14 +2,16 @@
 Inventory Service - Business Logic with FEFO and Pessimistic Locking
 """
 
+from collections import defaultdict
 from datetime import date, timedelta
 from decimal import Decimal
-from typing import Optional, List
-from sqlalchemy import select, func, or_
+from typing import Optional, List, Dict, Iterable, AsyncIterator
+from sqlalchemy import select, func, and_, or_, true, update, values, column, literal, literal_column, table, Integer, Date
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from inventory.models import InventoryBatch
+from inventory.models import InventoryBatch, ProductStock
 from inventory.schemas import (
     InventoryBatchCreate, 
     InventoryBatchUpdate, 
@@ -17,9 +19,43 @@ from inventory.schemas import (
     AllocationResult,
     LowStockItem,
     ExpiringBatchItem,
+    InventoryOverview,
+    StockDriftItem,
 )
 from catalog.models import Product
+from catalog.service import invalidate_catalog_cache
+from core.cache import get_or_load, invalidate_namespace
+from core.config import settings
 from core.exceptions import NotFoundException, InsufficientStockError, BadRequestException
+from core.pagination import Keyset
+
+
+# Overview dashboard defaults
+LOW_STOCK_THRESHOLD = 10
+EXPIRING_SOON_DAYS = 7
+
+# Rows fetched per round trip when streaming reports
+REPORT_FETCH_SIZE = 500
+
+# Cached dashboard reads (overview), dropped by batch writes
+INVENTORY_CACHE_NAMESPACE = "inventory"
+
+
+# FEFO order; batches without expiry sort last ('infinity' is date.max in Python)
+BATCH_KEYSET = Keyset(
+    func.coalesce(InventoryBatch.expiry_date, literal_column("'infinity'::date", Date)),
+    InventoryBatch.id,
+    key=lambda batch: [batch.expiry_date or date.max, batch.id],
+)
+
+# Stock recomputed from the batches (view in init.sql), compared with product_stock
+STOCK_ACTUAL = table(
+    "v_product_stock_actual",
+    column("product_id", Integer),
+    column("quantity_on_hand", Integer),
+    column("quantity_reserved", Integer),
+    column("next_expiry", Date),
+)
 
 
 class InventoryService:
@@ -47,8 +83,15 @@ class InventoryService:
         product_id: Optional[int] = None,
         expired: Optional[bool] = None,
         expiring_days: Optional[int] = None,
-    ) -> tuple[List[InventoryBatch], int]:
-        """Get batches with pagination and filters"""
+        cursor: Optional[str] = None,
+        with_total: bool = True,
+    ) -> tuple[List[InventoryBatch], Optional[int], Optional[str]]:
+        """
+        Get batches with pagination and filters, sorted by FEFO.
+        
+        Pages by OFFSET (skip) or by keyset `cursor`; returns (batches, total, next_cursor).
+        total is None when with_total is False.
+        """
         query = select(InventoryBatch).options(selectinload(InventoryBatch.product))
         count_query = select(func.count(InventoryBatch.id))
         
@@ -91,24 +134,20 @@ class InventoryService:
             )
         
         # Get total
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
+        total = (await db.execute(count_query)).scalar() if with_total else None
         
         # Get results sorted by FEFO (expiry_date ASC)
-        query = query.order_by(
-            InventoryBatch.expiry_date.asc().nullslast(),
-            InventoryBatch.id
-        ).offset(skip).limit(limit)
-        
-        result = await db.execute(query)
-        batches = result.scalars().all()
+        if not cursor:
+            query = query.offset(skip)
+        result = await db.execute(BATCH_KEYSET.apply(query, cursor, limit))
+        batches, next_cursor = BATCH_KEYSET.page(result.scalars().all(), limit)
         
         # Add product info
         for batch in batches:
             batch.product_name = batch.product.name if batch.product else None
             batch.product_sku = batch.product.sku if batch.product else None
         
-        return list(batches), total
+        return batches, total, next_cursor
     
     @staticmethod
     async def create(db: AsyncSession, data: InventoryBatchCreate) -> InventoryBatch:
@@ -123,8 +162,12 @@ class InventoryService:
         
         batch = InventoryBatch(**data.model_dump())
         db.add(batch)
+        await db.flush()
+        await InventoryService.refresh_product_stock(db, [batch.product_id])
         await db.commit()
         await db.refresh(batch)
+        await invalidate_catalog_cache()  # Stock shown in product pages changed
+        await invalidate_namespace(INVENTORY_CACHE_NAMESPACE)
         
         batch.product_name = product.name
         batch.product_sku = product.sku
@@ -134,7 +177,14 @@ class InventoryService:
     @staticmethod
     async def update(db: AsyncSession, batch_id: int, data: InventoryBatchUpdate) -> InventoryBatch:
         """Update a batch"""
-        batch = await InventoryService.get_by_id(db, batch_id)
+        # Lock the batch: quantities are validated against the current row
+        result = await db.execute(
+            select(InventoryBatch)
+            .options(selectinload(InventoryBatch.product))
+            .where(InventoryBatch.id == batch_id)
+            .with_for_update(of=InventoryBatch)
+        )
+        batch = result.scalar_one_or_none()
         if not batch:
             raise NotFoundException(detail="Batch not found")
         
@@ -149,8 +199,12 @@ class InventoryService:
         for field, value in update_data.items():
             setattr(batch, field, value)
         
+        await db.flush()
+        await InventoryService.refresh_product_stock(db, [batch.product_id])
         await db.commit()
         await db.refresh(batch)
+        await invalidate_catalog_cache()  # Stock shown in product pages changed
+        await invalidate_namespace(INVENTORY_CACHE_NAMESPACE)
         
         batch.product_name = batch.product.name if batch.product else None
         batch.product_sku = batch.product.sku if batch.product else None
@@ -179,68 +233,149 @@ class InventoryService:
             
         Returns:
             AllocationResult with batch allocations
+        """
+        results = await InventoryService.allocate_stock_fefo_bulk(db, {product_id: quantity})
+        return results[0]
+    
+    @staticmethod
+    async def allocate_stock_fefo_bulk(
+        db: AsyncSession,
+        quantities: Dict[int, int]
+    ) -> List[AllocationResult]:
+        """
+        Allocate stock for several products using FEFO in a constant number of queries.
+        
+        1. Lock all candidate batches of every product with one SELECT ... FOR UPDATE,
+           ordered by batch id so concurrent checkouts always lock rows in the same order
+        2. Allocate FEFO per product in memory
+        3. Write every reservation back with a single UPDATE ... FROM (VALUES ...)
+           and refresh the product_stock rows of the products
+        
+        Reservations are only written if every product can be fully allocated.
+        
+        Args:
+            db: Database session (must be in a transaction)
+            quantities: Dict of product_id -> quantity to allocate
             
-        Raises:
-            InsufficientStockError: If not enough stock available
+        Returns:
+            One AllocationResult per product, in the order of `quantities`
         """
-        # Lock rows for this product - other transactions will WAIT
+        if not quantities:
+            return []
+        
+        # Lock rows for all products - other transactions will WAIT
         query = (
-            select(InventoryBatch)
+            select(
+                InventoryBatch.id,
+                InventoryBatch.product_id,
+                InventoryBatch.expiry_date,
+                InventoryBatch.quantity_on_hand,
+                InventoryBatch.quantity_reserved,
+            )
             .where(
-                InventoryBatch.product_id == product_id,
+                InventoryBatch.product_id.in_(list(quantities)),
                 InventoryBatch.quantity_on_hand > InventoryBatch.quantity_reserved,
                 or_(
                     InventoryBatch.expiry_date.is_(None),
                     InventoryBatch.expiry_date > date.today()
                 )
             )
-            .order_by(InventoryBatch.expiry_date.asc().nullslast())  # FEFO
+            .order_by(InventoryBatch.id)  # Deterministic lock order
             .with_for_update()  # 🔒 PESSIMISTIC LOCK
         )
         
         result = await db.execute(query)
-        batches = result.scalars().all()
-        
-        allocations: List[InventoryAllocation] = []
-        remaining = quantity
-        allocated_total = 0
-        
-        for batch in batches:
-            if remaining <= 0:
-                break
+        batches_by_product = defaultdict(list)
+        for batch in result.all():
+            batches_by_product[batch.product_id].append(batch)
+        
+        results: List[AllocationResult] = []
+        reservations: List[InventoryAllocation] = []
+        
+        for product_id, quantity in quantities.items():
+            # FEFO: earliest expiry first, batches without expiry last
+            batches = sorted(
+                batches_by_product[product_id],
+                key=lambda b: (b.expiry_date is None, b.expiry_date or date.max, b.id)
+            )
             
-            available = batch.quantity_on_hand - batch.quantity_reserved
-            allocate_qty = min(available, remaining)
+            allocations: List[InventoryAllocation] = []
+            remaining = quantity
             
-            if allocate_qty > 0:
-                # Reserve the stock
-                batch.quantity_reserved += allocate_qty
-                remaining -= allocate_qty
-                allocated_total += allocate_qty
+            for batch in batches:
+                if remaining <= 0:
+                    break
+                
+                available = batch.quantity_on_hand - batch.quantity_reserved
+                allocate_qty = min(available, remaining)
                 
-                allocations.append(InventoryAllocation(
-                    batch_id=batch.id,
-                    quantity=allocate_qty
+                if allocate_qty > 0:
+                    remaining -= allocate_qty
+                    allocations.append(InventoryAllocation(
+                        batch_id=batch.id,
+                        quantity=allocate_qty
+                    ))
+            
+            allocated_total = quantity - remaining
+            if remaining > 0:
+                results.append(AllocationResult(
+                    product_id=product_id,
+                    requested_quantity=quantity,
+                    allocated_quantity=allocated_total,
+                    allocations=[],
+                    success=False,
+                    message=f"Insufficient stock. Needed: {quantity}, Available: {allocated_total}"
+                ))
+            else:
+                reservations.extend(allocations)
+                results.append(AllocationResult(
+                    product_id=product_id,
+                    requested_quantity=quantity,
+                    allocated_quantity=allocated_total,
+                    allocations=allocations,
+                    success=True,
+                    message="Stock allocated successfully"
                 ))
         
-        if remaining > 0:
-            # Not enough stock - rollback will happen
-            return AllocationResult(
-                product_id=product_id,
-                requested_quantity=quantity,
-                allocated_quantity=allocated_total,
-                allocations=[],
-                success=False,
-                message=f"Insufficient stock. Needed: {quantity}, Available: {quantity - remaining}"
-            )
+        if all(r.success for r in results):
+            await InventoryService._reserve_batches(db, reservations)
+            await InventoryService.refresh_product_stock(db, quantities)
+        
+        return results
+    
+    @staticmethod
+    def _allocation_rows(allocations: List[InventoryAllocation]):
+        """
+        VALUES (batch_id, quantity) rows for set-based batch updates.
+        
+        Quantities are summed per batch: UPDATE ... FROM applies only one
+        joined row per target row, so duplicates would be lost.
+        """
+        totals: Dict[int, int] = defaultdict(int)
+        for alloc in allocations:
+            totals[alloc.batch_id] += alloc.quantity
         
-        return AllocationResult(
-            product_id=product_id,
-            requested_quantity=quantity,
-            allocated_quantity=allocated_total,
-            allocations=allocations,
-            success=True,
-            message="Stock allocated successfully"
+        return values(
+            column("batch_id", Integer),
+            column("quantity", Integer),
+            name="allocation",
+        ).data(sorted(totals.items()))
+    
+    @staticmethod
+    async def _reserve_batches(
+        db: AsyncSession,
+        allocations: List[InventoryAllocation]
+    ) -> None:
+        """Add allocations to quantity_reserved with one UPDATE ... FROM (VALUES ...)"""
+        if not allocations:
+            return
+        
+        rows = InventoryService._allocation_rows(allocations)
+        await db.execute(
+            update(InventoryBatch)
+            .where(InventoryBatch.id == rows.c.batch_id)
+            .values(quantity_reserved=InventoryBatch.quantity_reserved + rows.c.quantity)
+            .execution_options(synchronize_session=False)
         )
     
     @staticmethod
@@ -251,6 +386,9 @@ class InventoryService:
         """
         Release reserved stock (e.g., when order is cancelled).
         
+        Runs as one UPDATE ... FROM (VALUES ...) plus the product_stock refresh
+        in the caller's transaction; the caller commits.
+        
         Args:
             db: Database session
             allocations: List of allocations to release
@@ -258,12 +396,20 @@ class InventoryService:
         Returns:
             True if successful
         """
-        for alloc in allocations:
-            batch = await InventoryService.get_by_id(db, alloc.batch_id)
-            if batch:
-                batch.quantity_reserved = max(0, batch.quantity_reserved - alloc.quantity)
+        if not allocations:
+            return True
         
-        await db.commit()
+        rows = InventoryService._allocation_rows(allocations)
+        result = await db.execute(
+            update(InventoryBatch)
+            .where(InventoryBatch.id == rows.c.batch_id)
+            .values(
+                quantity_reserved=func.greatest(0, InventoryBatch.quantity_reserved - rows.c.quantity)
+            )
+            .returning(InventoryBatch.product_id)
+            .execution_options(synchronize_session=False)
+        )
+        await InventoryService.refresh_product_stock(db, result.scalars().all())
         return True
     
     @staticmethod
@@ -274,6 +420,9 @@ class InventoryService:
         """
         Confirm stock allocation (reduce on_hand after shipping).
         
+        Runs as one UPDATE ... FROM (VALUES ...) plus the product_stock refresh
+        in the caller's transaction; the caller commits.
+        
         Args:
             db: Database session
             allocations: List of allocations to confirm
@@ -281,151 +430,285 @@ class InventoryService:
         Returns:
             True if successful
         """
-        for alloc in allocations:
-            batch = await InventoryService.get_by_id(db, alloc.batch_id)
-            if batch:
-                batch.quantity_on_hand -= alloc.quantity
-                batch.quantity_reserved -= alloc.quantity
+        if not allocations:
+            return True
         
-        await db.commit()
+        rows = InventoryService._allocation_rows(allocations)
+        result = await db.execute(
+            update(InventoryBatch)
+            .where(InventoryBatch.id == rows.c.batch_id)
+            .values(
+                quantity_on_hand=InventoryBatch.quantity_on_hand - rows.c.quantity,
+                quantity_reserved=InventoryBatch.quantity_reserved - rows.c.quantity,
+            )
+            .returning(InventoryBatch.product_id)
+            .execution_options(synchronize_session=False)
+        )
+        await InventoryService.refresh_product_stock(db, result.scalars().all())
         return True
     
     # =====================================================
-    # Reports and Alerts
+    # Product Stock Summary
     # =====================================================
     
     @staticmethod
-    async def get_low_stock_products(
-        db: AsyncSession,
-        threshold: int = 10
-    ) -> List[LowStockItem]:
-        """Get products with stock below threshold"""
-        # Subquery for available stock per product
-        subquery = (
+    async def refresh_product_stock(db: AsyncSession, product_ids: Iterable[int]) -> int:
+        """
+        Recompute the product_stock rows of `product_ids` in the caller's transaction.
+        
+        Call after changing batches. The summary rows are locked (created if
+        missing) in product id order first, then recomputed by a separate
+        statement, so its snapshot includes every batch change committed before
+        the lock was granted; writers queued behind the lock recompute after us
+        and see our changes. Only the touched products are aggregated.
+        
+        Returns:
+            Number of summary rows whose stock changed
+        """
+        ids = sorted(set(product_ids))
+        if not ids:
+            return 0
+        
+        stmt = pg_insert(ProductStock).values([{"product_id": product_id} for product_id in ids])
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ProductStock.product_id],
+                set_={"updated_at": func.now()},
+            )
+        )
+        result = await db.execute(select(func.refresh_product_stock(literal(ids, ARRAY(Integer)))))
+        return result.scalar() or 0
+    
+    @staticmethod
+    async def get_stock_drift(db: AsyncSession, limit: int = 100) -> List[StockDriftItem]:
+        """
+        Products whose product_stock row differs from their batches.
+        
+        Read-only; checkouts in flight can show up briefly. Rows stay stale
+        after midnight until the nightly reconcile (expired batches still counted).
+        """
+        actual = STOCK_ACTUAL.alias("actual")
+        query = (
             select(
-                InventoryBatch.product_id,
-                func.sum(InventoryBatch.quantity_on_hand - InventoryBatch.quantity_reserved).label("available")
+                actual.c.product_id,
+                ProductStock.quantity_on_hand,
+                ProductStock.quantity_reserved,
+                ProductStock.next_expiry,
+                actual.c.quantity_on_hand.label("actual_on_hand"),
+                actual.c.quantity_reserved.label("actual_reserved"),
+                actual.c.next_expiry.label("actual_next_expiry"),
             )
+            .outerjoin(ProductStock, ProductStock.product_id == actual.c.product_id)
             .where(
-                or_(
-                    InventoryBatch.expiry_date.is_(None),
-                    InventoryBatch.expiry_date > date.today()
+                # A missing row reads as no stock
+                func.row(
+                    func.coalesce(ProductStock.quantity_on_hand, 0),
+                    func.coalesce(ProductStock.quantity_reserved, 0),
+                    ProductStock.next_expiry,
+                ).is_distinct_from(
+                    func.row(
+                        actual.c.quantity_on_hand,
+                        actual.c.quantity_reserved,
+                        actual.c.next_expiry,
+                    )
                 )
             )
-            .group_by(InventoryBatch.product_id)
-            .subquery()
+            .order_by(actual.c.product_id)
+            .limit(limit)
         )
+        result = await db.execute(query)
+        return [
+            StockDriftItem(
+                product_id=row.product_id,
+                missing=row.quantity_on_hand is None,
+                quantity_on_hand=row.quantity_on_hand or 0,
+                quantity_reserved=row.quantity_reserved or 0,
+                next_expiry=row.next_expiry,
+                actual_on_hand=row.actual_on_hand,
+                actual_reserved=row.actual_reserved,
+                actual_next_expiry=row.actual_next_expiry,
+            )
+            for row in result.all()
+        ]
+    
+    @staticmethod
+    async def reconcile_product_stock(db: AsyncSession, chunk_size: int = 500) -> int:
+        """
+        Rebuild product_stock from the batches (nightly job).
         
-        query = (
-            select(Product, subquery.c.available)
-            .outerjoin(subquery, Product.id == subquery.c.product_id)
+        Drops batches that expired since the last rebuild and repairs drift.
+        Works in chunks of products, each locked and committed on its own, so
+        checkouts only wait for the chunk they touch.
+        
+        Returns:
+            Number of summary rows inserted or changed
+        """
+        product_ids = (await db.execute(select(Product.id).order_by(Product.id))).scalars().all()
+        changed = 0
+        for start in range(0, len(product_ids), chunk_size):
+            chunk = product_ids[start:start + chunk_size]
+            changed += await InventoryService.refresh_product_stock(db, chunk)
+            await db.commit()
+        return changed
+    
+    # =====================================================
+    # Reports and Alerts
+    # =====================================================
+    
+    @staticmethod
+    def _low_stock_query(threshold: int):
+        """Active products below `threshold` with their category, one joined query"""
+        from catalog.models import Category
+        
+        available = ProductStock.quantity_available
+        return (
+            select(
+                Product.id.label("product_id"),
+                Product.sku.label("product_sku"),
+                Product.name.label("product_name"),
+                func.coalesce(available, 0).label("available_stock"),
+                Category.name.label("category_name"),
+            )
+            .outerjoin(ProductStock, ProductStock.product_id == Product.id)
+            .outerjoin(Category, Category.id == Product.category_id)
             .where(
                 Product.is_active == True,
                 or_(
-                    subquery.c.available.is_(None),
-                    subquery.c.available < threshold
+                    available.is_(None),
+                    available < threshold
                 )
             )
-            .order_by(subquery.c.available.asc().nullsfirst())
+            .order_by(available.asc().nullsfirst(), Product.id)
         )
-        
-        result = await db.execute(query)
-        rows = result.all()
-        
-        items = []
-        for product, available in rows:
-            # Get category name
-            from catalog.models import Category
-            category_name = None
-            if product.category_id:
-                cat_result = await db.execute(
-                    select(Category.name).where(Category.id == product.category_id)
-                )
-                category_name = cat_result.scalar()
-            
-            items.append(LowStockItem(
-                product_id=product.id,
-                product_sku=product.sku,
-                product_name=product.name,
-                available_stock=available or 0,
-                category_name=category_name
-            ))
-        
-        return items
     
     @staticmethod
-    async def get_expiring_batches(
+    async def get_low_stock_products(
         db: AsyncSession,
-        days: int = 7
-    ) -> List[ExpiringBatchItem]:
-        """Get batches expiring within specified days"""
-        expiry_threshold = date.today() + timedelta(days=days)
-        
-        query = (
-            select(InventoryBatch)
-            .options(selectinload(InventoryBatch.product))
+        threshold: int = LOW_STOCK_THRESHOLD
+    ) -> List[LowStockItem]:
+        """Get products with stock below threshold (from the product_stock summary)"""
+        result = await db.execute(InventoryService._low_stock_query(threshold))
+        return [LowStockItem.model_validate(row._mapping) for row in result.all()]
+    
+    @staticmethod
+    async def stream_low_stock_products(
+        db: AsyncSession,
+        threshold: int = LOW_STOCK_THRESHOLD
+    ) -> AsyncIterator[LowStockItem]:
+        """get_low_stock_products read through a server-side cursor, row by row"""
+        result = await db.stream(
+            InventoryService._low_stock_query(threshold).execution_options(yield_per=REPORT_FETCH_SIZE)
+        )
+        async for row in result:
+            yield LowStockItem.model_validate(row._mapping)
+    
+    @staticmethod
+    def _expiring_query(days: int):
+        """Batches with stock expiring within `days`, joined to their product"""
+        today = date.today()
+        return (
+            select(
+                InventoryBatch.id.label("batch_id"),
+                InventoryBatch.batch_code,
+                InventoryBatch.product_id,
+                Product.sku.label("product_sku"),
+                Product.name.label("product_name"),
+                InventoryBatch.expiry_date,
+                (InventoryBatch.expiry_date - today).label("days_until_expiry"),
+                (InventoryBatch.quantity_on_hand - InventoryBatch.quantity_reserved).label("available_quantity"),
+                InventoryBatch.location,
+            )
+            .join(Product, Product.id == InventoryBatch.product_id)
             .where(
                 InventoryBatch.expiry_date.isnot(None),
-                InventoryBatch.expiry_date <= expiry_threshold,
-                InventoryBatch.expiry_date >= date.today(),
+                InventoryBatch.expiry_date <= today + timedelta(days=days),
+                InventoryBatch.expiry_date >= today,
                 InventoryBatch.quantity_on_hand > InventoryBatch.quantity_reserved
             )
-            .order_by(InventoryBatch.expiry_date.asc())
+            .order_by(InventoryBatch.expiry_date.asc(), InventoryBatch.id)
         )
-        
-        result = await db.execute(query)
-        batches = result.scalars().all()
-        
-        items = []
-        for batch in batches:
-            items.append(ExpiringBatchItem(
-                batch_id=batch.id,
-                batch_code=batch.batch_code,
-                product_id=batch.product_id,
-                product_sku=batch.product.sku,
-                product_name=batch.product.name,
-                expiry_date=batch.expiry_date,
-                days_until_expiry=batch.days_until_expiry or 0,
-                available_quantity=batch.available_quantity,
-                location=batch.location
-            ))
-        
-        return items
     
     @staticmethod
-    async def get_overview(db: AsyncSession) -> dict:
-        """Get inventory overview statistics"""
-        # Total products with stock
-        products_result = await db.execute(
-            select(func.count(func.distinct(InventoryBatch.product_id)))
+    async def get_expiring_batches(
+        db: AsyncSession,
+        days: int = EXPIRING_SOON_DAYS
+    ) -> List[ExpiringBatchItem]:
+        """Get batches expiring within specified days"""
+        result = await db.execute(InventoryService._expiring_query(days))
+        return [ExpiringBatchItem.model_validate(row._mapping) for row in result.all()]
+    
+    @staticmethod
+    async def stream_expiring_batches(
+        db: AsyncSession,
+        days: int = EXPIRING_SOON_DAYS
+    ) -> AsyncIterator[ExpiringBatchItem]:
+        """get_expiring_batches read through a server-side cursor, row by row"""
+        result = await db.stream(
+            InventoryService._expiring_query(days).execution_options(yield_per=REPORT_FETCH_SIZE)
         )
-        total_products = products_result.scalar() or 0
+        async for row in result:
+            yield ExpiringBatchItem.model_validate(row._mapping)
+    
+    @staticmethod
+    async def get_overview(
+        db: AsyncSession,
+        low_stock_threshold: int = LOW_STOCK_THRESHOLD,
+        expiring_days: int = EXPIRING_SOON_DAYS,
+    ) -> dict:
+        """
+        Get inventory overview statistics in one statement.
         
-        # Total batches
-        batches_result = await db.execute(
-            select(func.count(InventoryBatch.id))
+        Batch totals and the expiring count come from one pass over
+        inventory_batches (FILTERed aggregates), the low-stock count from
+        products joined to product_stock; nothing is loaded row by row.
+        """
+        today = date.today()
+        expiring = and_(
+            InventoryBatch.expiry_date.isnot(None),
+            InventoryBatch.expiry_date >= today,
+            InventoryBatch.expiry_date <= today + timedelta(days=expiring_days),
+            InventoryBatch.quantity_on_hand > InventoryBatch.quantity_reserved,
         )
-        total_batches = batches_result.scalar() or 0
-        
-        # Total stock value
-        value_result = await db.execute(
-            select(func.sum(
-                InventoryBatch.quantity_on_hand * InventoryBatch.cost_price
-            ))
+        batch_stats = select(
+            func.count(func.distinct(InventoryBatch.product_id)).label("total_products"),
+            func.count(InventoryBatch.id).label("total_batches"),
+            func.coalesce(
+                func.sum(InventoryBatch.quantity_on_hand * InventoryBatch.cost_price), 0
+            ).label("total_stock_value"),
+            func.count(InventoryBatch.id).filter(expiring).label("expiring_soon_count"),
+        ).subquery("batch_stats")
+        
+        available = ProductStock.quantity_available
+        product_stats = (
+            select(
+                func.count(Product.id).filter(
+                    or_(available.is_(None), available < low_stock_threshold)
+                ).label("low_stock_count")
+            )
+            .select_from(Product)
+            .outerjoin(ProductStock, ProductStock.product_id == Product.id)
+            .where(Product.is_active == True)
+            .subquery("product_stats")
         )
-        total_value = value_result.scalar() or Decimal("0")
         
-        # Low stock count
-        low_stock = await InventoryService.get_low_stock_products(db, threshold=10)
+        result = await db.execute(
+            select(batch_stats, product_stats).join_from(batch_stats, product_stats, true())
+        )
+        return dict(result.one()._mapping)
+    
+    @staticmethod
+    async def get_overview_cached(db: AsyncSession) -> InventoryOverview:
+        """
+        Overview cached for INVENTORY_OVERVIEW_CACHE_TTL seconds.
         
-        # Expiring soon count
-        expiring = await InventoryService.get_expiring_batches(db, days=7)
+        Batch writes through this service drop it; checkouts do not, so
+        reserved stock shows up within the TTL.
+        """
+        async def load():
+            overview = await InventoryService.get_overview(db)
+            return InventoryOverview(**overview).model_dump(mode="json")
         
-        return {
-            "total_products": total_products,
-            "total_batches": total_batches,
-            "total_stock_value": total_value,
-            "low_stock_count": len(low_stock),
-            "expiring_soon_count": len(expiring)
-        }
-
+        data = await get_or_load(
+            INVENTORY_CACHE_NAMESPACE, "overview", load, settings.INVENTORY_OVERVIEW_CACHE_TTL
+        )
+        return InventoryOverview.model_validate(data)
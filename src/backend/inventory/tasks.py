@@ -0,0 +1,24 @@
+"""
+Inventory background jobs
+"""
+
+import logging
+
+from core.cache import invalidate_namespace
+from core.database import async_session_maker
+from jobs.queue import job
+from catalog.service import invalidate_catalog_cache
+from inventory.service import InventoryService, INVENTORY_CACHE_NAMESPACE
+
+logger = logging.getLogger(__name__)
+
+
+@job("inventory.reconcile_stock", timeout=600, max_concurrency=1)  # timeout < JOB_LOCK_TIMEOUT
+async def reconcile_stock(payload: dict) -> None:
+    """Rebuild product_stock from the batches (see InventoryService.reconcile_product_stock)"""
+    async with async_session_maker() as db:
+        changed = await InventoryService.reconcile_product_stock(db, chunk_size=payload.get("chunk_size", 500))
+    logger.info(f"🔄 Reconciled product_stock: {changed} rows changed")
+    if changed:
+        await invalidate_catalog_cache()  # Cached product pages show stock
+        await invalidate_namespace(INVENTORY_CACHE_NAMESPACE)
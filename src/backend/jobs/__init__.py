@@ -0,0 +1,3 @@
+"""Background job queue (PostgreSQL-backed, run by python -m jobs.worker)"""
+from jobs.models import Job, JobStatus
+from jobs.queue import JobQueue, job
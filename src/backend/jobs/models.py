@@ -0,0 +1,44 @@
+"""
+Jobs SQLAlchemy Models - durable background job queue
+"""
+
+from datetime import datetime
+from typing import Optional
+import enum
+from sqlalchemy import BigInteger, String, Text, Integer, DateTime, Enum as SQLEnum, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.database import Base
+
+
+class JobStatus(str, enum.Enum):
+    """Job status enumeration (finished jobs are deleted)"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"  # Attempts exhausted or no handler; kept for inspection
+
+
+class Job(Base):
+    """Background job, claimed by workers with FOR UPDATE SKIP LOCKED"""
+    __tablename__ = "jobs"
+    
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    queue: Mapped[str] = mapped_column(String(50), default="default")
+    name: Mapped[str] = mapped_column(String(100))
+    payload: Mapped[dict] = mapped_column(JSONB, default=dict)
+    status: Mapped[JobStatus] = mapped_column(
+        SQLEnum(JobStatus, name="job_status", create_type=False,
+                values_callable=lambda enum_cls: [member.value for member in enum_cls]),
+        default=JobStatus.QUEUED
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=5)
+    run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    locked_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    locked_by: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self) -> str:
+        return f"<Job {self.id} {self.name} - {self.status.value}>"
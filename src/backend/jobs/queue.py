@@ -0,0 +1,329 @@
+"""
+Job Queue - durable background jobs in PostgreSQL
+
+Jobs are rows in the jobs table. JobQueue.enqueue adds one to the caller's
+session, so it commits (or rolls back) together with the write that caused
+it; workers (jobs.worker) claim ready jobs with FOR UPDATE SKIP LOCKED, run
+the handler registered under the job's name and delete it on success.
+Failures are retried with exponential backoff until max_attempts.
+
+Delivery is at-least-once: workers refresh the locks of running jobs
+(heartbeat), so a job is only re-queued after JOB_LOCK_TIMEOUT without one,
+i.e. when its worker died. Handlers must be idempotent.
+"""
+
+import logging
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import select, update, delete, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import async_session_maker
+from core.metrics import gauge
+from jobs.models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = "default"
+
+JobHandler = Callable[[dict], Awaitable[None]]
+
+
+@dataclass
+class JobDefinition:
+    """Handler and execution limits of a job name"""
+    name: str
+    handler: JobHandler
+    timeout: Optional[float] = None  # Seconds, default JOB_TIMEOUT
+    max_concurrency: Optional[int] = None  # Per worker process, default unlimited
+
+
+# Job name -> definition, filled by @job in the task modules (see jobs.worker.TASK_MODULES)
+JOB_REGISTRY: Dict[str, JobDefinition] = {}
+
+
+def job(name: str, timeout: Optional[float] = None, max_concurrency: Optional[int] = None):
+    """
+    Register an async handler `handler(payload: dict)` for a job name.
+
+    Example:
+        @job("orders.notify_status")
+        async def notify_status(payload: dict) -> None: ...
+    
+    Raises:
+        ValueError: timeout not below JOB_LOCK_TIMEOUT (the job could be
+            re-queued while it still runs)
+    """
+    if timeout is not None and timeout >= settings.JOB_LOCK_TIMEOUT:
+        raise ValueError(
+            f"Job '{name}': timeout {timeout}s must be below JOB_LOCK_TIMEOUT ({settings.JOB_LOCK_TIMEOUT}s)"
+        )
+    
+    def decorator(handler: JobHandler) -> JobHandler:
+        JOB_REGISTRY[name] = JobDefinition(name, handler, timeout, max_concurrency)
+        return handler
+    return decorator
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff before the next attempt: exponential, jittered over its upper half"""
+    ceiling = min(settings.JOB_RETRY_MAX_DELAY, settings.JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class JobQueue:
+    """Enqueue, claim and settle background jobs"""
+
+    @staticmethod
+    def enqueue(
+        db: AsyncSession,
+        name: str,
+        payload: Optional[dict] = None,
+        queue: str = DEFAULT_QUEUE,
+        delay: float = 0,
+        max_attempts: Optional[int] = None,
+    ) -> Job:
+        """
+        Add a job to the session; it becomes visible to workers when the
+        caller commits. The payload must be JSON-serializable.
+        """
+        job_row = Job(
+            queue=queue,
+            name=name,
+            payload=payload or {},
+            status=JobStatus.QUEUED,
+            attempts=0,
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        )
+        if delay > 0:
+            job_row.run_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        db.add(job_row)
+        return job_row
+
+    @staticmethod
+    async def enqueue_now(name: str, payload: Optional[dict] = None, **options) -> Job:
+        """Enqueue and commit in a session of its own (no surrounding transaction)"""
+        async with async_session_maker() as db:
+            job_row = JobQueue.enqueue(db, name, payload, **options)
+            await db.commit()
+            return job_row
+
+    @staticmethod
+    async def claim(
+        db: AsyncSession,
+        queues: Sequence[str],
+        limit: int,
+        worker_id: str,
+        exclude_names: Sequence[str] = (),
+    ) -> List[Job]:
+        """
+        Lock up to `limit` ready jobs for a worker (oldest run_at first).
+
+        SKIP LOCKED lets concurrent workers claim different rows without
+        waiting on each other. `exclude_names` skips jobs whose per-name
+        concurrency limit is reached in this worker.
+        """
+        ready = (
+            select(Job.id)
+            .where(
+                Job.status == JobStatus.QUEUED,
+                Job.queue.in_(queues),
+                Job.run_at <= func.now(),
+            )
+            .order_by(Job.run_at, Job.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if exclude_names:
+            ready = ready.where(Job.name.not_in(exclude_names))
+
+        result = await db.execute(
+            update(Job)
+            .where(Job.id.in_(ready.scalar_subquery()))
+            .values(
+                status=JobStatus.RUNNING,
+                attempts=Job.attempts + 1,
+                locked_at=func.now(),
+                locked_by=worker_id,
+            )
+            .returning(Job)
+            .execution_options(synchronize_session=False)
+        )
+        jobs = list(result.scalars().all())
+        await db.commit()
+        return jobs
+
+    @staticmethod
+    def _claimed(job_row: Job):
+        """Condition matching a job only while it holds this claim"""
+        return and_(
+            Job.id == job_row.id,
+            Job.status == JobStatus.RUNNING,
+            Job.locked_by == job_row.locked_by,
+            Job.attempts == job_row.attempts,  # Incremented by every claim
+        )
+
+    @staticmethod
+    async def heartbeat(db: AsyncSession, jobs: Sequence[Job]) -> int:
+        """
+        Refresh the locks of running jobs, so requeue_stale leaves them alone.
+
+        Returns:
+            Number of locks refreshed (lower if a job was taken over)
+        """
+        if not jobs:
+            return 0
+        result = await db.execute(
+            update(Job)
+            .where(or_(*(JobQueue._claimed(job_row) for job_row in jobs)))
+            .values(locked_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
+
+    @staticmethod
+    async def complete(db: AsyncSession, job_row: Job) -> bool:
+        """
+        Delete a finished job.
+
+        Returns:
+            False if the claim was lost (job re-queued and possibly taken
+            by another worker); the row is left alone then
+        """
+        result = await db.execute(delete(Job).where(JobQueue._claimed(job_row)))
+        await db.commit()
+        return result.rowcount > 0
+
+    @staticmethod
+    async def fail(db: AsyncSession, job_row: Job, error: str, retry: bool = True) -> bool:
+        """
+        Record a failed attempt: back to the queue after a backoff, or FAILED
+        when attempts are exhausted (or retry is False).
+
+        Returns:
+            True if the job will run again (False as well when the claim
+            was lost and the row was left alone)
+        """
+        will_retry = retry and job_row.attempts < job_row.max_attempts
+        values = {"last_error": error[:2000], "locked_at": None, "locked_by": None}
+        if will_retry:
+            values.update(
+                status=JobStatus.QUEUED,
+                run_at=func.now() + timedelta(seconds=retry_delay(job_row.attempts)),
+            )
+        else:
+            values.update(status=JobStatus.FAILED)
+        result = await db.execute(update(Job).where(JobQueue._claimed(job_row)).values(**values))
+        await db.commit()
+        return will_retry and result.rowcount > 0
+
+    @staticmethod
+    async def release(db: AsyncSession, job_row: Job, reason: str) -> bool:
+        """
+        Put a claimed job back in the queue right away, without counting the
+        attempt (e.g. interrupted by a worker shutdown).
+
+        Returns:
+            False if the claim was already lost
+        """
+        result = await db.execute(
+            update(Job)
+            .where(JobQueue._claimed(job_row))
+            .values(
+                status=JobStatus.QUEUED,
+                attempts=Job.attempts - 1,
+                run_at=func.now(),
+                locked_at=None,
+                locked_by=None,
+                last_error=reason,
+            )
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+    @staticmethod
+    async def requeue_stale(db: AsyncSession, lock_timeout: Optional[int] = None) -> int:
+        """
+        Return jobs without a heartbeat for JOB_LOCK_TIMEOUT (worker crashed
+        or was killed) to the queue, or mark them FAILED if out of attempts.
+
+        Returns:
+            Number of jobs recovered
+        """
+        cutoff = func.now() - timedelta(seconds=lock_timeout or settings.JOB_LOCK_TIMEOUT)
+        stale = and_(Job.status == JobStatus.RUNNING, Job.locked_at < cutoff)
+        result = await db.execute(
+            update(Job)
+            .where(stale, Job.attempts < Job.max_attempts)
+            .values(
+                status=JobStatus.QUEUED,
+                locked_at=None,
+                locked_by=None,
+                last_error="Lock expired (worker stopped before finishing)",
+            )
+        )
+        requeued = result.rowcount
+        result = await db.execute(
+            update(Job)
+            .where(stale, Job.attempts >= Job.max_attempts)
+            .values(
+                status=JobStatus.FAILED,
+                locked_at=None,
+                locked_by=None,
+                last_error="Lock expired on the last attempt",
+            )
+        )
+        await db.commit()
+        return requeued + result.rowcount
+
+    @staticmethod
+    async def stats(db: AsyncSession) -> List[dict]:
+        """Job counts per queue and status, with the age of the oldest ready job"""
+        result = await db.execute(
+            select(
+                Job.queue,
+                Job.status,
+                func.count().label("count"),
+                func.extract(
+                    "epoch", func.now() - func.min(Job.run_at).filter(Job.run_at <= func.now())
+                ).label("oldest_ready_seconds"),
+            )
+            .group_by(Job.queue, Job.status)
+            .order_by(Job.queue, Job.status)
+        )
+        return [
+            {
+                "queue": row.queue,
+                "status": row.status.value,
+                "count": row.count,
+                "oldest_ready_seconds": float(row.oldest_ready_seconds or 0),
+            }
+            for row in result
+        ]
+
+
+async def queue_metrics() -> List[str]:
+    """Queue depth gauges for /metrics (core.metrics collector)"""
+    async with async_session_maker() as db:
+        rows = await JobQueue.stats(db)
+    lines = gauge(
+        "job_queue_depth",
+        "Jobs per queue and status (finished jobs are deleted)",
+        ("queue", "status"),
+        {(row["queue"], row["status"]): row["count"] for row in rows},
+    )
+    lines += gauge(
+        "job_queue_oldest_ready_seconds",
+        "Age of the oldest job waiting for a worker",
+        ("queue",),
+        {
+            (row["queue"],): row["oldest_ready_seconds"]
+            for row in rows if row["status"] == JobStatus.QUEUED.value
+        },
+    )
+    return lines
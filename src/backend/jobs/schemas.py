@@ -0,0 +1,12 @@
+"""
+Jobs Pydantic Schemas
+"""
+
+from pydantic import BaseModel
+
+
+class JobEnqueued(BaseModel):
+    """Response of endpoints that hand work to the job queue"""
+    job_id: int
+    name: str
+    queue: str
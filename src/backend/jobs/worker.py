@@ -0,0 +1,241 @@
+"""
+Job Worker - runs queued background jobs
+
+Polls the jobs table every JOB_POLL_INTERVAL seconds (immediately again while
+jobs keep coming) and runs up to JOB_WORKER_CONCURRENCY handlers at once on
+one event loop; JobDefinition.max_concurrency caps single job names, e.g.
+CPU-heavy thumbnailing. The locks of running jobs are refreshed every
+JOB_LOCK_TIMEOUT / 4 seconds, so only jobs of a dead worker are re-queued.
+SIGINT/SIGTERM stop claiming and let running jobs finish within their own
+timeout (JobDefinition.timeout or JOB_TIMEOUT); jobs still running after
+that are cancelled and put back in the queue.
+
+Usage (from src/backend):
+    python -m jobs.worker
+    python -m jobs.worker --queues default --concurrency 8
+"""
+
+import argparse
+import asyncio
+import importlib
+import logging
+import os
+import signal
+import socket
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set
+
+from core.config import settings
+from core.database import async_session_maker, engine
+from jobs.models import Job
+from jobs.queue import DEFAULT_QUEUE, JOB_REGISTRY, JobQueue
+
+logger = logging.getLogger(__name__)
+
+# Seconds allowed on shutdown beyond the job timeouts, to record the results
+DRAIN_GRACE = 10.0
+
+
+def job_timeout(name: str) -> float:
+    """Effective timeout of a job name in seconds"""
+    definition = JOB_REGISTRY.get(name)
+    return (definition.timeout if definition else None) or settings.JOB_TIMEOUT
+
+
+# Modules defining @job handlers, imported by every worker
+TASK_MODULES = (
+    "contact.tasks",
+    "catalog.tasks",
+    "inventory.tasks",
+    "orders.tasks",
+)
+
+
+def load_task_modules() -> None:
+    """Import the task modules so JOB_REGISTRY is complete"""
+    import models  # noqa: F401 - register all models
+    for module in TASK_MODULES:
+        importlib.import_module(module)
+
+
+class Worker:
+    """Claims and runs jobs of some queues in this process"""
+
+    def __init__(
+        self,
+        queues: Sequence[str] = (DEFAULT_QUEUE,),
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        self.queues = list(queues)
+        if settings.JOB_TIMEOUT >= settings.JOB_LOCK_TIMEOUT:
+            raise ValueError("JOB_TIMEOUT must be below JOB_LOCK_TIMEOUT")
+        self.concurrency = concurrency or settings.JOB_WORKER_CONCURRENCY
+        self.poll_interval = settings.JOB_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.processed = 0
+        self.failed = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._running: Dict[int, Job] = {}  # Job id -> claimed row, for the heartbeat
+        self._running_by_name: Dict[str, int] = defaultdict(int)
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def stop(self) -> None:
+        """Stop claiming jobs; run() returns once running jobs finish"""
+        self._stopping = True
+        self._wakeup.set()
+
+    def _saturated_names(self) -> List[str]:
+        return [
+            name for name, definition in JOB_REGISTRY.items()
+            if definition.max_concurrency and self._running_by_name[name] >= definition.max_concurrency
+        ]
+
+    async def run(self) -> None:
+        load_task_modules()
+        logger.info(
+            f"Job worker {self.worker_id} started: queues={','.join(self.queues)} "
+            f"concurrency={self.concurrency} handlers={len(JOB_REGISTRY)}"
+        )
+        last_recovery = float("-inf")  # Recover on start
+        heartbeat = asyncio.create_task(self._heartbeat())
+
+        while not self._stopping:
+            if time.monotonic() - last_recovery >= settings.JOB_LOCK_TIMEOUT / 4:
+                last_recovery = time.monotonic()
+                await self._recover_stale()
+
+            free = self.concurrency - len(self._tasks)
+            if free > 0 and await self._claim(free) == free:
+                continue  # Full batch: more jobs are probably ready
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        await self._drain()
+        heartbeat.cancel()
+        logger.info(f"Job worker {self.worker_id} stopped: {self.processed} done, {self.failed} failed attempts")
+
+    async def _heartbeat(self) -> None:
+        """Refresh the locks of running jobs until cancelled (also while draining)"""
+        while True:
+            await asyncio.sleep(settings.JOB_LOCK_TIMEOUT / 4)
+            jobs = list(self._running.values())
+            if not jobs:
+                continue
+            try:
+                async with async_session_maker() as db:
+                    refreshed = await JobQueue.heartbeat(db, jobs)
+                if refreshed < len(jobs):
+                    logger.warning(f"{len(jobs) - refreshed} running jobs lost their lock")
+            except Exception as e:
+                logger.error(f"Job heartbeat failed: {e}")
+
+    async def _recover_stale(self) -> None:
+        try:
+            async with async_session_maker() as db:
+                recovered = await JobQueue.requeue_stale(db)
+            if recovered:
+                logger.warning(f"Recovered {recovered} jobs with expired locks")
+        except Exception as e:
+            logger.error(f"Stale job recovery failed: {e}")
+
+    async def _claim(self, free: int) -> int:
+        try:
+            async with async_session_maker() as db:
+                jobs = await JobQueue.claim(
+                    db, self.queues, free, self.worker_id, exclude_names=self._saturated_names()
+                )
+        except Exception as e:
+            logger.error(f"Claiming jobs failed: {e}")
+            return 0
+
+        for job_row in jobs:
+            self._running_by_name[job_row.name] += 1
+            self._running[job_row.id] = job_row
+            task = asyncio.create_task(self._execute(job_row))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return len(jobs)
+
+    async def _execute(self, job_row: Job) -> None:
+        definition = JOB_REGISTRY.get(job_row.name)
+        started = time.perf_counter()
+        try:
+            if definition is None:
+                raise LookupError(f"No handler registered for job '{job_row.name}'")
+            await asyncio.wait_for(definition.handler(job_row.payload), job_timeout(job_row.name))
+        except asyncio.CancelledError:
+            # Worker shutdown: release the claim now instead of after JOB_LOCK_TIMEOUT
+            try:
+                async with async_session_maker() as db:
+                    await JobQueue.release(db, job_row, "Cancelled by worker shutdown")
+                logger.warning(f"Job {job_row.id} {job_row.name} cancelled, returned to the queue")
+            except Exception as db_error:
+                logger.error(f"Could not release cancelled job {job_row.id}: {db_error}")
+            raise
+        except Exception as e:
+            self.failed += 1
+            error = f"{type(e).__name__}: {e}"
+            try:
+                async with async_session_maker() as db:
+                    will_retry = await JobQueue.fail(db, job_row, error, retry=definition is not None)
+                logger.warning(
+                    f"Job {job_row.id} {job_row.name} failed (attempt {job_row.attempts}/{job_row.max_attempts}"
+                    f"{', will retry' if will_retry else ''}): {error}"
+                )
+            except Exception as db_error:
+                logger.error(f"Could not record failure of job {job_row.id}: {db_error}")
+        else:
+            self.processed += 1
+            try:
+                async with async_session_maker() as db:
+                    if not await JobQueue.complete(db, job_row):
+                        logger.warning(f"Job {job_row.id} {job_row.name} lost its lock before finishing")
+            except Exception as e:
+                logger.error(f"Could not delete finished job {job_row.id} (it may run again): {e}")
+            logger.info(f"Job {job_row.id} {job_row.name} done in {time.perf_counter() - started:.3f}s")
+        finally:
+            self._running.pop(job_row.id, None)
+            self._running_by_name[job_row.name] -= 1
+            self._wakeup.set()
+
+    async def _drain(self) -> None:
+        """Wait for running jobs up to their timeouts, then cancel (and requeue) the rest"""
+        if not self._tasks:
+            return
+        timeouts = [job_timeout(job_row.name) for job_row in self._running.values()]
+        timeout = max(timeouts, default=settings.JOB_TIMEOUT) + DRAIN_GRACE
+        logger.info(f"Waiting up to {timeout:.0f}s for {len(self._tasks)} running jobs ...")
+        done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Run background jobs")
+    parser.add_argument("--queues", nargs="+", default=[DEFAULT_QUEUE], help="Queues to consume")
+    parser.add_argument("--concurrency", type=int, default=None, help="Jobs run at once (JOB_WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    worker = Worker(args.queues, args.concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,18 +3,32 @@ Quick Commerce - Cửa Hàng Tiện Lợi
 FastAPI Backend Application
 """
 
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 
 from core.config import settings
+from core.cache import close_cache
+from core.database import engine, read_engine, pool_stats
+from core.metrics import (
+    CONTENT_TYPE, MetricsMiddleware, check_metrics_access, instrument_engine, register_collector, render_metrics,
+)
+from core.security import shutdown_hash_pool
+from core.static import CachedStaticFiles
+from core.uploads import UploadSizeLimitMiddleware
+from catalog.images import UPLOADS_URL
 from auth.router import router as auth_router
 from users.router import router as users_router
 from catalog.router import router as catalog_router
 from inventory.router import router as inventory_router
 from orders.router import router as orders_router
 from contact.router import router as contact_router
+from jobs.queue import queue_metrics
+from jobs.worker import Worker
+from outbox.events import outbox_metrics
+from outbox.relay import OutboxRelay
 
 
 @asynccontextmanager
@@ -22,9 +36,21 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     print("🚀 Starting Quick Commerce API...")
+    worker = Worker() if settings.JOB_WORKER_IN_APP else None
+    worker_task = asyncio.create_task(worker.run()) if worker else None
+    relay = OutboxRelay() if settings.OUTBOX_RELAY_IN_APP else None
+    relay_task = asyncio.create_task(relay.run()) if relay else None
     yield
     # Shutdown
     print("👋 Shutting down Quick Commerce API...")
+    if worker:
+        worker.stop()
+        await worker_task
+    if relay:
+        relay.stop()
+        await relay_task
+    await close_cache()
+    shutdown_hash_pool()
 
 
 app = FastAPI(
@@ -36,6 +62,9 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Upload size limit while the body arrives (inside CORS, so 413s carry CORS headers)
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # CORS Middleware
 app.add_middleware(
     CORSMiddleware,
@@ -45,8 +74,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency / SQL query metrics (outermost, so CORS and errors are timed too)
+instrument_engine(engine)
+instrument_engine(read_engine)
+app.add_middleware(MetricsMiddleware)
+register_collector(queue_metrics)
+register_collector(outbox_metrics)
+
 # Mount static files for uploads
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app.mount(UPLOADS_URL, CachedStaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 # Include routers
 app.include_router(auth_router, prefix=settings.API_V1_PREFIX, tags=["Authentication"])
@@ -73,3 +109,16 @@ async def health_check():
     """Health Check Endpoint"""
     return {"status": "healthy"}
 
+
+@app.get("/health/db-pool", tags=["Health"])
+async def db_pool_health(request: Request):
+    """Connection pool statistics of the worker serving the request (METRICS_TOKEN)"""
+    check_metrics_access(request.headers.get("Authorization"))
+    return pool_stats()
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metrics(request: Request):
+    """Prometheus metrics of the worker serving the request (METRICS_TOKEN)"""
+    check_metrics_access(request.headers.get("Authorization"))
+    return PlainTextResponse(await render_metrics(), media_type=CONTENT_TYPE)
@@ -5,8 +5,10 @@ Models Registry - Import all models to resolve SQLAlchemy relationships
 # Import all models here so SQLAlchemy can resolve string references in relationships
 from users.models import User, UserRole
 from catalog.models import Category, Product
-from inventory.models import InventoryBatch
+from inventory.models import InventoryBatch, ProductStock
 from orders.models import Order, OrderItem, Cart, CartItem, OrderStatus, PaymentMethod, PaymentStatus
+from jobs.models import Job, JobStatus
+from outbox.models import OutboxEvent
 
 # Export all models
 __all__ = [
@@ -15,6 +17,7 @@ __all__ = [
     "Category",
     "Product",
     "InventoryBatch",
+    "ProductStock",
     "Order",
     "OrderItem",
     "Cart",
@@ -22,5 +25,8 @@ __all__ = [
     "OrderStatus",
     "PaymentMethod",
     "PaymentStatus",
+    "Job",
+    "JobStatus",
+    "OutboxEvent",
 ]
 
@@ -17,6 +17,11 @@ if TYPE_CHECKING:
     from inventory.models import InventoryBatch
 
 
+def _enum_values(enum_cls) -> list[str]:
+    """Persist enum values (lowercase, as in the PostgreSQL types) instead of member names"""
+    return [member.value for member in enum_cls]
+
+
 class OrderStatus(str, enum.Enum):
     """Order status enumeration"""
     PENDING = "pending"
@@ -50,7 +55,7 @@ class Order(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"), nullable=True, index=True)
     status: Mapped[OrderStatus] = mapped_column(
-        SQLEnum(OrderStatus, name="order_status", create_type=False),
+        SQLEnum(OrderStatus, name="order_status", create_type=False, values_callable=_enum_values),
         default=OrderStatus.PENDING
     )
     subtotal: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=0)
@@ -62,11 +67,11 @@ class Order(Base):
     customer_name: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     payment_method: Mapped[PaymentMethod] = mapped_column(
-        SQLEnum(PaymentMethod, name="payment_method", create_type=False),
+        SQLEnum(PaymentMethod, name="payment_method", create_type=False, values_callable=_enum_values),
         default=PaymentMethod.COD
     )
     payment_status: Mapped[PaymentStatus] = mapped_column(
-        SQLEnum(PaymentStatus, name="payment_status", create_type=False),
+        SQLEnum(PaymentStatus, name="payment_status", create_type=False, values_callable=_enum_values),
         default=PaymentStatus.PENDING
     )
     is_age_verified: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -6,7 +6,8 @@ from typing import Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_db
+from core.database import get_db, get_read_db
+from core.pagination import wants_total
 from users.models import User, UserRole
 from auth.dependencies import get_current_user, require_roles
 from orders.models import OrderStatus
@@ -31,21 +32,14 @@ router = APIRouter()
 # Cart Endpoints
 # =====================================================
 
-@router.get("/cart", response_model=CartResponse)
-async def get_cart(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """
-    Get current user's cart.
-    
-    - Returns cart with all items
-    """
-    cart = await CartService.get_or_create_cart(db, current_user.id)
+async def _cart_to_response(db: AsyncSession, cart) -> CartResponse:
+    """Convert cart model to response (stock for all items in one query)"""
+    stock = await ProductService.get_available_stock_bulk(
+        db, [item.product_id for item in cart.items]
+    )
     
     items = []
     for item in cart.items:
-        available = await ProductService.get_available_stock(db, item.product_id)
         items.append(CartItemResponse(
             id=item.id,
             product_id=item.product_id,
@@ -55,7 +49,7 @@ async def get_cart(
             unit_price=item.product.current_price,
             subtotal=item.subtotal,
             image_path=item.product.image_path,
-            available_stock=available,
+            available_stock=stock[item.product_id],
             added_at=item.added_at
         ))
     
@@ -67,6 +61,20 @@ async def get_cart(
     )
 
 
+@router.get("/cart", response_model=CartResponse)
+async def get_cart(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get current user's cart.
+    
+    - Returns cart with all items
+    """
+    cart = await CartService.get_or_create_cart(db, current_user.id)
+    return await _cart_to_response(db, cart)
+
+
 @router.post("/cart/items", response_model=CartResponse)
 async def add_to_cart(
     data: CartItemCreate,
@@ -80,29 +88,7 @@ async def add_to_cart(
     - Updates quantity if item already in cart
     """
     cart = await CartService.add_item(db, current_user.id, data.product_id, data.quantity)
-    
-    items = []
-    for item in cart.items:
-        available = await ProductService.get_available_stock(db, item.product_id)
-        items.append(CartItemResponse(
-            id=item.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            product_name=item.product.name,
-            product_sku=item.product.sku,
-            unit_price=item.product.current_price,
-            subtotal=item.subtotal,
-            image_path=item.product.image_path,
-            available_stock=available,
-            added_at=item.added_at
-        ))
-    
-    return CartResponse(
-        id=cart.id,
-        items=items,
-        total_items=cart.total_items,
-        subtotal=cart.subtotal
-    )
+    return await _cart_to_response(db, cart)
 
 
 @router.put("/cart/items/{item_id}", response_model=CartResponse)
@@ -116,29 +102,7 @@ async def update_cart_item(
     Update cart item quantity.
     """
     cart = await CartService.update_item(db, current_user.id, item_id, data.quantity)
-    
-    items = []
-    for item in cart.items:
-        available = await ProductService.get_available_stock(db, item.product_id)
-        items.append(CartItemResponse(
-            id=item.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            product_name=item.product.name,
-            product_sku=item.product.sku,
-            unit_price=item.product.current_price,
-            subtotal=item.subtotal,
-            image_path=item.product.image_path,
-            available_stock=available,
-            added_at=item.added_at
-        ))
-    
-    return CartResponse(
-        id=cart.id,
-        items=items,
-        total_items=cart.total_items,
-        subtotal=cart.subtotal
-    )
+    return await _cart_to_response(db, cart)
 
 
 @router.delete("/cart/items/{item_id}", response_model=CartResponse)
@@ -151,29 +115,7 @@ async def remove_cart_item(
     Remove item from cart.
     """
     cart = await CartService.remove_item(db, current_user.id, item_id)
-    
-    items = []
-    for item in cart.items:
-        available = await ProductService.get_available_stock(db, item.product_id)
-        items.append(CartItemResponse(
-            id=item.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            product_name=item.product.name,
-            product_sku=item.product.sku,
-            unit_price=item.product.current_price,
-            subtotal=item.subtotal,
-            image_path=item.product.image_path,
-            available_stock=available,
-            added_at=item.added_at
-        ))
-    
-    return CartResponse(
-        id=cart.id,
-        items=items,
-        total_items=cart.total_items,
-        subtotal=cart.subtotal
-    )
+    return await _cart_to_response(db, cart)
 
 
 @router.delete("/cart/clear")
@@ -234,7 +176,9 @@ async def list_orders(
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
     status: Optional[OrderStatus] = None,
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces page)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: offset pages only)"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -242,30 +186,35 @@ async def list_orders(
     
     - Customers see their own orders
     - Staff/Admin see all orders
+    - Keyset pagination: follow next_cursor instead of page numbers
     """
     skip = (page - 1) * size
+    with_total = wants_total(cursor, include_total)
     
     if current_user.role == UserRole.customer:
-        orders, total = await OrderService.get_user_orders(
-            db, current_user.id, skip=skip, limit=size, status=status
+        orders, total, next_cursor = await OrderService.get_user_orders(
+            db, current_user.id, skip=skip, limit=size, status=status,
+            cursor=cursor, with_total=with_total
         )
     else:
-        orders, total = await OrderService.get_all_orders(
-            db, skip=skip, limit=size, status=status
+        orders, total, next_cursor = await OrderService.get_all_orders(
+            db, skip=skip, limit=size, status=status,
+            cursor=cursor, with_total=with_total
         )
     
     return OrderListResponse(
         items=[_order_to_response(o) for o in orders],
         total=total,
-        page=page,
-        size=size
+        page=None if cursor else page,
+        size=size,
+        next_cursor=next_cursor
     )
 
 
 @router.get("/orders/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -280,7 +229,7 @@ async def get_order(
         raise NotFoundException(detail="Order not found")
     
     # Check access
-    if current_user.role == UserRole.CUSTOMER and order.user_id != current_user.id:
+    if current_user.role == UserRole.customer and order.user_id != current_user.id:
         raise ForbiddenException(detail="Access denied")
     
     return _order_to_response(order)
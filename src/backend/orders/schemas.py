@@ -119,9 +119,10 @@ class OrderResponse(BaseModel):
 class OrderListResponse(BaseModel):
     """Schema for paginated order list"""
     items: List[OrderResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # Omitted for cursor pages unless include_total=true
+    page: Optional[int] = None  # None for cursor pages
     size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
 
 
 class OrderSummary(BaseModel):
@@ -4,17 +4,22 @@ Orders Service - Business Logic for Cart and Orders
 
 from decimal import Decimal
 from typing import Optional, List
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload
 
-from orders.models import Order, OrderItem, OrderStatus, Cart, CartItem
+from orders.models import Order, OrderItem, OrderStatus, PaymentStatus, Cart, CartItem
 from orders.schemas import OrderCreate, OrderStatusUpdate
 from catalog.models import Product
 from catalog.service import ProductService
 from inventory.service import InventoryService
 from inventory.schemas import InventoryAllocation
 from users.models import User
+from core.database import run_with_retry
+from jobs.queue import JobQueue
+from outbox.events import Outbox
+from core.pagination import Keyset
 from core.exceptions import (
     NotFoundException, 
     BadRequestException, 
@@ -24,113 +29,146 @@ from core.exceptions import (
 )
 
 
+# Newest first; id breaks ties between orders created in the same instant
+ORDER_KEYSET = Keyset(Order.created_at, Order.id, descending=True)
+
+
 class CartService:
-    """Shopping cart business logic"""
+    """
+    Shopping cart business logic.
+    
+    Mutations are targeted statements (upsert / update / delete) followed by a
+    single joined reload of the cart, instead of loading the whole cart before
+    and after every change.
+    """
     
     @staticmethod
-    async def get_or_create_cart(db: AsyncSession, user_id: int) -> Cart:
-        """Get user's cart or create if not exists"""
+    async def _load_cart(db: AsyncSession, *criteria) -> Optional[Cart]:
+        """Load a cart with items and products in one joined query"""
         result = await db.execute(
             select(Cart)
             .options(
-                selectinload(Cart.items).selectinload(CartItem.product)
+                joinedload(Cart.items).joinedload(CartItem.product)
             )
-            .where(Cart.user_id == user_id)
+            .where(*criteria)
+            .execution_options(populate_existing=True)
         )
-        cart = result.scalar_one_or_none()
+        return result.unique().scalar_one_or_none()
+    
+    @staticmethod
+    async def _ensure_cart_id(db: AsyncSession, user_id: int) -> int:
+        """Get or create the user's cart id in one statement"""
+        stmt = pg_insert(Cart).values(user_id=user_id)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Cart.user_id],
+            set_={"updated_at": stmt.excluded.updated_at},
+        ).returning(Cart.id)
+        result = await db.execute(stmt)
+        return result.scalar_one()
+    
+    @staticmethod
+    async def get_or_create_cart(db: AsyncSession, user_id: int) -> Cart:
+        """Get user's cart or create if not exists"""
+        cart = await CartService._load_cart(db, Cart.user_id == user_id)
         
         if not cart:
-            cart = Cart(user_id=user_id)
-            db.add(cart)
+            # ON CONFLICT keeps concurrent first requests from failing on the unique user_id
+            await db.execute(
+                pg_insert(Cart)
+                .values(user_id=user_id)
+                .on_conflict_do_nothing(index_elements=[Cart.user_id])
+            )
             await db.commit()
-            await db.refresh(cart)
-            cart.items = []
+            cart = await CartService._load_cart(db, Cart.user_id == user_id)
         
         return cart
     
     @staticmethod
     async def add_item(db: AsyncSession, user_id: int, product_id: int, quantity: int) -> Cart:
         """Add item to cart or update quantity if exists"""
-        # Verify product exists and is active
-        product = await ProductService.get_by_id(db, product_id)
-        if not product or not product.is_active:
+        # Verify product exists and is active, reading its stock in the same query
+        result = await db.execute(
+            select(ProductService.available_stock_expr(Product.id))
+            .where(Product.id == product_id, Product.is_active == True)
+        )
+        available = result.scalar_one_or_none()
+        if available is None:
             raise NotFoundException(detail="Product not found or inactive")
         
-        # Check available stock
-        available = await ProductService.get_available_stock(db, product_id)
         if available < quantity:
             raise InsufficientStockError(detail=f"Only {available} items available")
         
-        cart = await CartService.get_or_create_cart(db, user_id)
-        
-        # Check if item already in cart
-        existing_item = None
-        for item in cart.items:
-            if item.product_id == product_id:
-                existing_item = item
-                break
-        
-        if existing_item:
-            new_qty = existing_item.quantity + quantity
-            if new_qty > available:
-                raise InsufficientStockError(detail=f"Only {available} items available")
-            existing_item.quantity = new_qty
-        else:
-            cart_item = CartItem(cart_id=cart.id, product_id=product_id, quantity=quantity)
-            db.add(cart_item)
+        cart_id = await CartService._ensure_cart_id(db, user_id)
+        
+        # Insert, or add to the existing line while it stays within stock
+        stmt = pg_insert(CartItem).values(cart_id=cart_id, product_id=product_id, quantity=quantity)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CartItem.cart_id, CartItem.product_id],
+            set_={"quantity": CartItem.quantity + stmt.excluded.quantity},
+            where=(CartItem.quantity + stmt.excluded.quantity <= available),
+        ).returning(CartItem.id)
+        result = await db.execute(stmt)
+        if result.scalar_one_or_none() is None:
+            await db.rollback()
+            raise InsufficientStockError(detail=f"Only {available} items available")
         
         await db.commit()
-        return await CartService.get_or_create_cart(db, user_id)
+        return await CartService._load_cart(db, Cart.id == cart_id)
     
     @staticmethod
     async def update_item(db: AsyncSession, user_id: int, item_id: int, quantity: int) -> Cart:
         """Update cart item quantity"""
-        cart = await CartService.get_or_create_cart(db, user_id)
-        
-        # Find item
-        item = None
-        for cart_item in cart.items:
-            if cart_item.id == item_id:
-                item = cart_item
-                break
-        
-        if not item:
+        # Find item in the user's cart together with its product stock
+        result = await db.execute(
+            select(CartItem.cart_id, ProductService.available_stock_expr(CartItem.product_id))
+            .join(Cart, Cart.id == CartItem.cart_id)
+            .where(CartItem.id == item_id, Cart.user_id == user_id)
+        )
+        row = result.one_or_none()
+        if row is None:
             raise NotFoundException(detail="Cart item not found")
         
-        # Check available stock
-        available = await ProductService.get_available_stock(db, item.product_id)
+        cart_id, available = row
         if quantity > available:
             raise InsufficientStockError(detail=f"Only {available} items available")
         
-        item.quantity = quantity
+        await db.execute(
+            update(CartItem)
+            .where(CartItem.id == item_id)
+            .values(quantity=quantity)
+            .execution_options(synchronize_session=False)
+        )
         await db.commit()
         
-        return await CartService.get_or_create_cart(db, user_id)
+        return await CartService._load_cart(db, Cart.id == cart_id)
     
     @staticmethod
     async def remove_item(db: AsyncSession, user_id: int, item_id: int) -> Cart:
         """Remove item from cart"""
-        cart = await CartService.get_or_create_cart(db, user_id)
-        
-        # Find and remove item
-        for cart_item in cart.items:
-            if cart_item.id == item_id:
-                await db.delete(cart_item)
-                break
-        else:
+        result = await db.execute(
+            delete(CartItem)
+            .where(
+                CartItem.id == item_id,
+                CartItem.cart_id.in_(select(Cart.id).where(Cart.user_id == user_id))
+            )
+            .returning(CartItem.cart_id)
+            .execution_options(synchronize_session=False)
+        )
+        cart_id = result.scalar_one_or_none()
+        if cart_id is None:
             raise NotFoundException(detail="Cart item not found")
         
         await db.commit()
-        return await CartService.get_or_create_cart(db, user_id)
+        return await CartService._load_cart(db, Cart.id == cart_id)
     
     @staticmethod
     async def clear_cart(db: AsyncSession, user_id: int) -> bool:
         """Clear all items from cart"""
-        cart = await CartService.get_or_create_cart(db, user_id)
-        
-        for item in cart.items:
-            await db.delete(item)
-        
+        await db.execute(
+            delete(CartItem)
+            .where(CartItem.cart_id.in_(select(Cart.id).where(Cart.user_id == user_id)))
+            .execution_options(synchronize_session=False)
+        )
         await db.commit()
         return True
 
@@ -159,9 +197,11 @@ class OrderService:
         user_id: int,
         skip: int = 0,
         limit: int = 20,
-        status: Optional[OrderStatus] = None
-    ) -> tuple[List[Order], int]:
-        """Get orders for a user"""
+        status: Optional[OrderStatus] = None,
+        cursor: Optional[str] = None,
+        with_total: bool = True,
+    ) -> tuple[List[Order], Optional[int], Optional[str]]:
+        """Get orders for a user (see get_all_orders for paging)"""
         query = select(Order).options(
             selectinload(Order.items).selectinload(OrderItem.product)
         ).where(Order.user_id == user_id)
@@ -172,24 +212,31 @@ class OrderService:
             count_query = count_query.where(Order.status == status)
         
         # Get total
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
+        total = (await db.execute(count_query)).scalar() if with_total else None
         
         # Get orders
-        query = query.order_by(Order.created_at.desc()).offset(skip).limit(limit)
-        result = await db.execute(query)
-        orders = result.scalars().all()
+        if not cursor:
+            query = query.offset(skip)
+        result = await db.execute(ORDER_KEYSET.apply(query, cursor, limit))
+        orders, next_cursor = ORDER_KEYSET.page(result.scalars().all(), limit)
         
-        return list(orders), total
+        return orders, total, next_cursor
     
     @staticmethod
     async def get_all_orders(
         db: AsyncSession,
         skip: int = 0,
         limit: int = 20,
-        status: Optional[OrderStatus] = None
-    ) -> tuple[List[Order], int]:
-        """Get all orders (admin/staff)"""
+        status: Optional[OrderStatus] = None,
+        cursor: Optional[str] = None,
+        with_total: bool = True,
+    ) -> tuple[List[Order], Optional[int], Optional[str]]:
+        """
+        Get all orders (admin/staff), newest first.
+        
+        Pages by OFFSET (skip) or by keyset `cursor`; returns (orders, total, next_cursor).
+        total is None when with_total is False.
+        """
         query = select(Order).options(
             selectinload(Order.items).selectinload(OrderItem.product)
         )
@@ -200,15 +247,15 @@ class OrderService:
             count_query = count_query.where(Order.status == status)
         
         # Get total
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
+        total = (await db.execute(count_query)).scalar() if with_total else None
         
         # Get orders
-        query = query.order_by(Order.created_at.desc()).offset(skip).limit(limit)
-        result = await db.execute(query)
-        orders = result.scalars().all()
+        if not cursor:
+            query = query.offset(skip)
+        result = await db.execute(ORDER_KEYSET.apply(query, cursor, limit))
+        orders, next_cursor = ORDER_KEYSET.page(result.scalars().all(), limit)
         
-        return list(orders), total
+        return orders, total, next_cursor
     
     @staticmethod
     async def create_from_cart(db: AsyncSession, user: User, data: OrderCreate) -> Order:
@@ -221,9 +268,20 @@ class OrderService:
         3. Reserve inventory using FEFO with locking
         4. Create order and order items
         5. Clear cart
+        
+        Retried on deadlock/serialization failure (see run_with_retry).
         """
+        # Read plain values up front: a retry rolls back and expires ORM objects
+        user_id = user.id
+        return await run_with_retry(
+            db, lambda: OrderService._create_from_cart(db, user_id, data)
+        )
+    
+    @staticmethod
+    async def _create_from_cart(db: AsyncSession, user_id: int, data: OrderCreate) -> Order:
+        """Single attempt of create_from_cart"""
         # Get cart with items
-        cart = await CartService.get_or_create_cart(db, user.id)
+        cart = await CartService.get_or_create_cart(db, user_id)
         
         if not cart.items:
             raise BadRequestException(detail="Cart is empty")
@@ -240,14 +298,13 @@ class OrderService:
         
         # Start transaction for stock allocation
         async with db.begin_nested():
-            # Allocate stock for each item using FEFO with locking
+            # Allocate stock for all items at once using FEFO with locking
+            allocation_results = await InventoryService.allocate_stock_fefo_bulk(
+                db, {item.product_id: item.quantity for item in cart.items}
+            )
             all_allocations: List[tuple[int, int, Decimal, List[InventoryAllocation]]] = []
             
-            for item in cart.items:
-                allocation_result = await InventoryService.allocate_stock_fefo(
-                    db, item.product_id, item.quantity
-                )
-                
+            for item, allocation_result in zip(cart.items, allocation_results):
                 if not allocation_result.success:
                     # Rollback will happen automatically
                     raise InsufficientStockError(
@@ -269,7 +326,7 @@ class OrderService:
             
             # Create order
             order = Order(
-                user_id=user.id,
+                user_id=user_id,
                 status=OrderStatus.PENDING,
                 subtotal=subtotal,
                 delivery_fee=OrderService.DELIVERY_FEE,
@@ -300,8 +357,31 @@ class OrderService:
                     db.add(order_item)
             
             # Clear cart
-            for item in cart.items:
-                await db.delete(item)
+            await db.execute(
+                delete(CartItem)
+                .where(CartItem.cart_id == cart.id)
+                .execution_options(synchronize_session=False)
+            )
+            
+            # Customer notification, committed with the order (orders.tasks)
+            JobQueue.enqueue(
+                db, "orders.notify_status", {"order_id": order.id, "status": OrderStatus.PENDING.value}
+            )
+            
+            # Order event for downstream consumers (published by outbox.relay)
+            Outbox.add(db, "order.created", "order", order.id, {
+                "order_id": order.id,
+                "user_id": user_id,
+                "status": OrderStatus.PENDING.value,
+                "payment_method": data.payment_method.value,
+                "subtotal": str(subtotal),
+                "delivery_fee": str(OrderService.DELIVERY_FEE),
+                "total_amount": str(total_amount),
+                "items": [
+                    {"product_id": product_id, "quantity": quantity, "unit_price": str(price)}
+                    for product_id, quantity, price, _ in all_allocations
+                ],
+            })
         
         await db.commit()
         
@@ -315,7 +395,21 @@ class OrderService:
         data: OrderStatusUpdate,
         user: User
     ) -> Order:
-        """Update order status"""
+        """Update order status (retried on deadlock/serialization failure)"""
+        # Read plain values up front: a retry rolls back and expires ORM objects
+        user_id = user.id
+        return await run_with_retry(
+            db, lambda: OrderService._update_status(db, order_id, data, user_id)
+        )
+    
+    @staticmethod
+    async def _update_status(
+        db: AsyncSession,
+        order_id: int,
+        data: OrderStatusUpdate,
+        changed_by: int
+    ) -> Order:
+        """Single attempt of update_status"""
         order = await OrderService.get_by_id(db, order_id)
         if not order:
             raise NotFoundException(detail="Order not found")
@@ -342,6 +436,7 @@ class OrderService:
         if data.notes:
             order.notes = (order.notes or "") + f"\n[{new_status.value}] {data.notes}"
         
+        # Stock changes run in this transaction; committed once below
         # Handle cancellation - release stock
         if new_status == OrderStatus.CANCELLED:
             allocations = [
@@ -359,7 +454,20 @@ class OrderService:
                 if item.batch_id
             ]
             await InventoryService.confirm_stock(db, allocations)
-            order.payment_status = "paid"
+            order.payment_status = PaymentStatus.PAID
+        
+        JobQueue.enqueue(db, "orders.notify_status", {"order_id": order_id, "status": new_status.value})
+        
+        # order.confirmed, order.picking, ..., order.cancelled (published by outbox.relay)
+        Outbox.add(db, f"order.{new_status.value}", "order", order_id, {
+            "order_id": order_id,
+            "user_id": order.user_id,
+            "previous_status": old_status.value,
+            "status": new_status.value,
+            "payment_status": order.payment_status.value,
+            "changed_by": changed_by,
+            "notes": data.notes,
+        })
         
         await db.commit()
         return await OrderService.get_by_id(db, order_id)
@@ -0,0 +1,31 @@
+"""
+Orders background jobs
+"""
+
+import logging
+
+from sqlalchemy import select
+
+from core.database import async_session_maker
+from jobs.queue import job
+from orders.models import Order
+
+logger = logging.getLogger(__name__)
+
+
+@job("orders.notify_status")
+async def notify_order_status(payload: dict) -> None:
+    """
+    Simulate the customer notification of an order status change (SMS / push).
+    """
+    async with async_session_maker() as db:
+        order = (await db.execute(select(Order).where(Order.id == payload["order_id"]))).scalar_one_or_none()
+    if order is None:
+        logger.warning(f"Order {payload['order_id']} not found, notification skipped")
+        return
+    
+    # Here you would integrate with an SMS / push provider
+    logger.info(
+        f"📱 Notifying {order.customer_name or 'customer'} ({order.customer_phone or 'no phone'}): "
+        f"order #{order.id} is {payload['status']}"
+    )
@@ -0,0 +1,3 @@
+"""Transactional outbox of domain events (published by python -m outbox.relay)"""
+from outbox.models import OutboxEvent
+from outbox.events import Outbox
@@ -0,0 +1,146 @@
+"""
+Outbox - domain events committed with the change they describe
+
+Outbox.add puts an event row into the caller's session, so the event exists
+exactly when the change commits (no event for a rolled-back order, no lost
+event after a committed one). The relay (outbox.relay) reads unpublished
+rows in id order, hands them to the configured sink (outbox.sinks) in
+batches and marks them published; published rows are purged after
+OUTBOX_RETENTION_HOURS.
+
+Delivery is at-least-once: a relay that fails after the sink accepted a
+batch publishes it again. Consumers deduplicate by the event id.
+"""
+
+from datetime import timedelta
+from typing import List, Optional, Sequence
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import async_session_maker
+from core.metrics import gauge
+from outbox.models import OutboxEvent
+
+
+def to_message(event: OutboxEvent) -> dict:
+    """Wire format of an event, as published to every sink"""
+    return {
+        "id": event.id,
+        "type": event.event_type,
+        "aggregate_type": event.aggregate_type,
+        "aggregate_id": event.aggregate_id,
+        "occurred_at": event.created_at.isoformat(),
+        "payload": event.payload,
+    }
+
+
+class Outbox:
+    """Record events and read them back for publication"""
+
+    @staticmethod
+    def add(
+        db: AsyncSession,
+        event_type: str,
+        aggregate_type: str,
+        aggregate_id: int | str,
+        payload: Optional[dict] = None,
+    ) -> OutboxEvent:
+        """
+        Add an event to the session; it is committed (or rolled back) with
+        the caller's transaction. The payload must be JSON-serializable.
+        """
+        event = OutboxEvent(
+            aggregate_type=aggregate_type,
+            aggregate_id=str(aggregate_id),
+            event_type=event_type,
+            payload=payload or {},
+        )
+        db.add(event)
+        return event
+
+    @staticmethod
+    async def claim(db: AsyncSession, limit: int) -> List[OutboxEvent]:
+        """
+        Lock the oldest unpublished events (transaction left open).
+
+        SKIP LOCKED keeps a second relay from publishing the same rows; the
+        order across relays is not preserved, so run one relay per sink.
+        """
+        result = await db.execute(
+            select(OutboxEvent)
+            .where(OutboxEvent.published_at.is_(None))
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def mark_published(db: AsyncSession, event_ids: Sequence[int]) -> None:
+        """Mark claimed events published and commit"""
+        await db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(event_ids))
+            .values(published_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    @staticmethod
+    async def purge(db: AsyncSession, retention_hours: Optional[int] = None) -> int:
+        """
+        Delete events published longer than OUTBOX_RETENTION_HOURS ago.
+
+        Returns:
+            Number of events deleted
+        """
+        hours = settings.OUTBOX_RETENTION_HOURS if retention_hours is None else retention_hours
+        result = await db.execute(
+            delete(OutboxEvent).where(
+                OutboxEvent.published_at < func.now() - timedelta(hours=hours)
+            )
+        )
+        await db.commit()
+        return result.rowcount
+
+    @staticmethod
+    async def stats(db: AsyncSession) -> List[dict]:
+        """Unpublished events per aggregate type, with the age of the oldest one"""
+        result = await db.execute(
+            select(
+                OutboxEvent.aggregate_type,
+                func.count().label("pending"),
+                func.extract("epoch", func.now() - func.min(OutboxEvent.created_at)).label("oldest_seconds"),
+            )
+            .where(OutboxEvent.published_at.is_(None))
+            .group_by(OutboxEvent.aggregate_type)
+        )
+        return [
+            {
+                "aggregate_type": row.aggregate_type,
+                "pending": row.pending,
+                "oldest_pending_seconds": float(row.oldest_seconds or 0),
+            }
+            for row in result
+        ]
+
+
+async def outbox_metrics() -> List[str]:
+    """Relay lag gauges for /metrics (core.metrics collector)"""
+    async with async_session_maker() as db:
+        rows = await Outbox.stats(db)
+    lines = gauge(
+        "outbox_pending_events",
+        "Events not yet published by the relay",
+        ("aggregate_type",),
+        {(row["aggregate_type"],): row["pending"] for row in rows},
+    )
+    lines += gauge(
+        "outbox_oldest_pending_seconds",
+        "Age of the oldest unpublished event",
+        ("aggregate_type",),
+        {(row["aggregate_type"],): row["oldest_pending_seconds"] for row in rows},
+    )
+    return lines
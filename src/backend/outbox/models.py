@@ -0,0 +1,27 @@
+"""
+Outbox SQLAlchemy Models - domain events awaiting publication
+"""
+
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, String, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from core.database import Base
+
+
+class OutboxEvent(Base):
+    """Event written in the transaction of the change it describes"""
+    __tablename__ = "outbox_events"
+    
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    aggregate_type: Mapped[str] = mapped_column(String(50))  # e.g. "order"
+    aggregate_id: Mapped[str] = mapped_column(String(50))
+    event_type: Mapped[str] = mapped_column(String(100))  # e.g. "order.created"
+    payload: Mapped[dict] = mapped_column(JSONB, default=dict)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    published_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<OutboxEvent {self.id} {self.event_type} {self.aggregate_id}>"
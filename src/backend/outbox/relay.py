@@ -0,0 +1,132 @@
+"""
+Outbox Relay - publishes committed outbox events to the configured sink
+
+Claims up to OUTBOX_BATCH_SIZE unpublished events, publishes them in one
+sink call and marks them published in the same transaction, then loops
+immediately while full batches keep coming and polls every
+OUTBOX_POLL_INTERVAL seconds otherwise. A failing sink is retried with
+growing pauses; events wait in the table meanwhile. Run one relay per sink
+to keep events in id order.
+
+Usage (from src/backend):
+    python -m outbox.relay
+    OUTBOX_SINK=file OUTBOX_FILE_PATH=/tmp/events.jsonl python -m outbox.relay
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+import time
+from typing import Optional
+
+from core.config import settings
+from core.database import async_session_maker, engine
+from outbox.events import Outbox, to_message
+from outbox.sinks import create_sink
+
+logger = logging.getLogger(__name__)
+
+# Seconds a sink may take for one batch before the attempt counts as failed
+PUBLISH_TIMEOUT = 30.0
+
+# Longest pause between attempts while the sink keeps failing
+MAX_FAILURE_DELAY = 30.0
+
+# Seconds between purges of old published events
+PURGE_INTERVAL = 3600
+
+
+class OutboxRelay:
+    """Moves outbox events to a sink in batches"""
+
+    def __init__(self, sink=None, batch_size: Optional[int] = None, poll_interval: Optional[float] = None):
+        self.sink = sink or create_sink()
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.poll_interval = settings.OUTBOX_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.published = 0
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def stop(self) -> None:
+        """Stop after the batch in progress"""
+        self._stopping = True
+        self._wakeup.set()
+
+    async def publish_batch(self) -> int:
+        """
+        Publish one batch of events.
+
+        Returns:
+            Number of events published (0 when none are waiting)
+        """
+        async with async_session_maker() as db:
+            events = await Outbox.claim(db, self.batch_size)
+            if not events:
+                return 0
+            await asyncio.wait_for(self.sink.publish([to_message(event) for event in events]), PUBLISH_TIMEOUT)
+            await Outbox.mark_published(db, [event.id for event in events])
+        self.published += len(events)
+        return len(events)
+
+    async def run(self) -> None:
+        logger.info(f"Outbox relay started: sink={type(self.sink).__name__} batch={self.batch_size}")
+        failures = 0
+        last_purge = float("-inf")  # Purge on start
+
+        while not self._stopping:
+            if time.monotonic() - last_purge >= PURGE_INTERVAL:
+                last_purge = time.monotonic()
+                await self._purge()
+
+            try:
+                count = await self.publish_batch()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(MAX_FAILURE_DELAY, self.poll_interval * 2 ** failures)
+                logger.error(f"Publishing outbox events failed (attempt {failures}, retry in {delay:.1f}s): {e}")
+            else:
+                if count == self.batch_size:
+                    continue  # Full batch: more events are probably waiting
+                delay = self.poll_interval
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+        await self.sink.close()
+        logger.info(f"Outbox relay stopped: {self.published} events published")
+
+    async def _purge(self) -> None:
+        try:
+            async with async_session_maker() as db:
+                purged = await Outbox.purge(db)
+            if purged:
+                logger.info(f"Purged {purged} published outbox events")
+        except Exception as e:
+            logger.error(f"Outbox purge failed: {e}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Publish outbox events")
+    parser.add_argument("--batch-size", type=int, default=None, help="Events per batch (OUTBOX_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    import models  # noqa: F401 - register all models
+    relay = OutboxRelay(batch_size=args.batch_size)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, relay.stop)
+
+    try:
+        await relay.run()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+Outbox Sinks - where the relay publishes events
+
+A sink receives a batch of messages (outbox.events.to_message, id order)
+and must raise if any of them was not stored; the relay then retries the
+whole batch. Selected by OUTBOX_SINK:
+- "redis": one Redis stream per aggregate type ({OUTBOX_STREAM_PREFIX}:order),
+  consumed with XREAD / consumer groups
+- "file": JSON lines appended to OUTBOX_FILE_PATH
+- "memory": kept in a list (tests, development)
+"""
+
+import asyncio
+import json
+import os
+from typing import List
+
+from core.config import settings
+
+
+class MemorySink:
+    """In-process sink; published messages are kept in `messages`"""
+
+    def __init__(self):
+        self.messages: List[dict] = []
+
+    async def publish(self, messages: List[dict]) -> None:
+        self.messages.extend(messages)
+
+    async def close(self) -> None:
+        pass
+
+
+class FileSink:
+    """Append messages as JSON lines to a file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _append(self, lines: str) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def publish(self, messages: List[dict]) -> None:
+        lines = "".join(json.dumps(message, ensure_ascii=False) + "\n" for message in messages)
+        await asyncio.to_thread(self._append, lines)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisStreamSink:
+    """XADD messages to per-aggregate Redis streams, one round trip per batch"""
+
+    def __init__(self, url: str, prefix: str, maxlen: int):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.maxlen = maxlen or None
+
+    async def publish(self, messages: List[dict]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for message in messages:
+            fields = {
+                "id": message["id"],
+                "type": message["type"],
+                "aggregate_id": message["aggregate_id"],
+                "occurred_at": message["occurred_at"],
+                "payload": json.dumps(message["payload"], ensure_ascii=False),
+            }
+            pipe.xadd(
+                f"{self.prefix}:{message['aggregate_type']}",
+                fields,
+                maxlen=self.maxlen,
+                approximate=True,
+            )
+        # raise_on_error (default): a failed XADD fails the batch
+        await pipe.execute()
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_sink() -> MemorySink | FileSink | RedisStreamSink:
+    """Create the sink selected by OUTBOX_SINK ("redis", "file" or "memory")"""
+    if settings.OUTBOX_SINK == "redis":
+        return RedisStreamSink(settings.REDIS_URL, settings.OUTBOX_STREAM_PREFIX, settings.OUTBOX_STREAM_MAXLEN)
+    if settings.OUTBOX_SINK == "file":
+        return FileSink(settings.OUTBOX_FILE_PATH)
+    if settings.OUTBOX_SINK == "memory":
+        return MemorySink()
+    raise ValueError(f"Unknown OUTBOX_SINK '{settings.OUTBOX_SINK}'")
@@ -0,0 +1,151 @@
+"""
+Benchmark POST /cart/items - add-to-cart latency under concurrency.
+
+Runs the FastAPI app in-process against DATABASE_URL (no server needed).
+Creates bench users (bench-cart-N@example.com) on first run and clears
+their carts afterwards.
+
+Usage:
+    python scripts/bench_cart.py
+    python scripts/bench_cart.py --concurrency 1 10 50 --requests 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+import httpx
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from tabulate import tabulate
+
+from main import app
+from core.config import settings
+from core.database import engine, async_session_maker
+from core.security import create_access_token
+from catalog.models import Product
+from catalog.service import ProductService
+from orders.models import Cart, CartItem
+from users.models import User, UserRole
+from scripts.bench_utils import QueryCounter, timer, summarize
+
+BENCH_EMAIL = "bench-cart-{}@example.com"
+
+
+async def setup(users: int, min_stock: int) -> tuple[list[User], list[int]]:
+    """Create bench users and pick products with enough stock"""
+    async with async_session_maker() as db:
+        await db.execute(
+            pg_insert(User)
+            .values([
+                {
+                    "email": BENCH_EMAIL.format(i),
+                    "password_hash": "!bench-no-login",
+                    "full_name": f"Bench User {i}",
+                    "role": UserRole.customer,
+                }
+                for i in range(users)
+            ])
+            .on_conflict_do_nothing(index_elements=[User.email])
+        )
+        await db.commit()
+
+        result = await db.execute(
+            select(User).where(User.email.like(BENCH_EMAIL.format("%"))).order_by(User.id).limit(users)
+        )
+        bench_users = list(result.scalars().all())
+
+        result = await db.execute(
+            select(Product.id)
+            .where(Product.is_active == True, ProductService.available_stock_expr(Product.id) >= min_stock)
+            .limit(20)
+        )
+        product_ids = list(result.scalars().all())
+
+    return bench_users, product_ids
+
+
+async def clear_carts(users: list[User]) -> None:
+    async with async_session_maker() as db:
+        await db.execute(
+            delete(CartItem).where(
+                CartItem.cart_id.in_(select(Cart.id).where(Cart.user_id.in_([u.id for u in users])))
+            )
+        )
+        await db.commit()
+
+
+async def run_level(client: httpx.AsyncClient, users: list[User], product_ids: list[int],
+                    concurrency: int, requests_per_user: int) -> dict:
+    """Each of `concurrency` users adds `requests_per_user` items sequentially"""
+    url = f"{settings.API_V1_PREFIX}/cart/items"
+    samples: list[float] = []
+    errors = 0
+
+    async def user_loop(user: User):
+        nonlocal errors
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+        for _ in range(requests_per_user):
+            body = {"product_id": random.choice(product_ids), "quantity": 1}
+            with timer(samples):
+                response = await client.post(url, json=body, headers=headers)
+            if response.status_code != 200:
+                errors += 1
+
+    await clear_carts(users)
+    start = time.perf_counter()
+    await asyncio.gather(*(user_loop(u) for u in users[:concurrency]))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": errors,
+        "req_per_s": round(len(samples) / elapsed, 1),
+        **summarize(samples),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark add-to-cart")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 25, 50])
+    parser.add_argument("--requests", type=int, default=20, help="Requests per user")
+    args = parser.parse_args()
+
+    # A user's cart line can grow up to --requests units
+    users, product_ids = await setup(max(args.concurrency), min_stock=args.requests + 1)
+    if not product_ids:
+        print("❌ No active products with enough stock. Seed inventory first.")
+        return
+
+    print(f"🚀 Benchmarking POST /cart/items ({len(product_ids)} products) ...")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Queries per add-to-cart (includes the auth user lookup)
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(users[0].id)})}"}
+        with QueryCounter(engine) as counter:
+            await client.post(
+                f"{settings.API_V1_PREFIX}/cart/items",
+                json={"product_id": product_ids[0], "quantity": 1},
+                headers=headers,
+            )
+        print(f"   Queries per request: {counter.count}")
+
+        rows = [
+            await run_level(client, users, product_ids, level, args.requests)
+            for level in args.concurrency
+        ]
+
+    await clear_carts(users)
+    await engine.dispose()
+    print(tabulate(rows, headers="keys", tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
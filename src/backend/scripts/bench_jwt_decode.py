@@ -0,0 +1,67 @@
+"""
+Benchmark JWT verification - full decode per backend vs the verified-token cache.
+
+Decodes one access token repeatedly through core.security.decode_token with the
+cache disabled (each JWT_BACKEND that is installed) and enabled. No database needed.
+
+Usage:
+    python scripts/bench_jwt_decode.py
+    python scripts/bench_jwt_decode.py --iterations 20000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from tabulate import tabulate
+
+from core.config import settings
+from core import security
+from core.security import create_access_token, decode_token, token_cache
+from scripts.bench_utils import timer, percentile
+
+
+def bench(label: str, token: str, iterations: int) -> dict:
+    decode_token(token)  # Warm-up (fills the cache when enabled)
+    samples = []
+    for _ in range(iterations):
+        with timer(samples):
+            assert decode_token(token) is not None
+    return {
+        "mode": label,
+        "p50_us": round(percentile(samples, 50) * 1000, 1),
+        "p99_us": round(percentile(samples, 99) * 1000, 1),
+        "decodes_per_s": round(1000 / statistics.fmean(samples)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JWT verification")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    token = create_access_token({"sub": "1", "email": "bench@example.com", "role": "customer"})
+    backends = ["jose"] + (["pyjwt"] if security.pyjwt is not None else [])
+
+    print(f"🚀 Benchmarking JWT verification ({args.iterations} decodes per mode) ...")
+    rows = []
+    max_entries = token_cache.max_entries
+    for backend in backends:
+        settings.JWT_BACKEND = backend
+        token_cache.max_entries = 0
+        token_cache.clear()
+        rows.append(bench(f"{backend} (no cache)", token, args.iterations))
+
+    token_cache.max_entries = max_entries or 10_000
+    rows.append(bench("cached", token, args.iterations))
+    print(tabulate(rows, headers="keys", tablefmt="grid"))
+    if security.pyjwt is None:
+        print("PyJWT not installed - pip install PyJWT to compare JWT_BACKEND=pyjwt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark a login storm - does Argon2 hashing stall other requests?
+
+Runs the FastAPI app in-process against DATABASE_URL (no server needed).
+A probe requests --probe-path alone (baseline), then again while
+--concurrency clients log in as fast as they can. Repeated for each
+--workers value (PASSWORD_HASH_WORKERS; 0 = hash inline on the event loop).
+Creates bench users (bench-login-N@example.com) on first run.
+
+Usage:
+    python scripts/bench_login_storm.py
+    python scripts/bench_login_storm.py --workers 0 1 4 --concurrency 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+import httpx
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from tabulate import tabulate
+
+from main import app
+from core.config import settings
+from core.database import engine, async_session_maker
+from core.security import get_password_hash, shutdown_hash_pool
+from users.models import User, UserRole
+from scripts.bench_utils import timer, summarize
+
+BENCH_EMAIL = "bench-login-{}@example.com"
+BENCH_PASSWORD = "bench-password"
+PROBE_INTERVAL = 0.02  # seconds
+
+
+async def setup(users: int) -> None:
+    """Create bench users sharing one password hash"""
+    password_hash = get_password_hash(BENCH_PASSWORD)
+    async with async_session_maker() as db:
+        stmt = pg_insert(User).values([
+            {
+                "email": BENCH_EMAIL.format(i),
+                "password_hash": password_hash,
+                "full_name": f"Bench Login {i}",
+                "role": UserRole.customer,
+            }
+            for i in range(users)
+        ])
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[User.email],
+                set_={"password_hash": stmt.excluded.password_hash, "is_active": True},
+            )
+        )
+        await db.commit()
+
+
+async def probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event, samples: list) -> None:
+    """
+    Request `path` every PROBE_INTERVAL seconds until stopped.
+
+    Latency is measured from the scheduled send time, so time spent waiting
+    for a blocked event loop is counted (no coordinated omission).
+    """
+    loop = asyncio.get_running_loop()
+    scheduled = loop.time()
+    while not stop.is_set():
+        await asyncio.sleep(max(0.0, scheduled - loop.time()))
+        response = await client.get(path)
+        response.raise_for_status()
+        samples.append((loop.time() - scheduled) * 1000)
+        scheduled = max(scheduled + PROBE_INTERVAL, loop.time())
+
+
+async def login_loop(client: httpx.AsyncClient, index: int, stop: asyncio.Event,
+                     samples: list, statuses: dict) -> None:
+    url = f"{settings.API_V1_PREFIX}/auth/login"
+    body = {"email": BENCH_EMAIL.format(index), "password": BENCH_PASSWORD}
+    while not stop.is_set():
+        with timer(samples):
+            response = await client.post(url, json=body)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def run_phase(client: httpx.AsyncClient, path: str, duration: float, concurrency: int) -> dict:
+    """Probe for `duration` seconds while `concurrency` clients log in"""
+    stop = asyncio.Event()
+    probe_samples: list[float] = []
+    login_samples: list[float] = []
+    statuses: dict[int, int] = {}
+
+    tasks = [asyncio.create_task(probe(client, path, stop, probe_samples))]
+    tasks += [
+        asyncio.create_task(login_loop(client, i, stop, login_samples, statuses))
+        for i in range(concurrency)
+    ]
+    # UserService.authenticate prints debug lines for every login
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.sleep(duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    probe_stats = summarize(probe_samples)
+    return {
+        "logins": statuses.get(200, 0),
+        "login_per_s": round(statuses.get(200, 0) / duration, 1),
+        "rejected_503": statuses.get(503, 0),
+        "login_p95_ms": summarize(login_samples)["p95_ms"],
+        "probe_p50_ms": probe_stats["p50_ms"],
+        "probe_p99_ms": probe_stats["p99_ms"],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark a login storm")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4],
+                        help="PASSWORD_HASH_WORKERS values to compare (0 = inline)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent login clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per phase")
+    parser.add_argument("--probe-path", default="/health")
+    args = parser.parse_args()
+
+    await setup(args.concurrency)
+
+    print(f"🚀 Login storm: {args.concurrency} clients, probing {args.probe_path} ...")
+    transport = httpx.ASGITransport(app=app)
+    rows = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        baseline = await run_phase(client, args.probe_path, args.duration, concurrency=0)
+        rows.append({"workers": "-", "phase": "baseline", **baseline})
+
+        for workers in args.workers:
+            shutdown_hash_pool()
+            settings.PASSWORD_HASH_WORKERS = workers
+            result = await run_phase(client, args.probe_path, args.duration, args.concurrency)
+            rows.append({"workers": workers or "inline", "phase": "storm", **result})
+
+    shutdown_hash_pool()
+    await engine.dispose()
+    print(tabulate(rows, headers="keys", tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""
+Benchmark Argon2 cost profiles - how much CPU does one login cost?
+
+Times hash and verify for each profile in core.config.ARGON2_PROFILES and for
+the current settings (ARGON2_PROFILE plus ARGON2_* overrides). No database needed.
+verify is what a login pays; logins_per_s_per_worker is 1000 / verify p50, the
+ceiling of one PASSWORD_HASH_WORKERS thread.
+
+Usage:
+    python scripts/bench_password_hash.py
+    python scripts/bench_password_hash.py --iterations 50 --profiles low medium
+"""
+
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from tabulate import tabulate
+
+from core.config import settings, ARGON2_PROFILES
+from core.security import build_password_context
+from scripts.bench_utils import timer, summarize
+
+BENCH_PASSWORD = "bench-password"
+
+
+def bench_profile(name: str, params: dict, iterations: int) -> dict:
+    """Time `iterations` hashes and verifies with one set of costs"""
+    context = build_password_context(params)
+    hashed = context.hash(BENCH_PASSWORD)  # Warm-up
+
+    hash_samples, verify_samples = [], []
+    for _ in range(iterations):
+        with timer(hash_samples):
+            context.hash(BENCH_PASSWORD)
+        with timer(verify_samples):
+            context.verify(BENCH_PASSWORD, hashed)
+
+    hash_stats, verify_stats = summarize(hash_samples), summarize(verify_samples)
+    return {
+        "profile": name,
+        "t": params["time_cost"],
+        "m_kib": params["memory_cost"],
+        "p": params["parallelism"],
+        "hash_p50_ms": hash_stats["p50_ms"],
+        "verify_p50_ms": verify_stats["p50_ms"],
+        "verify_p95_ms": verify_stats["p95_ms"],
+        "logins_per_s_per_worker": round(1000 / verify_stats["p50_ms"], 1) if verify_stats["p50_ms"] else "-",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Argon2 cost profiles")
+    parser.add_argument("--profiles", nargs="+", default=list(ARGON2_PROFILES), choices=list(ARGON2_PROFILES))
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"🚀 Benchmarking Argon2 profiles ({args.iterations} iterations each) ...")
+    rows = [bench_profile(name, ARGON2_PROFILES[name], args.iterations) for name in args.profiles]
+    rows.append(bench_profile(f"settings ({settings.ARGON2_PROFILE})", settings.argon2_params, args.iterations))
+    print(tabulate(rows, headers="keys", tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    main()
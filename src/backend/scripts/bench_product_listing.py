@@ -0,0 +1,70 @@
+"""
+Benchmark GET /products - query count and latency per page size.
+
+Runs the FastAPI app in-process against DATABASE_URL (no server needed).
+
+Usage:
+    python scripts/bench_product_listing.py
+    python scripts/bench_product_listing.py --sizes 10 50 100 --iterations 200
+    python scripts/bench_product_listing.py --cached   # Keep the read-through cache on
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+import httpx
+from tabulate import tabulate
+
+from main import app
+from core.config import settings
+from core.database import engine
+from scripts.bench_utils import QueryCounter, timer, summarize
+
+
+async def bench_page_size(client: httpx.AsyncClient, size: int, iterations: int) -> dict:
+    """Fetch the first page `iterations` times and collect stats"""
+    url = f"{settings.API_V1_PREFIX}/products"
+    samples = []
+
+    # Warm-up (connection pool, statement cache)
+    await client.get(url, params={"size": size})
+
+    with QueryCounter(engine) as counter:
+        response = await client.get(url, params={"size": size})
+    response.raise_for_status()
+    items = len(response.json()["items"])
+
+    for _ in range(iterations):
+        with timer(samples):
+            response = await client.get(url, params={"size": size})
+        response.raise_for_status()
+
+    return {"page_size": size, "items": items, "queries": counter.count, **summarize(samples)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark product listing")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 20, 50, 100])
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--cached", action="store_true", help="Measure with the product list cache enabled")
+    args = parser.parse_args()
+
+    if not args.cached:
+        settings.PRODUCT_LIST_CACHE_TTL = 0
+
+    print("🚀 Benchmarking GET /products ...")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        rows = [await bench_page_size(client, size, args.iterations) for size in args.sizes]
+
+    await engine.dispose()
+    print(tabulate(rows, headers="keys", tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""
+Benchmark product search - full-text (search_vector) vs ILIKE substring match.
+
+Seeds synthetic products (SKU prefix BENCH-SEARCH-) with Vietnamese names on
+first run, then times ProductService.get_all for each term in both search modes.
+The count query runs in both modes, so total matches are part of the cost.
+
+Usage:
+    python scripts/bench_product_search.py
+    python scripts/bench_product_search.py --products 100000 --iterations 50
+    python scripts/bench_product_search.py --terms "sữa tươi" "mi goi" --cleanup
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from sqlalchemy import text, select, func, delete
+from tabulate import tabulate
+
+import models  # noqa: F401 - register all models
+from core.database import engine, async_session_maker
+from catalog.models import Product
+from catalog.schemas import ProductSearchMode
+from catalog.service import ProductService
+from scripts.bench_utils import timer, summarize
+
+BENCH_SKU_PREFIX = "BENCH-SEARCH-"
+
+DEFAULT_TERMS = ["sữa", "sua tuoi", "cà phê hòa tan", "BENCH-SEARCH-4242", "khongtontai"]
+
+SEED_SQL = text("""
+    INSERT INTO products (sku, name, description, base_price, unit, is_active)
+    SELECT
+        :prefix || g,
+        initcap(
+            (ARRAY['sữa', 'cà phê', 'trà', 'bánh', 'kẹo', 'mì', 'nước', 'bia', 'dầu gội', 'nước mắm'])[1 + g % 10]
+            || ' ' ||
+            (ARRAY['tươi', 'hòa tan', 'đặc', 'chua', 'gói', 'ngọt', 'cay', 'xanh', 'đen', 'dâu'])[1 + (g / 10) % 10]
+        ) || ' ' ||
+        (ARRAY['Vinamilk', 'Highlands', 'Oishi', 'Hảo Hảo', 'Lavie', 'Tiger', 'Clear', 'Nam Ngư'])[1 + (g / 100) % 8]
+        || ' ' || (50 + g % 950) || 'g',
+        'Sản phẩm mẫu số ' || g || ', hương vị '
+            || (ARRAY['truyền thống', 'đậm đà', 'thơm ngon', 'ít đường', 'nguyên chất'])[1 + (g / 7) % 5]
+            || ', đóng gói tiện lợi.',
+        1000 + (g % 500) * 100,
+        'gói',
+        TRUE
+    FROM generate_series(1, :count) AS g
+""")
+
+
+async def seed(count: int) -> None:
+    """Insert synthetic products up to `count` (search_vector filled by the trigger)"""
+    async with async_session_maker() as db:
+        existing = await db.scalar(
+            select(func.count(Product.id)).where(Product.sku.like(f"{BENCH_SKU_PREFIX}%"))
+        )
+        if existing == count:
+            print(f"   Using {existing} existing bench products")
+            return
+
+        print(f"   Seeding {count} bench products ...")
+        await db.execute(delete(Product).where(Product.sku.like(f"{BENCH_SKU_PREFIX}%")))
+        await db.execute(SEED_SQL, {"prefix": BENCH_SKU_PREFIX, "count": count})
+        await db.execute(text("ANALYZE products"))
+        await db.commit()
+
+
+async def cleanup() -> None:
+    async with async_session_maker() as db:
+        await db.execute(delete(Product).where(Product.sku.like(f"{BENCH_SKU_PREFIX}%")))
+        await db.commit()
+
+
+async def bench_term(term: str, mode: ProductSearchMode, iterations: int) -> dict:
+    """Run one search `iterations` times and collect stats"""
+    samples = []
+    async with async_session_maker() as db:
+        # Warm-up (statement cache, buffers)
+        products, total, _ = await ProductService.get_all(db, limit=20, search=term, search_mode=mode)
+
+        for _ in range(iterations):
+            with timer(samples):
+                await ProductService.get_all(db, limit=20, search=term, search_mode=mode)
+
+    return {
+        "term": term,
+        "mode": mode.value,
+        "matches": total,
+        "first_hit": products[0].sku if products else "-",
+        **summarize(samples),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark product search")
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--terms", nargs="+", default=DEFAULT_TERMS)
+    parser.add_argument("--cleanup", action="store_true", help="Delete bench products afterwards")
+    args = parser.parse_args()
+
+    print("🚀 Benchmarking product search ...")
+    await seed(args.products)
+
+    rows = []
+    for term in args.terms:
+        for mode in (ProductSearchMode.FULLTEXT, ProductSearchMode.CONTAINS):
+            rows.append(await bench_term(term, mode, args.iterations))
+
+    if args.cleanup:
+        await cleanup()
+
+    await engine.dispose()
+    print(tabulate(rows, headers="keys", tablefmt="grid"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
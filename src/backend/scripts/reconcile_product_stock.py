@@ -0,0 +1,63 @@
+"""
+Reconcile the product_stock summary with the inventory batches.
+
+Nightly job: batches that expired at midnight drop out of the summary, and any
+drift (e.g. batches written outside InventoryService by seed scripts) is
+repaired. With --check, only reports drift and exits with status 1 if found.
+
+Usage:
+    python scripts/reconcile_product_stock.py
+    python scripts/reconcile_product_stock.py --check
+
+Cron (shortly after midnight, server local time = the database's CURRENT_DATE):
+    5 0 * * * cd /app && python scripts/reconcile_product_stock.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from tabulate import tabulate
+
+import models  # noqa: F401 - register all models
+from core.cache import close_cache
+from core.database import engine, async_session_maker
+from catalog.service import invalidate_catalog_cache
+from inventory.service import InventoryService
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Reconcile product_stock with inventory batches")
+    parser.add_argument("--check", action="store_true", help="Report drift only, do not fix")
+    parser.add_argument("--limit", type=int, default=50, help="Max drifted products to print")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Products locked per transaction")
+    args = parser.parse_args()
+
+    async with async_session_maker() as db:
+        drift = await InventoryService.get_stock_drift(db, limit=args.limit)
+        if drift:
+            print(f"⚠️  {len(drift)}{'+' if len(drift) == args.limit else ''} products drifted:")
+            print(tabulate([item.model_dump() for item in drift], headers="keys", tablefmt="grid"))
+        else:
+            print("✅ product_stock is in sync")
+
+        if args.check:
+            await engine.dispose()
+            return 1 if drift else 0
+
+        changed = await InventoryService.reconcile_product_stock(db, chunk_size=args.chunk_size)
+        print(f"🔄 Reconciled product_stock: {changed} rows changed")
+
+    if changed:
+        await invalidate_catalog_cache()  # Cached product pages show stock
+        await close_cache()
+    await engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
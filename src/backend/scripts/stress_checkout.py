@@ -0,0 +1,252 @@
+"""
+Checkout Stress Test - concurrent create_from_cart on the same SKUs
+
+Creates STRESS-* products with a few batches each and N customers whose carts
+contain every stress product in a different (shuffled) order, then runs all
+checkouts concurrently. Verifies afterwards that:
+- no batch is oversold (quantity_reserved <= quantity_on_hand)
+- reserved stock equals the quantity of successful order lines
+- no checkout failed with a deadlock / serialization error
+
+Usage:
+    python scripts/stress_checkout.py
+    python scripts/stress_checkout.py --orders 500 --products 5 --connections 40
+    python scripts/stress_checkout.py --no-retry   # Surface raw deadlocks
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+import models  # noqa: F401 - register all models
+from core.config import settings
+from core.database import is_retryable_error
+from core.exceptions import InsufficientStockError
+from catalog.models import Product
+from inventory.models import InventoryBatch
+from inventory.service import InventoryService
+from orders.models import Order, OrderItem, Cart, CartItem
+from orders.schemas import OrderCreate
+from orders.service import OrderService
+from users.models import User, UserRole
+
+STRESS_SKU = "STRESS-{}"
+STRESS_EMAIL = "stress-checkout-{}@example.com"
+BATCHES_PER_PRODUCT = 3
+
+
+class RetryCounter(logging.Handler):
+    """Count transaction retries logged by core.database.run_with_retry"""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.count = 0
+
+    def emit(self, record):
+        if "Retrying transaction" in record.getMessage():
+            self.count += 1
+
+
+async def cleanup(db: AsyncSession) -> None:
+    """Remove data left by previous runs"""
+    user_ids = select(User.id).where(User.email.like(STRESS_EMAIL.format("%")))
+    product_ids = select(Product.id).where(Product.sku.like(STRESS_SKU.format("%")))
+
+    order_ids = select(Order.id).where(Order.user_id.in_(user_ids))
+    await db.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+    await db.execute(delete(Order).where(Order.user_id.in_(user_ids)))
+    await db.execute(delete(CartItem).where(CartItem.product_id.in_(product_ids)))
+    await db.execute(delete(InventoryBatch).where(InventoryBatch.product_id.in_(product_ids)))
+    await db.execute(delete(Product).where(Product.sku.like(STRESS_SKU.format("%"))))
+    await db.commit()
+
+
+async def setup(db: AsyncSession, orders: int, products: int, units_per_batch: int) -> tuple[list[User], list[int]]:
+    """Create stress products, batches, users and carts"""
+    product_ids = []
+    for i in range(products):
+        product = Product(
+            sku=STRESS_SKU.format(i),
+            name=f"Stress product {i}",
+            base_price=Decimal("10000"),
+            is_active=True,
+        )
+        db.add(product)
+        await db.flush()
+        product_ids.append(product.id)
+        for b in range(BATCHES_PER_PRODUCT):
+            db.add(InventoryBatch(
+                product_id=product.id,
+                batch_code=f"STRESS-{i}-{b}",
+                expiry_date=date.today() + timedelta(days=30 + b * 30),
+                quantity_on_hand=units_per_batch,
+                quantity_reserved=0,
+            ))
+    await db.flush()
+    await InventoryService.refresh_product_stock(db, product_ids)
+
+    await db.execute(
+        pg_insert(User)
+        .values([
+            {
+                "email": STRESS_EMAIL.format(i),
+                "password_hash": "!stress-no-login",
+                "full_name": f"Stress User {i}",
+                "role": UserRole.customer,
+            }
+            for i in range(orders)
+        ])
+        .on_conflict_do_nothing(index_elements=[User.email])
+    )
+    result = await db.execute(
+        select(User).where(User.email.like(STRESS_EMAIL.format("%"))).order_by(User.id).limit(orders)
+    )
+    users = list(result.scalars().all())
+
+    await db.execute(
+        pg_insert(Cart)
+        .values([{"user_id": u.id} for u in users])
+        .on_conflict_do_nothing(index_elements=[Cart.user_id])
+    )
+    result = await db.execute(select(Cart.id).where(Cart.user_id.in_([u.id for u in users])))
+    cart_ids = list(result.scalars().all())
+
+    # Every cart holds every stress product, inserted in a shuffled order
+    for cart_id in cart_ids:
+        shuffled = random.sample(product_ids, len(product_ids))
+        for product_id in shuffled:
+            db.add(CartItem(cart_id=cart_id, product_id=product_id, quantity=random.randint(1, 3)))
+
+    await db.commit()
+    return users, product_ids
+
+
+async def verify(db: AsyncSession, product_ids: list[int], units_per_batch: int) -> list[str]:
+    """Return a list of invariant violations"""
+    problems = []
+
+    result = await db.execute(
+        select(InventoryBatch).where(InventoryBatch.product_id.in_(product_ids))
+    )
+    batches = result.scalars().all()
+    for batch in batches:
+        if batch.quantity_reserved > batch.quantity_on_hand:
+            problems.append(
+                f"Batch {batch.batch_code} oversold: reserved {batch.quantity_reserved} > on hand {batch.quantity_on_hand}"
+            )
+        if batch.quantity_on_hand != units_per_batch:
+            problems.append(f"Batch {batch.batch_code} on-hand changed to {batch.quantity_on_hand}")
+
+    reserved = await db.execute(
+        select(InventoryBatch.product_id, func.sum(InventoryBatch.quantity_reserved))
+        .where(InventoryBatch.product_id.in_(product_ids))
+        .group_by(InventoryBatch.product_id)
+    )
+    ordered = await db.execute(
+        select(OrderItem.product_id, func.sum(OrderItem.quantity))
+        .where(OrderItem.product_id.in_(product_ids))
+        .group_by(OrderItem.product_id)
+    )
+    reserved_by_product = dict(reserved.all())
+    ordered_by_product = dict(ordered.all())
+    for product_id in product_ids:
+        r = reserved_by_product.get(product_id) or 0
+        o = ordered_by_product.get(product_id) or 0
+        if r != o:
+            problems.append(f"Product {product_id}: reserved {r} != ordered {o}")
+
+    # The product_stock summary must match the batches after concurrent checkouts
+    for item in await InventoryService.get_stock_drift(db, limit=1000):
+        if item.product_id in product_ids:
+            problems.append(
+                f"Product {item.product_id}: product_stock reserved {item.quantity_reserved} "
+                f"!= batches {item.actual_reserved}"
+            )
+
+    return problems
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent checkout stress test")
+    parser.add_argument("--orders", type=int, default=300, help="Concurrent checkouts")
+    parser.add_argument("--products", type=int, default=4, help="Shared SKUs in every cart")
+    parser.add_argument("--units-per-batch", type=int, default=100)
+    parser.add_argument("--connections", type=int, default=30, help="Connection pool size")
+    parser.add_argument("--no-retry", action="store_true", help="Disable deadlock/serialization retries")
+    parser.add_argument("--keep", action="store_true", help="Keep stress data after the run")
+    args = parser.parse_args()
+
+    if args.no_retry:
+        settings.DB_RETRY_ATTEMPTS = 1
+
+    retries = RetryCounter()
+    logging.getLogger("core.database").addHandler(retries)
+
+    engine = create_async_engine(settings.DATABASE_URL, pool_size=args.connections, max_overflow=0)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_maker() as db:
+        await cleanup(db)
+        users, product_ids = await setup(db, args.orders, args.products, args.units_per_batch)
+
+    total_units = args.products * BATCHES_PER_PRODUCT * args.units_per_batch
+    print(f"🚀 {len(users)} concurrent checkouts over {args.products} SKUs ({total_units} units in stock)")
+
+    outcomes = Counter()
+    order_data = OrderCreate(
+        delivery_address="1 Stress Test Street, District 1",
+        customer_phone="0900000000",
+        customer_name="Stress Test",
+    )
+
+    async def checkout(user: User):
+        async with session_maker() as db:
+            try:
+                await OrderService.create_from_cart(db, user, order_data)
+                outcomes["success"] += 1
+            except InsufficientStockError:
+                outcomes["insufficient_stock"] += 1
+            except Exception as e:
+                outcomes["deadlock" if is_retryable_error(e) else f"error: {type(e).__name__}"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(checkout(u) for u in users))
+    elapsed = time.perf_counter() - start
+
+    async with session_maker() as db:
+        problems = await verify(db, product_ids, args.units_per_batch)
+        if not args.keep:
+            await cleanup(db)
+
+    await engine.dispose()
+
+    print(f"⏱️  {elapsed:.2f}s ({len(users) / elapsed:.1f} checkouts/s), {retries.count} retries")
+    for outcome, count in sorted(outcomes.items()):
+        print(f"   {outcome}: {count}")
+
+    if outcomes["deadlock"] or problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        if outcomes["deadlock"]:
+            print(f"❌ {outcomes['deadlock']} checkouts failed with deadlock/serialization errors")
+        sys.exit(1)
+
+    print("✅ No oversell, no deadlocks")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+"""
+User Auth Cache - user snapshots and token revocation for stateless auth
+
+Lets get_current_user skip the users table on most requests:
+- snapshot: the public fields of a user (no password hash) for AUTH_USER_CACHE_TTL seconds
+- revocation: access tokens of a user issued before a timestamp are rejected;
+  the entry lives as long as an access token can
+
+Both live in the shared cache backend (core.cache), so with CACHE_BACKEND=redis
+a deactivation on one worker is seen by all of them.
+"""
+
+import logging
+import time
+from typing import Optional
+
+from core.cache import get_cache
+from core.config import settings
+from users.models import User
+from users.schemas import UserResponse
+
+logger = logging.getLogger(__name__)
+
+# Changing any of these makes the claims of existing tokens stale
+TOKEN_CLAIM_FIELDS = {"email", "role", "is_active", "password"}
+
+
+def _user_key(user_id: int) -> str:
+    return f"{settings.CACHE_KEY_PREFIX}:auth:user:{user_id}"
+
+
+def _revoked_key(user_id: int) -> str:
+    return f"{settings.CACHE_KEY_PREFIX}:auth:revoked:{user_id}"
+
+
+async def get_cached_user(user_id: int) -> Optional[User]:
+    """
+    Get a detached User built from the cached snapshot.
+
+    The object is not bound to a session and has no password_hash:
+    use it for identity and role checks only.
+    """
+    if settings.AUTH_USER_CACHE_TTL <= 0:
+        return None
+    try:
+        data = await get_cache().get(_user_key(user_id))
+        if data is None:
+            return None
+        return User(**UserResponse.model_validate_json(data).model_dump())
+    except Exception as e:
+        logger.warning(f"User cache read failed for {user_id}: {e}")
+        return None
+
+
+async def cache_user(user: User) -> None:
+    """Store a snapshot of an active user"""
+    if settings.AUTH_USER_CACHE_TTL <= 0 or not user.is_active:
+        return
+    try:
+        data = UserResponse.model_validate(user).model_dump_json()
+        await get_cache().set(_user_key(user.id), data, settings.AUTH_USER_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"User cache write failed for {user.id}: {e}")
+
+
+async def invalidate_user(user_id: int) -> None:
+    """Drop a user's snapshot (profile changed)"""
+    try:
+        await get_cache().delete(_user_key(user_id))
+    except Exception as e:
+        logger.warning(f"User cache invalidation failed for {user_id}: {e}")
+
+
+async def revoke_user_tokens(user_id: int) -> None:
+    """
+    Reject every access token of a user issued up to now.
+
+    Used when claims change (role, email, deactivation, password reset).
+    Refresh still works for active users, since /auth/refresh reads the
+    database and issues tokens with fresh claims.
+    """
+    await invalidate_user(user_id)
+    try:
+        await get_cache().set(
+            _revoked_key(user_id),
+            str(int(time.time())),
+            settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        )
+    except Exception as e:
+        logger.error(f"Token revocation failed for user {user_id}: {e}")
+
+
+async def is_token_revoked(user_id: int, issued_at: Optional[int]) -> Optional[bool]:
+    """
+    Check a token against the revocation list.
+
+    Returns None if the cache is unavailable, so callers can fall back to
+    the database. `iat` has whole-second resolution, so tokens issued in the
+    second of the revocation are rejected too (the client logs in again).
+    """
+    try:
+        revoked_at = await get_cache().get(_revoked_key(user_id))
+    except Exception as e:
+        logger.warning(f"Revocation check failed for user {user_id}: {e}")
+        return None
+    if revoked_at is None:
+        return False
+    return issued_at is None or issued_at <= int(revoked_at)
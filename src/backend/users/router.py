@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
+from core.pagination import wants_total
 from users.models import UserRole
 from users.schemas import UserResponse, UserListResponse, UserAdminUpdate
 from users.service import UserService
@@ -21,6 +22,8 @@ async def list_users(
     size: int = Query(20, ge=1, le=100),
     role: Optional[UserRole] = None,
     is_active: Optional[bool] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces page)"),
+    include_total: Optional[bool] = Query(None, description="Count all matches (default: offset pages only)"),
     db: AsyncSession = Depends(get_db),
     current_user = Depends(require_roles([UserRole.admin]))
 ):
@@ -28,15 +31,20 @@ async def list_users(
     List all users (Admin only)
     
     - Supports pagination and filtering by role/status
+    - Keyset pagination: follow next_cursor instead of page numbers
     """
     skip = (page - 1) * size
-    users, total = await UserService.get_all(db, skip=skip, limit=size, role=role, is_active=is_active)
+    users, total, next_cursor = await UserService.get_all(
+        db, skip=skip, limit=size, role=role, is_active=is_active,
+        cursor=cursor, with_total=wants_total(cursor, include_total)
+    )
     
     return UserListResponse(
         items=[UserResponse.model_validate(u) for u in users],
         total=total,
-        page=page,
-        size=size
+        page=None if cursor else page,
+        size=size,
+        next_cursor=next_cursor
     )
 
 
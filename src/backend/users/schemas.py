@@ -48,9 +48,10 @@ class UserResponse(UserBase):
 class UserListResponse(BaseModel):
     """Schema for paginated user list"""
     items: list[UserResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # Omitted for cursor pages unless include_total=true
+    page: Optional[int] = None  # None for cursor pages
     size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
 
 
 # Admin schemas
@@ -2,14 +2,57 @@
 User Service - Business Logic
 """
 
+import asyncio
+import logging
 from typing import Optional, List
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from users.models import User, UserRole
 from users.schemas import UserCreate, UserUpdate, UserAdminUpdate
-from core.security import get_password_hash, verify_password
+from users.cache import TOKEN_CLAIM_FIELDS, invalidate_user, revoke_user_tokens
+from core.config import settings
+from core.database import async_session_maker
+from core.security import get_password_hash_async, verify_password_async, password_needs_rehash
 from core.exceptions import NotFoundException, ConflictException
+from core.pagination import Keyset
+
+
+logger = logging.getLogger(__name__)
+
+USER_KEYSET = Keyset(User.id)
+
+# Running rehash tasks (the event loop only keeps weak references)
+_rehash_tasks: set = set()
+
+
+async def _sync_auth_cache(user_id: int, changed_fields) -> None:
+    """Revoke tokens if token claims changed, otherwise just drop the cached snapshot"""
+    if TOKEN_CLAIM_FIELDS & set(changed_fields):
+        await revoke_user_tokens(user_id)
+    else:
+        await invalidate_user(user_id)
+
+
+async def _rehash_password(user_id: int, old_hash: str, password: str) -> None:
+    """
+    Replace a legacy hash with one made by the current settings.
+    
+    Runs after the login response in its own session. The update only applies
+    if the stored hash is unchanged, so a concurrent password change wins.
+    Same password, so tokens and the user snapshot stay valid.
+    """
+    try:
+        new_hash = await get_password_hash_async(password)
+        async with async_session_maker() as db:
+            await db.execute(
+                update(User)
+                .where(User.id == user_id, User.password_hash == old_hash)
+                .values(password_hash=new_hash)
+            )
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Password rehash failed for user {user_id}: {e}")
 
 
 class UserService:
@@ -33,9 +76,16 @@ class UserService:
         skip: int = 0, 
         limit: int = 20,
         role: Optional[UserRole] = None,
-        is_active: Optional[bool] = None
-    ) -> tuple[List[User], int]:
-        """Get all users with pagination and filters"""
+        is_active: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        with_total: bool = True,
+    ) -> tuple[List[User], Optional[int], Optional[str]]:
+        """
+        Get all users with pagination and filters.
+        
+        Pages by OFFSET (skip) or by keyset `cursor`; returns (users, total, next_cursor).
+        total is None when with_total is False.
+        """
         query = select(User)
         count_query = select(func.count(User.id))
         
@@ -48,15 +98,15 @@ class UserService:
             count_query = count_query.where(User.is_active == is_active)
         
         # Get total count
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
+        total = (await db.execute(count_query)).scalar() if with_total else None
         
         # Get paginated results
-        query = query.offset(skip).limit(limit).order_by(User.id)
-        result = await db.execute(query)
-        users = result.scalars().all()
+        if not cursor:
+            query = query.offset(skip)
+        result = await db.execute(USER_KEYSET.apply(query, cursor, limit))
+        users, next_cursor = USER_KEYSET.page(result.scalars().all(), limit)
         
-        return list(users), total
+        return users, total, next_cursor
     
     @staticmethod
     async def create(db: AsyncSession, user_data: UserCreate) -> User:
@@ -69,7 +119,7 @@ class UserService:
         # Create user
         user = User(
             email=user_data.email,
-            password_hash=get_password_hash(user_data.password),
+            password_hash=await get_password_hash_async(user_data.password),
             full_name=user_data.full_name,
             phone=user_data.phone,
             address=user_data.address,
@@ -93,6 +143,7 @@ class UserService:
             setattr(user, field, value)
         
         await db.commit()
+        await _sync_auth_cache(user_id, update_data)
         await db.refresh(user)
         return user
     
@@ -105,9 +156,11 @@ class UserService:
         
         update_data = user_data.model_dump(exclude_unset=True)
         
+        changed_fields = set(update_data)
+        
         # Handle password separately
         if "password" in update_data:
-            update_data["password_hash"] = get_password_hash(update_data.pop("password"))
+            update_data["password_hash"] = await get_password_hash_async(update_data.pop("password"))
         
         # Check email uniqueness
         if "email" in update_data and update_data["email"] != user.email:
@@ -119,6 +172,7 @@ class UserService:
             setattr(user, field, value)
         
         await db.commit()
+        await _sync_auth_cache(user_id, changed_fields)
         await db.refresh(user)
         return user
     
@@ -131,6 +185,7 @@ class UserService:
         
         user.is_active = False
         await db.commit()
+        await revoke_user_tokens(user_id)
         return True
     
     @staticmethod
@@ -145,7 +200,7 @@ class UserService:
         print(f"--- DEBUG AUTH: User found. ID: {user.id}, Role: {user.role} ---")
         print(f"--- DEBUG AUTH: Stored Hash: {user.password_hash} ---")
         
-        is_valid = verify_password(password, user.password_hash)
+        is_valid = await verify_password_async(password, user.password_hash)
         if not is_valid:
             print(f"--- DEBUG AUTH: Password verification FAILED for '{email}' ---")
             return None
@@ -154,6 +209,11 @@ class UserService:
             print(f"--- DEBUG AUTH: User '{email}' is INACTIVE ---")
             return None
             
+        if settings.PASSWORD_REHASH_ON_LOGIN and password_needs_rehash(user.password_hash):
+            task = asyncio.create_task(_rehash_password(user.id, user.password_hash, password))
+            _rehash_tasks.add(task)
+            task.add_done_callback(_rehash_tasks.discard)
+            
         print(f"--- DEBUG AUTH: Success! Authenticated '{email}' ---")
         return user
 
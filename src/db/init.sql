@@ -30,6 +30,9 @@ CREATE TYPE payment_method AS ENUM ('cod', 'momo', 'vnpay', 'bank_transfer');
 -- Payment status
 CREATE TYPE payment_status AS ENUM ('pending', 'paid', 'failed', 'refunded');
 
+-- Background job status (finished jobs are deleted)
+CREATE TYPE job_status AS ENUM ('queued', 'running', 'failed');
+
 -- =====================================================
 -- TABLES
 -- =====================================================
@@ -71,9 +74,11 @@ CREATE TABLE products (
     sale_price DECIMAL(12, 2) CHECK (sale_price >= 0),
     unit VARCHAR(50) DEFAULT 'cái',  -- cái, chai, hộp, kg, gói...
     image_path VARCHAR(500),
+    image_variants JSON,  -- Thumbnail URLs {format: {width: url}}
     is_active BOOLEAN DEFAULT TRUE,
     is_age_restricted BOOLEAN DEFAULT FALSE,
     min_age INTEGER DEFAULT 0,
+    search_vector TSVECTOR,  -- Maintained by trigger update_products_search_vector
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -94,6 +99,18 @@ CREATE TABLE inventory_batches (
     UNIQUE(product_id, batch_code)
 );
 
+-- Product Stock summary (tồn kho theo sản phẩm) - sellable (non-expired) batches only.
+-- Updated incrementally by InventoryService in the same transaction as the batches,
+-- rebuilt nightly by scripts/reconcile_product_stock.py (expiry rollover, drift).
+CREATE TABLE product_stock (
+    product_id INTEGER PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+    quantity_on_hand INTEGER NOT NULL DEFAULT 0,
+    quantity_reserved INTEGER NOT NULL DEFAULT 0,
+    quantity_available INTEGER GENERATED ALWAYS AS (quantity_on_hand - quantity_reserved) STORED,
+    next_expiry DATE,  -- Earliest expiry among batches with available stock
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Orders table
 CREATE TABLE orders (
     id SERIAL PRIMARY KEY,
@@ -144,6 +161,34 @@ CREATE TABLE cart_items (
     UNIQUE(cart_id, product_id)
 );
 
+-- Background jobs (jobs package, run by `python -m jobs.worker`)
+CREATE TABLE jobs (
+    id BIGSERIAL PRIMARY KEY,
+    queue VARCHAR(50) NOT NULL DEFAULT 'default',
+    name VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    status job_status NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_at TIMESTAMP WITH TIME ZONE,
+    locked_by VARCHAR(100),
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Outbox of domain events, written in the transaction of the change
+-- (outbox package, published by `python -m outbox.relay`)
+CREATE TABLE outbox_events (
+    id BIGSERIAL PRIMARY KEY,
+    aggregate_type VARCHAR(50) NOT NULL,
+    aggregate_id VARCHAR(50) NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    published_at TIMESTAMP WITH TIME ZONE
+);
+
 -- =====================================================
 -- INDEXES FOR PERFORMANCE
 -- =====================================================
@@ -163,18 +208,21 @@ CREATE INDEX idx_products_sku ON products(sku);
 CREATE INDEX idx_products_category ON products(category_id);
 CREATE INDEX idx_products_active ON products(is_active);
 CREATE INDEX idx_products_age_restricted ON products(is_age_restricted);
-CREATE INDEX idx_products_name_search ON products USING gin(to_tsvector('simple', name));
+CREATE INDEX idx_products_search ON products USING gin(search_vector);
 
 -- Inventory indexes
 CREATE INDEX idx_inventory_product ON inventory_batches(product_id);
 CREATE INDEX idx_inventory_expiry ON inventory_batches(expiry_date);
+CREATE INDEX idx_inventory_fefo ON inventory_batches((COALESCE(expiry_date, 'infinity'::date)), id);  -- Keyset pagination
 CREATE INDEX idx_inventory_available ON inventory_batches(product_id, expiry_date) 
     WHERE quantity_on_hand > quantity_reserved;
+CREATE INDEX idx_product_stock_available ON product_stock(quantity_available);
 
 -- Orders indexes
 CREATE INDEX idx_orders_user ON orders(user_id);
 CREATE INDEX idx_orders_status ON orders(status);
-CREATE INDEX idx_orders_created ON orders(created_at DESC);
+CREATE INDEX idx_orders_created ON orders(created_at DESC, id DESC);  -- Keyset pagination
+CREATE INDEX idx_orders_user_created ON orders(user_id, created_at DESC, id DESC);
 CREATE INDEX idx_orders_payment ON orders(payment_status);
 
 -- Order items indexes
@@ -185,6 +233,14 @@ CREATE INDEX idx_order_items_product ON order_items(product_id);
 CREATE INDEX idx_cart_items_cart ON cart_items(cart_id);
 CREATE INDEX idx_cart_items_product ON cart_items(product_id);
 
+-- Jobs indexes
+CREATE INDEX idx_jobs_ready ON jobs(queue, run_at, id) WHERE status = 'queued';  -- Claim order
+CREATE INDEX idx_jobs_running ON jobs(locked_at) WHERE status = 'running';
+
+-- Outbox indexes
+CREATE INDEX idx_outbox_unpublished ON outbox_events(id) WHERE published_at IS NULL;  -- Relay scan
+CREATE INDEX idx_outbox_published ON outbox_events(published_at) WHERE published_at IS NOT NULL;  -- Purge
+
 -- =====================================================
 -- FUNCTIONS & TRIGGERS
 -- =====================================================
@@ -219,20 +275,63 @@ CREATE TRIGGER update_carts_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
--- Function to calculate available stock
+-- Function to maintain products.search_vector (full-text search)
+-- unaccent() is not IMMUTABLE, so it cannot be used in an expression index:
+-- the vector is stored and kept in sync by this trigger instead
+CREATE OR REPLACE FUNCTION update_products_search_vector()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', unaccent(COALESCE(NEW.name, ''))), 'A') ||
+        setweight(to_tsvector('simple', unaccent(COALESCE(NEW.sku, ''))), 'A') ||
+        setweight(to_tsvector('simple', unaccent(COALESCE(NEW.description, ''))), 'C');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER update_products_search_vector
+    BEFORE INSERT OR UPDATE OF name, sku, description ON products
+    FOR EACH ROW
+    EXECUTE FUNCTION update_products_search_vector();
+
+-- Function to get available stock (from the product_stock summary)
 CREATE OR REPLACE FUNCTION get_available_stock(p_product_id INTEGER)
 RETURNS INTEGER AS $$
 BEGIN
     RETURN COALESCE(
-        (SELECT SUM(quantity_on_hand - quantity_reserved)
-         FROM inventory_batches
-         WHERE product_id = p_product_id
-           AND (expiry_date IS NULL OR expiry_date > CURRENT_DATE)),
+        (SELECT quantity_available
+         FROM product_stock
+         WHERE product_id = p_product_id),
         0
     );
 END;
 $$ LANGUAGE plpgsql;
 
+-- Function to recompute product_stock rows from the batches (NULL = every product).
+-- Callers lock the rows first (see InventoryService.refresh_product_stock) so this
+-- statement's snapshot includes every change committed before the lock was granted.
+-- Returns the number of rows inserted or changed.
+CREATE OR REPLACE FUNCTION refresh_product_stock(p_product_ids INTEGER[] DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    changed INTEGER;
+BEGIN
+    INSERT INTO product_stock (product_id, quantity_on_hand, quantity_reserved, next_expiry, updated_at)
+    SELECT product_id, quantity_on_hand, quantity_reserved, next_expiry, CURRENT_TIMESTAMP
+    FROM v_product_stock_actual
+    WHERE p_product_ids IS NULL OR product_id = ANY(p_product_ids)
+    ON CONFLICT (product_id) DO UPDATE SET
+        quantity_on_hand = EXCLUDED.quantity_on_hand,
+        quantity_reserved = EXCLUDED.quantity_reserved,
+        next_expiry = EXCLUDED.next_expiry,
+        updated_at = EXCLUDED.updated_at
+    WHERE (product_stock.quantity_on_hand, product_stock.quantity_reserved, product_stock.next_expiry)
+        IS DISTINCT FROM (EXCLUDED.quantity_on_hand, EXCLUDED.quantity_reserved, EXCLUDED.next_expiry);
+    GET DIAGNOSTICS changed = ROW_COUNT;
+    RETURN changed;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Function to get product price (sale_price or base_price)
 CREATE OR REPLACE FUNCTION get_product_price(p_product_id INTEGER)
 RETURNS DECIMAL AS $$
@@ -255,16 +354,25 @@ SELECT
     p.*,
     c.name AS category_name,
     c.slug AS category_slug,
-    COALESCE(get_available_stock(p.id), 0) AS available_stock,
+    COALESCE(ps.quantity_available, 0) AS available_stock,
     COALESCE(p.sale_price, p.base_price) AS current_price,
-    (SELECT MIN(expiry_date) 
-     FROM inventory_batches ib 
-     WHERE ib.product_id = p.id 
-       AND ib.quantity_on_hand > ib.quantity_reserved
-       AND (ib.expiry_date IS NULL OR ib.expiry_date > CURRENT_DATE)
-    ) AS nearest_expiry
+    ps.next_expiry AS nearest_expiry
+FROM products p
+LEFT JOIN categories c ON p.category_id = c.id
+LEFT JOIN product_stock ps ON ps.product_id = p.id;
+
+-- View: Stock per product recomputed from sellable batches (source of truth for product_stock)
+CREATE OR REPLACE VIEW v_product_stock_actual AS
+SELECT 
+    p.id AS product_id,
+    COALESCE(SUM(ib.quantity_on_hand), 0)::INTEGER AS quantity_on_hand,
+    COALESCE(SUM(ib.quantity_reserved), 0)::INTEGER AS quantity_reserved,
+    MIN(ib.expiry_date) FILTER (WHERE ib.quantity_on_hand > ib.quantity_reserved) AS next_expiry
 FROM products p
-LEFT JOIN categories c ON p.category_id = c.id;
+LEFT JOIN inventory_batches ib
+    ON ib.product_id = p.id
+   AND (ib.expiry_date IS NULL OR ib.expiry_date > CURRENT_DATE)
+GROUP BY p.id;
 
 -- View: Order summary
 CREATE OR REPLACE VIEW v_order_summary AS
@@ -352,6 +352,9 @@ INSERT INTO inventory_batches (product_id, batch_code, expiry_date, quantity_on_
 -- Thăng Long
 (78, 'TOBACCO004-2024-001', CURRENT_DATE + INTERVAL '18 months', 70, 12000, 'Quầy thu ngân');
 
+-- Build the product_stock summary from the batches above
+SELECT refresh_product_stock();
+
 -- =====================================================
 -- SAMPLE ORDERS (5 đơn hàng mẫu)
 -- =====================================================